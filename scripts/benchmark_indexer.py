@@ -0,0 +1,434 @@
+# scripts/benchmark_indexer.py
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+
+project_root_path = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(project_root_path / 'src'))
+
+# Configuration is loaded and logged on import; keep stdout for the JSON report.
+structlog.configure(logger_factory=structlog.PrintLoggerFactory(sys.stderr))
+
+try:
+    from ai_assistant.config import ai_settings
+    from ai_assistant.indexer import EmbeddingProvider, Indexer
+    from ai_assistant.utils.mock_embedding_server import MockEmbeddingServer
+except ImportError:
+    print("FATAL: Could not import required modules.", file=sys.stderr)
+    print("Please install the indexing extras (e.g., 'pip install -e .[indexing]') before running this script.", file=sys.stderr)
+    sys.exit(1)
+
+DEFAULT_MIX = "python=0.5,markdown=0.2,javascript=0.2,yaml=0.05,json=0.05"
+EXTENSIONS = {"python": ".py", "markdown": ".md", "javascript": ".js", "yaml": ".yaml", "json": ".json"}
+WORDS = ("index", "chunk", "vector", "branch", "state", "cache", "token", "query", "model", "table",
+         "batch", "worker", "source", "manifest", "embedding", "pipeline", "commit", "project")
+
+# --- Synthetic repository ---
+
+class SyntheticRepo:
+    """Deterministic source files of a given language mix, shaped like real code so every chunker path is exercised."""
+
+    def __init__(self, root: Path, files: int, lines_per_file: int, mix: Dict[str, float], seed: int):
+        self.root = root
+        self.files = files
+        self.lines_per_file = lines_per_file
+        self.mix = mix
+        self.rng = random.Random(seed)
+
+    def _name(self) -> str:
+        return "_".join(self.rng.choice(WORDS) for _ in range(2))
+
+    def _sentence(self) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(self.rng.randint(6, 14))).capitalize() + "."
+
+    def _python(self) -> str:
+        lines = ["import os", "from typing import List", ""]
+        while len(lines) < self.lines_per_file:
+            cls = self._name().title().replace("_", "")
+            lines += [f"class {cls}:", f'    """{self._sentence()}"""', ""]
+            for _ in range(self.rng.randint(2, 5)):
+                lines += [f"    def {self._name()}(self, {self._name()}: int) -> List[str]:",
+                          f'        """{self._sentence()}"""']
+                lines += [f"        {self._name()} = {self.rng.randint(0, 999)}  # {self._sentence()}" for _ in range(self.rng.randint(3, 12))]
+                lines += ["        return []", ""]
+        return "\n".join(lines[:self.lines_per_file]) + "\n"
+
+    def _javascript(self) -> str:
+        lines = ["'use strict';", ""]
+        while len(lines) < self.lines_per_file:
+            lines += [f"function {self._name()}({self._name()}) {{", f"  // {self._sentence()}"]
+            lines += [f"  const {self._name()} = {self.rng.randint(0, 999)};" for _ in range(self.rng.randint(3, 15))]
+            lines += ["  return null;", "}", ""]
+        return "\n".join(lines[:self.lines_per_file]) + "\n"
+
+    def _markdown(self) -> str:
+        lines = [f"# {self._name().replace('_', ' ').title()}", ""]
+        while len(lines) < self.lines_per_file:
+            lines += [f"## {self._sentence()}", ""] + [self._sentence() for _ in range(self.rng.randint(2, 8))] + [""]
+        return "\n".join(lines[:self.lines_per_file]) + "\n"
+
+    def _yaml(self) -> str:
+        lines = []
+        while len(lines) < self.lines_per_file:
+            lines.append(f"{self._name()}:")
+            lines += [f"  {self._name()}: {self.rng.randint(0, 999)}" for _ in range(self.rng.randint(2, 10))]
+        return "\n".join(lines[:self.lines_per_file]) + "\n"
+
+    def _json(self) -> str:
+        sections = max(1, self.lines_per_file // 8)
+        data = {f"{self._name()}_{i}": {self._name(): self._sentence() for _ in range(6)} for i in range(sections)}
+        return json.dumps(data, indent=2) + "\n"
+
+    def generate(self) -> Dict[str, int]:
+        languages, weights = zip(*self.mix.items())
+        counts = {language: 0 for language in languages}
+        for i in range(self.files):
+            language = self.rng.choices(languages, weights)[0]
+            directory = self.root / f"pkg_{i // 50:03d}" / f"mod_{i // 10 % 5}"
+            directory.mkdir(parents=True, exist_ok=True)
+            content = getattr(self, f"_{language}")()
+            (directory / f"{self._name()}_{i}{EXTENSIONS[language]}").write_text(content, encoding="utf-8")
+            counts[language] += 1
+        return counts
+
+    def touch(self, fraction: float) -> int:
+        """Appends a line to a fraction of the files, for the incremental scenario."""
+        # JSON has no comment syntax, so those files are left alone.
+        paths = sorted(p for p in self.root.rglob("*") if p.is_file() and p.suffix in (".py", ".md", ".js", ".yaml"))
+        changed = self.rng.sample(paths, min(len(paths), max(1, int(len(paths) * fraction))))
+        for path in changed:
+            comment = "//" if path.suffix == ".js" else "#"
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(f"{comment} {self._sentence()}\n")
+        return len(changed)
+
+# --- Stand-ins for the model and the database ---
+
+class StubEmbeddingProvider:
+    """Deterministic pseudo-embeddings with an optional simulated per-text cost; measures everything but the model."""
+
+    def __init__(self, dim: int, latency_ms_per_text: float):
+        self.provider_name = "stub"
+        self.model_name = "stub-embedding"
+        self.backend = None
+        self.cache_key = f"stub-embedding-{dim}"
+        self.embedding_dim = dim
+        self.dimensions = None
+        self.latency_ms_per_text = latency_ms_per_text
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_ms_per_text:
+            time.sleep(self.latency_ms_per_text * len(texts) / 1000)
+        vectors = []
+        for text in texts:
+            digest = hashlib.sha512(text.encode("utf-8")).digest()
+            raw = (digest * (self.embedding_dim * 4 // len(digest) + 1))[:self.embedding_dim * 4]
+            vectors.append([x / 4294967295.0 for x in struct.unpack(f"<{self.embedding_dim}I", raw)])
+        return vectors
+
+class InMemoryIndexer(Indexer):
+    """Indexer whose database writes and lookups go to a dict, isolating the indexer's own cost."""
+
+    def _init_database(self):
+        self.rows_by_source: Dict[str, List[Dict[str, Any]]] = {}
+        self.vectors_by_hash: Dict[str, List[float]] = {}
+
+    def _setup_database_table(self, force_reindex: bool = False):
+        pass
+
+    def _should_defer_index_build(self, force_reindex, files_to_index) -> bool:
+        return False
+
+    def _fetch_existing_embeddings(self, chunk_hashes: List[str]) -> Dict[str, List[float]]:
+        return {h: self.vectors_by_hash[h] for h in chunk_hashes if h in self.vectors_by_hash}
+
+    def _store(self, rel_path_str: str, state_entry: Dict[str, Any], chunks: List[Dict[str, Any]]):
+        rows = [self._row_values(c) for c in chunks]
+        self.rows_by_source[rel_path_str] = rows
+        self.vectors_by_hash.update((r["chunk_hash"], r["embedding"]) for r in rows)
+        self.state[rel_path_str] = state_entry
+
+    def _delete_sources(self, sources: List[str]):
+        for source in sources:
+            self.rows_by_source.pop(source, None)
+
+    def _sync_file(self, rel_path_str: str, state_entry: Dict[str, Any], chunks: List[Dict[str, Any]]):
+        self._store(rel_path_str, state_entry, chunks)
+
+    def _sync_files_bulk(self, items: List[Tuple[str, Dict[str, Any], List[Dict[str, Any]]]]):
+        for item in items:
+            self._store(*item)
+
+    def _iter_chunk_hashes(self, sources: Optional[List[str]] = None) -> Iterable[Tuple[str, str, str]]:
+        for source in (self.rows_by_source if sources is None else sources):
+            for row in self.rows_by_source.get(source, ()):
+                yield source, row["id"], row["chunk_hash"]
+
+    def _upload_artifacts_to_oci(self):
+        pass
+
+# --- Measurement ---
+
+def current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # ru_maxrss is the lifetime peak: kilobytes on Linux, bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if platform.system() == "Darwin" else peak * 1024
+
+class PhaseRecorder:
+    """Wall time and peak RSS per named phase. RSS is sampled by a background thread while a phase is open."""
+
+    def __init__(self, sample_interval: float = 0.01):
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.sample_interval = sample_interval
+
+    @contextmanager
+    def phase(self, name: str):
+        peak = [current_rss_bytes()]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(self.sample_interval):
+                peak[0] = max(peak[0], current_rss_bytes())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            done.set()
+            sampler.join()
+            entry = self.phases.setdefault(name, {"seconds": 0.0, "peak_rss_bytes": 0})
+            entry["seconds"] += elapsed
+            entry["peak_rss_bytes"] = max(entry["peak_rss_bytes"], peak[0], current_rss_bytes())
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def instrument(indexer: Indexer, recorder: PhaseRecorder) -> Dict[str, Any]:
+    """Wraps the indexer's phase methods on the instance. Returns the counters they fill in."""
+    counters: Dict[str, Any] = {"embed_batches": [], "upserts": [], "chunks": 0, "files": 0}
+    walk, find_modified, process = indexer._walk_project, indexer._find_modified_files, indexer._process_files
+    embed, sync_file, sync_bulk = indexer._embed_chunks, indexer._sync_file, indexer._sync_files_bulk
+
+    def timed_walk():
+        with recorder.phase("walk"):
+            paths = list(walk())
+        return iter(paths)
+
+    def timed_find_modified(*args, **kwargs):
+        with recorder.phase("change_detection"):
+            return find_modified(*args, **kwargs)
+
+    def timed_process(files):
+        counters["files"] += len(files)
+        with recorder.phase("pipeline"):
+            return process(files)
+
+    def timed_embed(chunks):
+        start = time.perf_counter()
+        embedded = embed(chunks)
+        counters["embed_batches"].append((time.perf_counter() - start, len(chunks), embedded))
+        counters["chunks"] += len(chunks)
+        return embedded
+
+    def timed_sync_file(rel_path_str, state_entry, chunks):
+        start = time.perf_counter()
+        sync_file(rel_path_str, state_entry, chunks)
+        counters["upserts"].append((time.perf_counter() - start, 1, len(chunks)))
+
+    def timed_sync_bulk(items):
+        start = time.perf_counter()
+        sync_bulk(items)
+        counters["upserts"].append((time.perf_counter() - start, len(items), sum(len(c) for _, _, c in items)))
+
+    indexer._walk_project = timed_walk
+    indexer._find_modified_files = timed_find_modified
+    indexer._process_files = timed_process
+    indexer._embed_chunks = timed_embed
+    indexer._sync_file = timed_sync_file
+    indexer._sync_files_bulk = timed_sync_bulk
+    return counters
+
+def run_scenario(name: str, indexer: Indexer, **run_kwargs) -> Dict[str, Any]:
+    recorder = PhaseRecorder()
+    counters = instrument(indexer, recorder)
+    with recorder.phase("total"):
+        indexer.run(**run_kwargs)
+
+    total = recorder.phases["total"]["seconds"]
+    pipeline = recorder.phases.get("pipeline", {}).get("seconds", 0.0)
+    embed_seconds = sum(seconds for seconds, _, _ in counters["embed_batches"])
+    embedded = sum(n for _, _, n in counters["embed_batches"])
+    upsert_latencies = [seconds for seconds, _, _ in counters["upserts"]]
+    return {
+        "scenario": name,
+        "files_indexed": counters["files"],
+        "chunks": counters["chunks"],
+        "files_per_second": round(counters["files"] / pipeline, 2) if pipeline else None,
+        "chunks_per_second": round(counters["chunks"] / pipeline, 2) if pipeline else None,
+        "embedding": {
+            "batches": len(counters["embed_batches"]),
+            "texts_embedded": embedded,
+            "texts_reused": counters["chunks"] - embedded,
+            "seconds": round(embed_seconds, 4),
+            "chunks_per_second": round(counters["chunks"] / embed_seconds, 2) if embed_seconds else None,
+        },
+        "db_upsert": {
+            "calls": len(upsert_latencies),
+            "rows": sum(rows for _, _, rows in counters["upserts"]),
+            "p50_ms": round(percentile(upsert_latencies, 0.5) * 1000, 3),
+            "p95_ms": round(percentile(upsert_latencies, 0.95) * 1000, 3),
+            "max_ms": round(max(upsert_latencies, default=0.0) * 1000, 3),
+        },
+        "phases": {
+            phase: {"seconds": round(data["seconds"], 4), "peak_rss_mb": round(data["peak_rss_bytes"] / 2**20, 1)}
+            for phase, data in recorder.phases.items()
+        },
+        "total_seconds": round(total, 4),
+    }
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        language, _, weight = part.partition("=")
+        if language not in EXTENSIONS:
+            raise argparse.ArgumentTypeError(f"Unknown language '{language}'. Choose from: {', '.join(EXTENSIONS)}")
+        mix[language] = float(weight or 1)
+    return mix
+
+def main():
+    """
+    Generates a synthetic repository and indexes it three times: a full index, a no-op re-run
+    and an incremental run after touching a fraction of the files. Results are printed as JSON.
+    Without --database-url, rows are kept in memory so only the indexer's own work is measured.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark indexer throughput on a synthetic repository.")
+    parser.add_argument("--files", type=int, default=1000, help="Number of files to generate.")
+    parser.add_argument("--lines-per-file", type=int, default=200, help="Approximate lines per generated file.")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Language weights, e.g. '{DEFAULT_MIX}'.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generator, for comparable runs.")
+    parser.add_argument("--workers", type=int, default=None, help="Indexer worker processes. Defaults to 'rag.indexer_workers'.")
+    parser.add_argument("--embedding-dim", type=int, default=1024, help="Dimension of the stub embeddings.")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="Simulated model cost per embedded text.")
+    parser.add_argument(
+        "--remote-mock",
+        action="store_true",
+        help="Embed through the remote provider against a local mock server instead of the in-process stub.",
+    )
+    parser.add_argument("--remote-latency-ms", type=float, default=20.0, help="Simulated mock server latency per request.")
+    parser.add_argument("--touch-fraction", type=float, default=0.1, help="Share of files modified for the incremental scenario.")
+    parser.add_argument("--embedding-cache", action="store_true", help="Keep the local embedding cache enabled.")
+    parser.add_argument("--database-url", help="Index into this PostgreSQL database instead of the in-memory backend.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    parser.add_argument("--keep-repo", action="store_true", help="Do not delete the generated repository.")
+    parser.add_argument("--log-level", default="WARNING", help="Indexer log level. Logs go to stderr so stdout stays valid JSON.")
+    args = parser.parse_args()
+
+    structlog.configure(
+        logger_factory=structlog.PrintLoggerFactory(sys.stderr),
+        wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, args.log_level.upper())),
+    )
+
+    ai_settings.rag.enable_embedding_cache = args.embedding_cache
+    repo_root = Path(tempfile.mkdtemp(prefix="ai-index-bench-"))
+    mock_server = None
+    try:
+        repo = SyntheticRepo(repo_root, args.files, args.lines_per_file, args.mix, args.seed)
+        language_counts = repo.generate()
+        print(f"--- Generated {args.files} files in {repo_root} ---", file=sys.stderr)
+
+        indexer_cls = Indexer if args.database_url else InMemoryIndexer
+        if args.remote_mock:
+            # The per-text cost moves to the server, so request concurrency and rate limits show up in the timings.
+            mock_server = MockEmbeddingServer(dim=args.embedding_dim, latency_ms=args.remote_latency_ms, latency_ms_per_text=args.embed_latency_ms).start()
+            ai_settings.rag.remote_embedding_base_url = mock_server.base_url
+            ai_settings.rag.remote_embedding_dim = args.embedding_dim
+            os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+            provider = EmbeddingProvider("openai")
+        else:
+            provider = StubEmbeddingProvider(args.embedding_dim, args.embed_latency_ms)
+
+        def make_indexer() -> Indexer:
+            return indexer_cls(
+                project_root=repo_root,
+                branch_override="benchmark",
+                embedding_provider=provider,
+                database_url_override=args.database_url or "postgresql://benchmark@localhost/unused",
+                workers=args.workers,
+            )
+
+        indexer = make_indexer()
+        results = [run_scenario("full", indexer, force_reindex=True)]
+        results.append(run_scenario("noop", make_indexer()))
+        touched = repo.touch(args.touch_fraction)
+        incremental = make_indexer()
+        if isinstance(indexer, InMemoryIndexer):
+            # A fresh instance re-reads state.json; the stored rows must survive as a database would.
+            incremental.rows_by_source, incremental.vectors_by_hash = indexer.rows_by_source, indexer.vectors_by_hash
+        results.append({**run_scenario("incremental", incremental), "files_touched": touched})
+    finally:
+        if mock_server is not None:
+            mock_server.stop()
+        if not args.keep_repo:
+            shutil.rmtree(repo_root, ignore_errors=True)
+
+    report = {
+        "generated_at_utc": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "backend": "postgresql" if args.database_url else "in-memory",
+        "repo": {"files": args.files, "lines_per_file": args.lines_per_file, "languages": language_counts, "seed": args.seed},
+        "config": {
+            "workers": indexer.workers,
+            "embedding_dim": args.embedding_dim,
+            "embed_latency_ms": args.embed_latency_ms,
+            "embedding_provider": provider.provider_name,
+            "remote_mock": {
+                "latency_ms": args.remote_latency_ms,
+                "requests": mock_server.requests,
+                "max_in_flight": mock_server.max_in_flight,
+                "concurrency": ai_settings.rag.remote_embedding_concurrency,
+            } if mock_server is not None else None,
+            "embedding_pipeline_batch_size": ai_settings.rag.embedding_pipeline_batch_size,
+            "embedding_batch_token_budget": ai_settings.rag.embedding_batch_token_budget,
+            "bulk_sync": ai_settings.rag.bulk_sync,
+            "embedding_cache": args.embedding_cache,
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        print(f"✓ Benchmark report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# scripts/benchmark_vector_compression.py
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+project_root_path = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(project_root_path / 'src'))
+
+try:
+    from ai_assistant.config import ai_settings
+    from ai_assistant.indexer import DEFAULT_IGNORE_PATTERNS, EmbeddingProvider, Indexer
+    from ai_assistant.utils.ignore_matcher import IgnoreMatcher
+except ImportError:
+    print("FATAL: Could not import required modules.", file=sys.stderr)
+    print("Please install the indexing extras (e.g., 'pip install -e .[indexing]') before running this script.", file=sys.stderr)
+    sys.exit(1)
+
+# pgvector stores a 4-byte varlena header plus int16 dim and int16 unused before the components.
+VECTOR_HEADER_BYTES = 8
+# Rough per-element HNSW overhead besides the vector and its 2*m layer-0 neighbour pointers
+# (6 bytes each): tuple headers, heap TIDs and upper-layer links.
+HNSW_ELEMENT_OVERHEAD_BYTES = 64
+
+def collect_chunks(project_root: Path, limit: int) -> list:
+    """Chunks the project exactly as the indexer would and returns up to `limit` chunk texts."""
+    matcher = IgnoreMatcher(project_root, DEFAULT_IGNORE_PATTERNS, ai_settings.rag.ignore_file_names)
+    texts = []
+    for file_path in matcher.walk():
+        try:
+            chunks = Indexer._build_file_chunks(project_root, file_path, ai_settings.rag.embedding_model_name)
+        except Exception:
+            continue
+        texts.extend(chunk['document'] for chunk in chunks)
+        if len(texts) >= limit:
+            break
+    return texts[:limit]
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, query_ids: np.ndarray, k: int) -> np.ndarray:
+    """Exact cosine top-k for each query, excluding the query's own row from its results."""
+    scores = queries.astype(np.float32) @ corpus.astype(np.float32).T
+    scores[np.arange(len(query_ids)), query_ids] = -np.inf
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / truth.size
+
+def main():
+    """
+    Measures what halfvec storage and Matryoshka truncation cost in retrieval quality.
+    Every chunk vector is embedded once at full size; each configuration is derived from those
+    vectors and its exact top-k neighbours are compared with the float32 full-size ground truth.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark recall and memory of compact vector storage options.")
+    parser.add_argument("directory", nargs="?", default=".", help="Project whose chunks are used as the corpus.")
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[1024, 768, 512, 256], help="Truncation sizes to evaluate.")
+    parser.add_argument("--max-chunks", type=int, default=5000, help="Upper bound on corpus size.")
+    parser.add_argument("--queries", type=int, default=200, help="Number of corpus chunks reused as queries.")
+    parser.add_argument("-k", type=int, default=10, help="Neighbours compared per query (recall@k).")
+    parser.add_argument("--hnsw-m", type=int, default=16, help="HNSW 'm' used for the index size estimate.")
+    args = parser.parse_args()
+
+    project_root = Path(args.directory).resolve()
+    texts = collect_chunks(project_root, args.max_chunks)
+    if len(texts) <= args.k:
+        print(f"❌ FATAL: Found only {len(texts)} chunks in {project_root}; need more than k={args.k}.", file=sys.stderr)
+        sys.exit(1)
+
+    # Ground truth needs the model's native size, whatever 'rag.embedding_dimensions' says.
+    ai_settings.rag.embedding_dimensions = None
+    provider = EmbeddingProvider("local")
+    print(f"--- Embedding {len(texts)} chunks with {provider.model_name} ({provider.embedding_dim} dims) ---", file=sys.stderr)
+    full = normalize(np.asarray(provider.get_embeddings(texts), dtype=np.float32))
+
+    rng = np.random.default_rng(0)
+    query_ids = rng.choice(len(texts), size=min(args.queries, len(texts)), replace=False)
+    truth = top_k(full, full[query_ids], query_ids, args.k)
+
+    results = []
+    for dim in sorted({d for d in args.dimensions if d <= full.shape[1]}, reverse=True):
+        truncated = normalize(full[:, :dim])
+        for storage_type, dtype, component_bytes in (("vector", np.float32, 4), ("halfvec", np.float16, 2)):
+            stored = truncated.astype(dtype)
+            found = top_k(stored, stored[query_ids], query_ids, args.k)
+            vector_bytes = VECTOR_HEADER_BYTES + dim * component_bytes
+            index_bytes = len(texts) * (vector_bytes + HNSW_ELEMENT_OVERHEAD_BYTES + 2 * args.hnsw_m * 6)
+            results.append({
+                "storage_type": storage_type,
+                "dimensions": dim,
+                f"recall_at_{args.k}": round(recall_at_k(truth, found), 4),
+                "bytes_per_vector": vector_bytes,
+                "estimated_hnsw_bytes": index_bytes,
+                "estimated_hnsw_bytes_per_million": index_bytes * 1_000_000 // len(texts),
+            })
+
+    print(json.dumps({
+        "model": provider.model_name,
+        "native_dimensions": int(full.shape[1]),
+        "corpus_chunks": len(texts),
+        "queries": len(query_ids),
+        "k": args.k,
+        "results": results,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+# src/ai_assistant/chunker.py
+
+import ast
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Same rough heuristic as the ContextOptimizer: one token is approximately four characters.
+CHARS_PER_TOKEN_ESTIMATE = 4
+
+# A line of source: (1-based line number, text).
+NumberedLine = Tuple[int, str]
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN_ESTIMATE + 1
+
+def is_chunk_valid(chunk: str, min_length: int = 20) -> bool:
+    return len(chunk.strip()) >= min_length and (len(chunk.strip()) / len(chunk)) > 0.5 and '\x00' not in chunk
+
+def split_lines_by_tokens(lines: Sequence[NumberedLine], max_tokens: int) -> List[Tuple[int, int, str]]:
+    """
+    Greedily packs consecutive lines into parts of at most `max_tokens` estimated tokens and
+    returns (start_line, end_line, text) for each part. Parts only break on line boundaries;
+    a single line that is longer than the budget is cut into pieces on its own.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN_ESTIMATE
+    parts: List[Tuple[int, int, str]] = []
+    current: List[NumberedLine] = []
+    current_chars = 0
+
+    def flush():
+        nonlocal current, current_chars
+        if current:
+            parts.append((current[0][0], current[-1][0], "\n".join(text for _, text in current)))
+        current, current_chars = [], 0
+
+    for line_no, line in lines:
+        if len(line) > max_chars:
+            flush()
+            for i in range(0, len(line), max_chars):
+                parts.append((line_no, line_no, line[i:i + max_chars]))
+            continue
+        if current and current_chars + len(line) + 1 > max_chars:
+            flush()
+        current.append((line_no, line))
+        current_chars += len(line) + 1
+    flush()
+    return parts
+
+def number_lines(text: str, first_line: int = 1) -> List[NumberedLine]:
+    return list(enumerate(text.splitlines(), start=first_line))
+
+class _ChunkCollector:
+    """Accumulates chunks, splitting oversized ones and dropping invalid ones."""
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+        self.chunks: List[Dict[str, Any]] = []
+
+    def emit(self, lines: Sequence[NumberedLine], metadata: Dict[str, Any], parent_index: Optional[int] = None) -> Optional[int]:
+        """Adds the lines as one or more chunks and returns the index of the first one, if any."""
+        parts = split_lines_by_tokens(lines, self.max_tokens)
+        first_index = None
+        for part_number, (start_line, end_line, text) in enumerate(parts):
+            if not is_chunk_valid(text):
+                continue
+            chunk_metadata = {**metadata, "start_line": start_line, "end_line": end_line}
+            if len(parts) > 1:
+                chunk_metadata["part"] = part_number
+            if parent_index is not None:
+                chunk_metadata["parent_index"] = parent_index
+            self.chunks.append({"text": text, "metadata": chunk_metadata})
+            if first_index is None:
+                first_index = len(self.chunks) - 1
+        return first_index
+
+def _definition_start(node: ast.AST) -> int:
+    decorators = getattr(node, 'decorator_list', [])
+    return min([node.lineno] + [d.lineno for d in decorators])
+
+def _is_definition(node: ast.AST) -> bool:
+    return isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+
+class PythonChunker:
+    """
+    Hierarchical, non-overlapping chunker for Python source. Every line ends up in exactly one chunk:
+    - module-level code between definitions becomes 'module_code' chunks;
+    - each top-level function becomes a 'function' chunk;
+    - each class becomes one 'class' skeleton chunk (header, docstring, class attributes and member
+      signatures with their bodies elided), and each method or nested class becomes its own chunk
+      whose 'parent_index' points at the enclosing class skeleton.
+    Chunks larger than `max_tokens` are split on line boundaries.
+    """
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+
+    def chunk(self, text: str) -> List[Dict[str, Any]]:
+        tree = ast.parse(text)
+        self.lines = text.splitlines()
+        collector = _ChunkCollector(self.max_tokens)
+
+        cursor = 1
+        for node in tree.body:
+            if not _is_definition(node):
+                continue
+            start = _definition_start(node)
+            self._emit_module_code(collector, cursor, start - 1)
+            if isinstance(node, ast.ClassDef):
+                self._emit_class(collector, node, qualified_prefix="", parent_index=None)
+            else:
+                collector.emit(self._range(start, node.end_lineno), {"entity_type": "function", "name": node.name})
+            cursor = node.end_lineno + 1
+        self._emit_module_code(collector, cursor, len(self.lines))
+        return collector.chunks
+
+    def _range(self, start: int, end: int) -> List[NumberedLine]:
+        return [(line_no, self.lines[line_no - 1]) for line_no in range(start, end + 1)]
+
+    def _emit_module_code(self, collector: _ChunkCollector, start: int, end: int):
+        lines = self._range(start, end)
+        if any(line.strip() for _, line in lines):
+            collector.emit(lines, {"entity_type": "module_code", "name": "<module>"})
+
+    def _signature(self, node: ast.AST) -> List[NumberedLine]:
+        """Decorators and header of a definition, with its body replaced by '...'."""
+        body_start = node.body[0].lineno
+        header_end = body_start - 1 if body_start > node.lineno else node.lineno
+        signature = self._range(_definition_start(node), header_end)
+        if header_end < node.end_lineno:
+            body_line = self.lines[body_start - 1]
+            indent = body_line[:len(body_line) - len(body_line.lstrip())]
+            signature.append((header_end, f"{indent}..."))
+        return signature
+
+    def _emit_class(self, collector: _ChunkCollector, node: ast.ClassDef, qualified_prefix: str, parent_index: Optional[int]):
+        qualified_name = f"{qualified_prefix}{node.name}"
+        members = [member for member in node.body if _is_definition(member)]
+
+        skeleton: List[NumberedLine] = []
+        cursor = _definition_start(node)
+        for member in members:
+            skeleton.extend(self._range(cursor, _definition_start(member) - 1))
+            skeleton.extend(self._signature(member))
+            cursor = member.end_lineno + 1
+        skeleton.extend(self._range(cursor, node.end_lineno))
+
+        class_index = collector.emit(skeleton, {"entity_type": "class", "name": qualified_name}, parent_index)
+        for member in members:
+            if isinstance(member, ast.ClassDef):
+                self._emit_class(collector, member, f"{qualified_name}.", class_index)
+            else:
+                collector.emit(
+                    self._range(_definition_start(member), member.end_lineno),
+                    {"entity_type": "method", "name": f"{qualified_name}.{member.name}"},
+                    class_index,
+                )
+
+_DEFINITION_NAME = re.compile(
+    r'\b(?:function|class|interface|struct|enum|trait|impl|module|object|func|fn|fun|def|type|record)\s+([A-Za-z_$][\w$]*)'
+)
+_CALLABLE_NAME = re.compile(r'([A-Za-z_$][\w$]*)\s*\(')
+
+# Languages whose definitions are delimited by braces, with their line-comment markers.
+BRACE_LANGUAGES = {
+    'javascript': ('//',), 'typescript': ('//',), 'java': ('//',), 'go': ('//',), 'rust': ('//',),
+    'cpp': ('//',), 'c': ('//',), 'csharp': ('//',), 'php': ('//', '#'), 'swift': ('//',),
+    'kotlin': ('//',), 'css': (), 'bash': ('#',),
+}
+# Languages where top-level statements start in column zero.
+INDENT_LANGUAGES = {'ruby': ('#',), 'sql': ('--',), 'html': ()}
+
+def _pack_units(collector: _ChunkCollector, units: List[Tuple[str, List[NumberedLine]]], entity_type: str, split_unit=None):
+    """
+    Greedily packs consecutive structural units into chunks up to the token budget, so chunk
+    boundaries always coincide with unit boundaries. A unit that is too large on its own is
+    handed to `split_unit` for finer structure, or split on line boundaries as a last resort.
+    """
+    max_chars = collector.max_tokens * CHARS_PER_TOKEN_ESTIMATE
+    group: List[Tuple[str, List[NumberedLine]]] = []
+    group_chars = 0
+
+    def flush():
+        nonlocal group, group_chars
+        if group:
+            names = [name for name, _ in group if name]
+            metadata = {"entity_type": entity_type, "name": names[0] if names else "<preamble>"}
+            if len(names) > 1:
+                metadata["names"] = names
+            collector.emit([line for _, lines in group for line in lines], metadata)
+        group, group_chars = [], 0
+
+    for name, lines in units:
+        unit_chars = sum(len(line) + 1 for _, line in lines)
+        if unit_chars > max_chars:
+            flush()
+            sub_units = split_unit(name, lines) if split_unit else None
+            if sub_units and len(sub_units) > 1:
+                _pack_units(collector, sub_units, entity_type, split_unit)
+            else:
+                collector.emit(lines, {"entity_type": entity_type, "name": name or "<preamble>"})
+            continue
+        if group and group_chars + unit_chars > max_chars:
+            flush()
+        group.append((name, lines))
+        group_chars += unit_chars
+    flush()
+
+# --- Markdown ---
+
+_MD_HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_MD_FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})(.*)$')
+
+def chunk_markdown(text: str, max_tokens: int) -> List[Dict[str, Any]]:
+    """
+    One section per ATX heading (ignoring '#' lines inside fenced code). Subsections are kept with
+    their parent section while they fit the budget, so small sections are not embedded on their own.
+    """
+    sections: List[Tuple[int, str, List[NumberedLine]]] = [(0, "", [])]
+    trail: List[str] = []
+    open_fence: Optional[str] = None
+    for line_no, line in number_lines(text):
+        fence = _MD_FENCE.match(line)
+        if fence and open_fence is None:
+            open_fence = fence.group(1)
+        elif fence and fence.group(1).startswith(open_fence) and not fence.group(2).strip():
+            # Only a bare fence of the same kind and at least the same length closes a code block.
+            open_fence = None
+        heading = None if (open_fence or fence) else _MD_HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            trail = trail[:level - 1] + [heading.group(2)]
+            sections.append((level, " > ".join(t for t in trail if t), []))
+        sections[-1][2].append((line_no, line))
+
+    collector = _ChunkCollector(max_tokens)
+    max_chars = max_tokens * CHARS_PER_TOKEN_ESTIMATE
+    group_level, group_name, group_lines = 0, "", []
+    for level, name, lines in sections:
+        if not lines:
+            continue
+        section_chars = sum(len(l) + 1 for _, l in lines)
+        group_chars = sum(len(l) + 1 for _, l in group_lines)
+        if group_lines and level > group_level and group_chars + section_chars <= max_chars:
+            group_lines.extend(lines)
+            continue
+        if group_lines:
+            collector.emit(group_lines, {"entity_type": "section", "name": group_name or "<preamble>"})
+        group_level, group_name, group_lines = level, name, list(lines)
+    if group_lines:
+        collector.emit(group_lines, {"entity_type": "section", "name": group_name or "<preamble>"})
+    return collector.chunks
+
+# --- YAML and JSON ---
+
+_YAML_TOP_LEVEL_KEY = re.compile(r'^(?![#\s-])("(?:[^"\\]|\\.)*"|\'[^\']*\'|[^:#]+?)\s*:(?:\s|$)')
+
+def chunk_yaml(text: str, max_tokens: int) -> List[Dict[str, Any]]:
+    """Units start at each top-level key (or document separator); comments directly above a key stay with it."""
+    units: List[Tuple[str, List[NumberedLine]]] = [("", [])]
+    for line_no, line in number_lines(text):
+        key = _YAML_TOP_LEVEL_KEY.match(line)
+        if key or line.startswith('---'):
+            current = units[-1][1]
+            split_at = len(current)
+            while split_at > 0 and current[split_at - 1][1].startswith('#'):
+                split_at -= 1
+            units[-1] = (units[-1][0], current[:split_at])
+            units.append((key.group(1).strip('"\'') if key else "", current[split_at:]))
+        units[-1][1].append((line_no, line))
+
+    collector = _ChunkCollector(max_tokens)
+    _pack_units(collector, [u for u in units if u[1]], "key")
+    return collector.chunks
+
+_JSON_KEY = re.compile(r'^\s*"((?:[^"\\]|\\.)*)"\s*:')
+
+def chunk_json(text: str, max_tokens: int) -> List[Dict[str, Any]]:
+    """Units start at each member of the root object; minified JSON degrades to line splitting."""
+    lines = number_lines(text)
+    depths = _bracket_depths([line for _, line in lines], line_comments=(), block_comments=False, openers='{[', closers='}]')
+    units: List[Tuple[str, List[NumberedLine]]] = [("", [])]
+    for (line_no, line), (depth_start, _) in zip(lines, depths):
+        key = _JSON_KEY.match(line) if depth_start == 1 else None
+        if key:
+            units.append((key.group(1), []))
+        units[-1][1].append((line_no, line))
+
+    collector = _ChunkCollector(max_tokens)
+    _pack_units(collector, [u for u in units if u[1]], "key")
+    return collector.chunks
+
+# --- Brace- and indent-delimited source ---
+
+def _bracket_depths(lines: Sequence[str], line_comments: Tuple[str, ...], block_comments: bool = True, openers: str = '{', closers: str = '}') -> List[Tuple[int, int]]:
+    """
+    Returns (depth at line start, depth at line end) for each line, ignoring brackets inside string
+    literals and comments. Template literals (`) and block comments may span lines.
+    """
+    depths = []
+    depth = 0
+    in_block_comment = False
+    quote: Optional[str] = None
+    for line in lines:
+        start_depth = depth
+        if quote != '`':
+            quote = None
+        i, n = 0, len(line)
+        while i < n:
+            c = line[i]
+            if in_block_comment:
+                if line.startswith('*/', i):
+                    in_block_comment = False
+                    i += 1
+            elif quote:
+                if c == '\\':
+                    i += 1
+                elif c == quote:
+                    quote = None
+            elif block_comments and line.startswith('/*', i):
+                in_block_comment = True
+                i += 1
+            elif any(line.startswith(marker, i) for marker in line_comments):
+                break
+            elif c in '"\'`':
+                quote = c
+            elif c in openers:
+                depth += 1
+            elif c in closers:
+                depth = max(0, depth - 1)
+            i += 1
+        depths.append((start_depth, depth))
+    return depths
+
+def _unit_name(lines: Sequence[NumberedLine]) -> str:
+    for _, line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith(('//', '/*', '*', '#', '@', '--')):
+            continue
+        match = _DEFINITION_NAME.search(stripped) or _CALLABLE_NAME.search(stripped)
+        return match.group(1) if match else ""
+    return ""
+
+def _brace_units(lines: Sequence[NumberedLine], depths: Sequence[Tuple[int, int]], level: int) -> List[Tuple[str, List[NumberedLine]]]:
+    """
+    Splits lines at `level` into units: runs of plain statements, and blocks that open a brace and
+    run until the depth returns to `level`. Comment, annotation and multi-line signature lines
+    directly above a block (not separated by a blank line) are attached to the block.
+    """
+    units: List[Tuple[str, List[NumberedLine]]] = []
+    loose: List[NumberedLine] = []
+    i = 0
+    while i < len(lines):
+        if depths[i][1] <= level and depths[i][0] <= level:
+            loose.append(lines[i])
+            i += 1
+            continue
+        split_at = len(loose)
+        while split_at > 0 and loose[split_at - 1][1].strip() and not loose[split_at - 1][1].rstrip().endswith((';', '}')):
+            split_at -= 1
+        if loose[:split_at]:
+            units.append(("", loose[:split_at]))
+        block = loose[split_at:]
+        loose = []
+        while i < len(lines):
+            block.append(lines[i])
+            i += 1
+            if depths[i - 1][1] <= level:
+                break
+        units.append((_unit_name(block), block))
+    if loose:
+        units.append(("", loose))
+    return units
+
+def chunk_braced(text: str, line_comments: Tuple[str, ...], max_tokens: int) -> List[Dict[str, Any]]:
+    """Chunks C-like source on top-level brace blocks, descending into a block only when it is over budget."""
+    lines = number_lines(text)
+    depths = _bracket_depths([line for _, line in lines], line_comments)
+    depth_of = dict(zip((line_no for line_no, _ in lines), depths))
+
+    def split_block(name: str, block: List[NumberedLine]) -> Optional[List[Tuple[str, List[NumberedLine]]]]:
+        block_depths = [depth_of[line_no] for line_no, _ in block]
+        level = block_depths[0][0]
+        opened = next((k for k, (_, end) in enumerate(block_depths) if end > level), None)
+        if opened is None or opened + 1 >= len(block) - 1:
+            return None
+        header = (name, block[:opened + 1])
+        inner = _brace_units(block[opened + 1:-1], block_depths[opened + 1:-1], level + 1)
+        return [header, *inner, ("", block[-1:])]
+
+    collector = _ChunkCollector(max_tokens)
+    _pack_units(collector, _brace_units(lines, depths, 0), "block", split_block)
+    return collector.chunks
+
+_CLOSING_LINE = re.compile(r'^(end\b|</|\)|\]|\})')
+
+def chunk_indented(text: str, comment_markers: Tuple[str, ...], max_tokens: int) -> List[Dict[str, Any]]:
+    """Units start at each non-closing line in column zero; comment lines directly above stay with it."""
+    units: List[Tuple[str, List[NumberedLine]]] = [("", [])]
+    for line_no, line in number_lines(text):
+        starts_unit = line[:1] and not line[0].isspace() and not _CLOSING_LINE.match(line)
+        is_comment = bool(comment_markers) and line.startswith(comment_markers)
+        if starts_unit and not is_comment:
+            current = units[-1][1]
+            split_at = len(current)
+            while split_at > 0 and comment_markers and current[split_at - 1][1].startswith(comment_markers):
+                split_at -= 1
+            units[-1] = (units[-1][0], current[:split_at])
+            units.append(("", current[split_at:]))
+        units[-1][1].append((line_no, line))
+
+    collector = _ChunkCollector(max_tokens)
+    _pack_units(collector, [(_unit_name(lines), lines) for _, lines in units if lines], "block")
+    return collector.chunks
+
+def chunk_lines(text: str, file_path: Path, max_tokens: int) -> List[Dict[str, Any]]:
+    """Structure-agnostic fallback: consecutive lines packed up to the token budget, without overlap."""
+    collector = _ChunkCollector(max_tokens)
+    collector.emit(number_lines(text), {"entity_type": "file", "name": file_path.name})
+    return collector.chunks
+
+def chunk_file(text: str, file_path: Path, max_tokens: int, language: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Splits a file into chunks of {"text", "metadata"} along its structure, on line boundaries and
+    without overlap. Chunk metadata may carry 'parent_index', the position of the enclosing chunk
+    in the returned list.
+    """
+    try:
+        if language == 'python' or file_path.suffix.lower() == '.py':
+            return PythonChunker(max_tokens).chunk(text)
+        if language == 'markdown':
+            return chunk_markdown(text, max_tokens)
+        if language == 'yaml':
+            return chunk_yaml(text, max_tokens)
+        if language == 'json':
+            return chunk_json(text, max_tokens)
+        if language in BRACE_LANGUAGES:
+            return chunk_braced(text, BRACE_LANGUAGES[language], max_tokens)
+        if language in INDENT_LANGUAGES:
+            return chunk_indented(text, INDENT_LANGUAGES[language], max_tokens)
+    except (SyntaxError, ValueError):
+        pass
+    return chunk_lines(text, file_path, max_tokens)
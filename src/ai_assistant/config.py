@@ -3,7 +3,7 @@
 import os
 import yaml
 from pathlib import Path
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Literal
 from pydantic import BaseModel, Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from importlib import resources
@@ -121,6 +121,44 @@ class RAGConfig(BaseModel):
     librarian_api_key: Optional[str] = Field(None, alias='LIBRARIAN_API_KEY')
     
     embedding_model_name: str = 'BAAI/bge-large-en-v1.5'
+    embedding_backend: Literal["torch", "onnx"] = Field(
+        "torch",
+        description="Runtime for the local embedding model. 'onnx' runs on ONNX Runtime for CPU-only indexers.",
+        )
+    embedding_onnx_quantization: Optional[Literal["arm64", "avx2", "avx512", "avx512_vnni"]] = Field(
+        None,
+        description="Target for dynamic int8 quantization of the ONNX model. None keeps fp32 weights.",
+        )
+    embedding_onnx_cache_dir: str = Field(
+        "~/.cache/ai_assistant/onnx",
+        description="Where quantized ONNX exports are stored and reused.",
+        )
+    embedding_num_threads: Optional[int] = Field(
+        None,
+        ge=1,
+        description="CPU threads for local embedding inference. Defaults to all available cores for ONNX.",
+        )
+    embedding_parity_threshold: float = Field(
+        0.99,
+        description="Minimum cosine similarity to the torch backend accepted by 'ai-index --check-embedding-parity'.",
+        )
+    embedding_dimensions: Optional[int] = Field(
+        None,
+        ge=32,
+        description="Truncate embeddings to this many leading dimensions (Matryoshka models only) and re-normalize. None keeps the model's full size.",
+        )
+    vector_storage_type: Literal["vector", "halfvec"] = Field(
+        "vector",
+        description="pgvector column type for embeddings. 'halfvec' stores float16 and halves table and HNSW index size.",
+        )
+    index_backend: Literal["postgres", "local"] = Field(
+        "postgres",
+        description="Where the indexer stores chunks. 'local' keeps an embedded vector store under 'local_index_path' and needs no database.",
+        )
+    state_backend: Literal["json", "sqlite"] = Field(
+        "json",
+        description="Where the indexer keeps per-file state. 'sqlite' upserts changed entries into state.sqlite (WAL) and writes state.json only when artifacts are uploaded or --export-state is given.",
+        )
     collection_name: str = Field("codebase_collection", description="Default collection name for ChromaDB.")
     chroma_server_host: Optional[str] = Field(None, description="Hostname of the ChromaDB server.")
     chroma_server_port: Optional[int] = Field(None, description="Port of the ChromaDB server.")
@@ -142,7 +180,191 @@ class RAGConfig(BaseModel):
         ".ai_rag_index", 
         description="Path for the local ChromaDB index, relative to project root.",
         )
-    
+    chunk_max_tokens: int = Field(
+        512,
+        ge=32,
+        description="Upper bound on estimated tokens per indexed chunk; larger units are split on line boundaries.",
+        )
+    ignore_file_names: List[str] = Field(
+        default_factory=lambda: [".gitignore", ".aiignore"],
+        description="Per-directory ignore files honoured by the indexer, with .gitignore semantics.",
+        )
+    indexer_workers: int = Field(
+        1,
+        ge=1,
+        description="Worker processes used by the indexer for hashing and chunking. 1 runs in-process.",
+        )
+    embedding_pipeline_batch_size: int = Field(
+        256,
+        ge=1,
+        description="Chunks the indexer hands to the embedding model per call.",
+        )
+    embedding_batch_token_budget: int = Field(
+        16384,
+        ge=1,
+        description="Padded tokens per local model forward pass. Texts are grouped by length so short ones are not padded to long ones.",
+        )
+    embedding_max_batch_size: int = Field(
+        128,
+        ge=1,
+        description="Upper bound on texts per local model forward pass, however short they are.",
+        )
+    embedding_provider: Literal["local", "openai"] = Field(
+        "local",
+        description="Embedding provider used by 'ai-index'. 'openai' calls an OpenAI-compatible /embeddings endpoint.",
+        )
+    remote_embedding_base_url: str = Field(
+        "https://api.openai.com/v1",
+        description="Base URL of the OpenAI-compatible embeddings API, e.g. a self-hosted gateway or the bundled mock server.",
+        )
+    remote_embedding_model: str = Field("text-embedding-3-large", description="Model requested from the remote embeddings API.")
+    remote_embedding_dim: int = Field(3072, ge=1, description="Native dimension of 'remote_embedding_model'.")
+    remote_embedding_request_tokens: int = Field(
+        16384,
+        ge=1,
+        description="Estimated input tokens per remote embeddings request. Larger inputs are split across requests.",
+        )
+    remote_embedding_request_inputs: int = Field(64, ge=1, description="Upper bound on texts per remote embeddings request.")
+    remote_embedding_concurrency: int = Field(8, ge=1, description="Remote embeddings requests kept in flight at once.")
+    remote_embedding_tokens_per_minute: Optional[int] = Field(
+        1_000_000,
+        ge=1,
+        description="Client-side token rate limit for remote embeddings. None disables it.",
+        )
+    remote_embedding_requests_per_minute: Optional[int] = Field(
+        3000,
+        ge=1,
+        description="Client-side request rate limit for remote embeddings. None disables it.",
+        )
+    remote_embedding_max_retries: int = Field(
+        6,
+        ge=0,
+        description="Retries of a rate-limited (429), failed (5xx) or timed-out remote embeddings request, with jittered exponential backoff.",
+        )
+    remote_embedding_timeout_seconds: float = Field(60.0, gt=0, description="Timeout of one remote embeddings request.")
+    enable_embedding_cache: bool = Field(
+        True,
+        description="Reuse embeddings of unchanged chunks from a local cache keyed by chunk hash and model.",
+        )
+    embedding_cache_filename: str = Field(
+        "embedding_cache.sqlite",
+        description="Embedding cache file name, relative to 'local_index_path'.",
+        )
+    bulk_sync: bool = Field(
+        True,
+        description="Write indexed files to PostgreSQL in batches via binary COPY instead of one transaction per file.",
+        )
+    bulk_sync_batch_rows: int = Field(
+        5000,
+        ge=1,
+        description="Rows staged per bulk COPY transaction.",
+        )
+    index_max_file_bytes: int = Field(
+        1_048_576,
+        ge=0,
+        description="Files larger than this are not indexed; they are mostly generated or minified. 0 disables the limit.",
+        )
+    index_mmap_threshold_bytes: int = Field(
+        262_144,
+        ge=0,
+        description="Files of at least this size are hashed and read through mmap. 0 disables mmap.",
+        )
+    indexer_queue_depth: int = Field(
+        32,
+        ge=1,
+        description="Files buffered between indexer pipeline stages. Bounds peak memory.",
+        )
+    shared_chunk_store: bool = Field(
+        False,
+        description="Store chunk text and embeddings once per project, shared by all branches. Each branch keeps only a table of chunk references, exposed under its usual table name as a view.",
+        )
+    checkpoint_every_files: int = Field(
+        500,
+        ge=0,
+        description="Persist indexer progress after this many files are written to the database. 0 disables.",
+        )
+    checkpoint_interval_seconds: float = Field(
+        60.0,
+        ge=0,
+        description="Persist indexer progress at least this often while files are being written. 0 disables.",
+        )
+    watch_debounce_seconds: float = Field(
+        2.0,
+        gt=0,
+        description="'ai-index --watch' re-indexes once filesystem events have been quiet for this long.",
+        )
+    watch_max_delay_seconds: float = Field(
+        30.0,
+        gt=0,
+        description="Upper bound on how long 'ai-index --watch' defers a re-index while events keep arriving.",
+        )
+    deferred_index_build_ratio: float = Field(
+        0.5,
+        ge=0.0,
+        le=1.0,
+        description="Incremental runs load into a fresh table and build indexes afterwards when at least this share of indexed files changed. 0 disables. --force-reindex always does.",
+        )
+    hnsw_m: int = Field(
+        16,
+        ge=2,
+        le=100,
+        description="HNSW 'm': neighbours per graph node. Higher improves recall at the cost of index size and build time.",
+        )
+    hnsw_ef_construction: int = Field(
+        64,
+        ge=4,
+        le=1000,
+        description="HNSW 'ef_construction': candidate list size while building the graph.",
+        )
+    index_build_maintenance_work_mem: Optional[str] = Field(
+        "1GB",
+        description="maintenance_work_mem for index builds. The HNSW graph builds fastest when it fits in memory.",
+        )
+    index_build_parallel_workers: Optional[int] = Field(
+        None,
+        ge=0,
+        description="max_parallel_maintenance_workers for index builds. None keeps the server default.",
+        )
+    export_snapshot: bool = Field(
+        False,
+        description="After each completed run, export a compressed, memory-mappable snapshot of the index (vectors, metadata, HNSW graph) and publish it with the other artifacts.",
+        )
+    artifact_upload_part_mb: int = Field(
+        64,
+        ge=1,
+        description="Artifacts larger than this are uploaded in parts of this size.",
+        )
+    artifact_upload_parallelism: int = Field(
+        4,
+        ge=1,
+        description="Parts of one multipart artifact upload sent concurrently.",
+        )
+    work_queue_batch_files: int = Field(
+        64,
+        ge=1,
+        description="Files per job when 'ai-index --distributed' hands work to 'ai-index --worker' processes.",
+        )
+    work_queue_lease_seconds: float = Field(
+        900.0,
+        gt=0,
+        description="A claimed job whose worker has not finished it within this time is handed to another worker.",
+        )
+    work_queue_max_attempts: int = Field(
+        3,
+        ge=1,
+        description="Claims per job before its files are recorded as failed.",
+        )
+    work_queue_poll_seconds: float = Field(
+        2.0,
+        gt=0,
+        description="How often idle workers and the waiting coordinator poll the work queue.",
+        )
+    work_queue_idle_exit_seconds: float = Field(
+        0.0,
+        ge=0,
+        description="'ai-index --worker' exits after the queue has been empty this long. 0 keeps it running.",
+        )
+
     enable_reranking: bool = Field(False)
     reranker_model_name: str = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
     retrieval_n_results: int = 25
@@ -0,0 +1,57 @@
+# src/ai_assistant/embedding_cache.py
+
+import sqlite3
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# SQLite caps the number of bound parameters per statement; stay well below it.
+_MAX_PARAMS_PER_QUERY = 500
+
+class EmbeddingCache:
+    """
+    A persistent, content-addressed map from chunk hash to embedding vector.
+    Chunk hashes already include the embedding model name, so a single cache file can be
+    shared across branches and model upgrades without returning stale vectors.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA synchronous=NORMAL;")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (chunk_hash TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get_many(self, chunk_hashes: Iterable[str]) -> Dict[str, List[float]]:
+        hashes = list(dict.fromkeys(chunk_hashes))
+        found: Dict[str, List[float]] = {}
+        for i in range(0, len(hashes), _MAX_PARAMS_PER_QUERY):
+            batch = hashes[i:i + _MAX_PARAMS_PER_QUERY]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT chunk_hash, vector FROM embeddings WHERE chunk_hash IN ({placeholders})", batch
+            )
+            for chunk_hash, blob in rows:
+                found[chunk_hash] = array('f', blob).tolist()
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]):
+        if not vectors:
+            return
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (chunk_hash, vector) VALUES (?, ?)",
+            ((chunk_hash, array('f', vector).tobytes()) for chunk_hash, vector in vectors.items()),
+        )
+        self.conn.commit()
+
+    def close(self):
+        try:
+            self.conn.close()
+        except Exception as e:
+            logger.warning("Failed to close embedding cache.", path=str(self.path), error=str(e))
@@ -0,0 +1,138 @@
+# src/ai_assistant/index_merkle.py
+import hashlib
+from pathlib import PurePosixPath
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MERKLE_FORMAT_VERSION = 1
+
+def _digest(parts: Iterable[str]) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(part.encode('utf-8'))
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+def file_node(content_hash: str, chunk_hashes: List[str]) -> Dict[str, Any]:
+    """A leaf: the file's content hash and its chunk hashes in chunk order, under one digest."""
+    return {"hash": _digest(["f", content_hash, *chunk_hashes]), "content_hash": content_hash, "chunks": list(chunk_hashes)}
+
+def _rehash_directory(node: Dict[str, Any]) -> Dict[str, Any]:
+    children = node["children"]
+    node["hash"] = _digest(["d", *(part for name in sorted(children) for part in (name, children[name]["hash"]))])
+    return node
+
+def _seal(node: Dict[str, Any]) -> Dict[str, Any]:
+    for child in node["children"].values():
+        if "children" in child:
+            _seal(child)
+    return _rehash_directory(node)
+
+def build_tree(files: Dict[str, Tuple[str, List[str]]]) -> Dict[str, Any]:
+    """
+    Builds the directory -> file -> chunk tree for `files`, which maps a project-relative path to
+    (content hash, chunk hashes). Every directory node's hash covers its children's names and
+    hashes, so two trees with the same root hash index exactly the same content.
+    """
+    root: Dict[str, Any] = {"children": {}}
+    for rel_path, (content_hash, chunk_hashes) in files.items():
+        *dirs, name = PurePosixPath(rel_path).parts
+        node = root
+        for part in dirs:
+            node = node["children"].setdefault(part, {"children": {}})
+        node["children"][name] = file_node(content_hash, chunk_hashes)
+    return _seal(root)
+
+def update_tree(root: Dict[str, Any], changes: Dict[str, Optional[Tuple[str, List[str]]]]) -> Dict[str, Any]:
+    """
+    Applies `changes` to a tree in place: each path maps to (content hash, chunk hashes), or to
+    None to remove it. Only the directories on the changed paths are rehashed, so the cost follows
+    the size of the change, not of the tree. Directories left empty are removed.
+    """
+    grouped: Dict[str, Dict[str, Optional[Tuple[str, List[str]]]]] = {}
+    children = root["children"]
+    for rel_path, leaf in changes.items():
+        head, *rest = PurePosixPath(rel_path).parts
+        if rest:
+            grouped.setdefault(head, {})[str(PurePosixPath(*rest))] = leaf
+        elif leaf is None:
+            children.pop(head, None)
+        else:
+            children[head] = file_node(*leaf)
+    for name, sub_changes in grouped.items():
+        child = children.get(name)
+        if child is None or "children" not in child:
+            if all(leaf is None for leaf in sub_changes.values()):
+                continue
+            # A new directory, or one replacing a file of the same name.
+            child = children[name] = {"children": {}}
+        update_tree(child, sub_changes)
+        if not child["children"]:
+            del children[name]
+    return _rehash_directory(root)
+
+def content_hashes(root: Dict[str, Any]) -> Dict[str, str]:
+    """Maps every file path in the tree to the content hash of its leaf."""
+    files: Dict[str, Dict[str, Any]] = {}
+    _collect_files(root, "", files)
+    return {path: node["content_hash"] for path, node in files.items()}
+
+def _collect_files(node: Dict[str, Any], prefix: str, out: Dict[str, Dict[str, Any]]):
+    if "children" not in node:
+        out[prefix] = node
+        return
+    for name, child in node["children"].items():
+        _collect_files(child, f"{prefix}/{name}" if prefix else name, out)
+
+def diff_trees(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Compares two trees, descending only into subtrees whose hashes differ, so the work is
+    proportional to what changed rather than to the size of the index. Returns the added,
+    removed and modified file paths, plus `new_chunks`: chunk hashes of the changed files that
+    the old versions of those files did not have, i.e. what a cache actually has to fetch.
+    """
+    added: Dict[str, Dict[str, Any]] = {}
+    removed: Dict[str, Dict[str, Any]] = {}
+    modified: List[Tuple[str, Dict[str, Any], Dict[str, Any]]] = []
+
+    def walk(old_node: Dict[str, Any], new_node: Dict[str, Any], prefix: str):
+        if old_node["hash"] == new_node["hash"]:
+            return
+        old_is_dir, new_is_dir = "children" in old_node, "children" in new_node
+        if not (old_is_dir and new_is_dir):
+            if not (old_is_dir or new_is_dir):
+                modified.append((prefix, old_node, new_node))
+            else:
+                # A file replaced by a directory of the same name, or the reverse.
+                _collect_files(old_node, prefix, removed)
+                _collect_files(new_node, prefix, added)
+            return
+        old_children, new_children = old_node["children"], new_node["children"]
+        for name in old_children.keys() | new_children.keys():
+            path = f"{prefix}/{name}" if prefix else name
+            if name not in new_children:
+                _collect_files(old_children[name], path, removed)
+            elif name not in old_children:
+                _collect_files(new_children[name], path, added)
+            else:
+                walk(old_children[name], new_children[name], path)
+
+    walk(old, new, "")
+    old_chunks = {h for _, old_file, _ in modified for h in old_file["chunks"]}
+    old_chunks.update(h for node in removed.values() for h in node["chunks"])
+    new_chunks = {h for _, _, new_file in modified for h in new_file["chunks"]}
+    new_chunks.update(h for node in added.values() for h in node["chunks"])
+    return {
+        "added": sorted(added),
+        "removed": sorted(removed),
+        "modified": sorted(path for path, _, _ in modified),
+        "new_chunks": sorted(new_chunks - old_chunks),
+    }
+
+def diff_manifests(old_manifest: Dict[str, Any], new_manifest: Dict[str, Any]) -> Dict[str, List[str]]:
+    """`diff_trees` over the `merkle_tree` of two index manifests."""
+    trees = [manifest.get("merkle_tree") for manifest in (old_manifest, new_manifest)]
+    if not all(trees):
+        raise ValueError("Both manifests must carry a merkle_tree; re-download the full index instead.")
+    if any(tree["format_version"] != MERKLE_FORMAT_VERSION for tree in trees):
+        raise ValueError("Manifest trees use an unsupported format version.")
+    return diff_trees(trees[0]["root"], trees[1]["root"])
@@ -0,0 +1,129 @@
+# src/ai_assistant/index_queue.py
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from sqlalchemy import text
+except ImportError:
+    # Only reachable without the indexing extras, where the indexer itself cannot start.
+    text = None
+
+class IndexWorkQueue:
+    """
+    A PostgreSQL-backed queue of indexing jobs for one branch table. Each job is a batch of
+    (path, state entry) pairs. Workers on any host claim jobs with FOR UPDATE SKIP LOCKED, so
+    concurrent claims never block each other or hand out the same job twice. A claim is a lease:
+    if its worker dies, the job becomes claimable again once the lease expires.
+    """
+    def __init__(self, engine, table_name: str):
+        self.engine = engine
+        self.table_name = table_name
+        # Same scheme as Indexer._index_name: the queue's name may already be near the 63-byte limit.
+        digest = hashlib.sha1(table_name.encode('utf-8')).hexdigest()[:8]
+        self.status_index_name = f"{table_name[:40]}_{digest}_status_idx"
+
+    def ensure_table(self):
+        with self.engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": self.table_name})
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {self.table_name} (
+                    job_id BIGSERIAL PRIMARY KEY,
+                    run_id TEXT NOT NULL,
+                    write_table TEXT NOT NULL,
+                    paths JSONB NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INT NOT NULL DEFAULT 0,
+                    claimed_by TEXT,
+                    claimed_at TIMESTAMPTZ,
+                    result JSONB,
+                    error TEXT
+                );
+            """))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {self.status_index_name} ON {self.table_name} (status, job_id);"))
+
+    @staticmethod
+    def partition(items: List[Tuple[str, Dict[str, Any]]], batch_files: int) -> List[List[Tuple[str, Dict[str, Any]]]]:
+        """
+        Orders files by a hash of their path before cutting batches, so large directories and
+        similar files are spread across workers instead of landing in one slow batch.
+        """
+        ordered = sorted(items, key=lambda item: hashlib.sha1(item[0].encode("utf-8")).hexdigest())
+        return [ordered[i:i + batch_files] for i in range(0, len(ordered), batch_files)]
+
+    def enqueue(self, run_id: str, write_table: str, items: List[Tuple[str, Dict[str, Any]]], batch_files: int) -> int:
+        batches = self.partition(items, batch_files)
+        if not batches:
+            return 0
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(f"INSERT INTO {self.table_name} (run_id, write_table, paths) VALUES (:run_id, :write_table, CAST(:paths AS JSONB))"),
+                [{"run_id": run_id, "write_table": write_table, "paths": json.dumps(batch)} for batch in batches],
+            )
+        return len(batches)
+
+    def claim(self, worker_id: str, lease_seconds: float, max_attempts: int) -> Optional[Dict[str, Any]]:
+        """Claims the oldest pending job, or one whose lease expired. Returns None when there is nothing to do."""
+        with self.engine.begin() as conn:
+            row = conn.execute(text(f"""
+                UPDATE {self.table_name} SET status = 'claimed', claimed_by = :worker_id, claimed_at = now(), attempts = attempts + 1
+                WHERE job_id = (
+                    SELECT job_id FROM {self.table_name}
+                    WHERE status = 'pending'
+                       OR (status = 'claimed' AND claimed_at < now() - make_interval(secs => :lease) AND attempts < :max_attempts)
+                    ORDER BY job_id
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING job_id, run_id, write_table, paths, attempts;
+            """), {"worker_id": worker_id, "lease": lease_seconds, "max_attempts": max_attempts}).mappings().first()
+        return dict(row) if row else None
+
+    def complete(self, job_id: int, worker_id: str, result: Dict[str, Any]) -> int:
+        """
+        Records the job's result if `worker_id` still holds its lease. Returns the number of rows
+        updated: 0 means the lease expired and another worker took the job over.
+        """
+        with self.engine.begin() as conn:
+            return conn.execute(text(f"""
+                UPDATE {self.table_name} SET status = 'done', result = CAST(:result AS JSONB)
+                WHERE job_id = :job_id AND claimed_by = :worker_id AND status = 'claimed'
+            """), {"job_id": job_id, "worker_id": worker_id, "result": json.dumps(result)}).rowcount
+
+    def fail(self, job_id: int, worker_id: str, error: str, max_attempts: int) -> int:
+        """
+        Returns the job to the queue for another worker, until it has used up its attempts. Like
+        `complete`, it only touches a job `worker_id` still holds, and returns the rowcount.
+        """
+        with self.engine.begin() as conn:
+            return conn.execute(text(f"""
+                UPDATE {self.table_name}
+                SET status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END, error = :error
+                WHERE job_id = :job_id AND claimed_by = :worker_id AND status = 'claimed'
+            """), {"job_id": job_id, "worker_id": worker_id, "error": error, "max_attempts": max_attempts}).rowcount
+
+    def progress(self, run_id: str, lease_seconds: float, max_attempts: int) -> Dict[str, int]:
+        """Job counts by status. Jobs whose last allowed attempt lost its lease are marked failed here."""
+        with self.engine.begin() as conn:
+            conn.execute(text(f"""
+                UPDATE {self.table_name} SET status = 'failed', error = 'lease expired'
+                WHERE run_id = :run_id AND status = 'claimed' AND attempts >= :max_attempts
+                  AND claimed_at < now() - make_interval(secs => :lease)
+            """), {"run_id": run_id, "lease": lease_seconds, "max_attempts": max_attempts})
+            rows = conn.execute(
+                text(f"SELECT status, count(*) FROM {self.table_name} WHERE run_id = :run_id GROUP BY status"),
+                {"run_id": run_id},
+            ).all()
+        return {status: count for status, count in rows}
+
+    def results(self, run_id: str) -> List[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                text(f"SELECT status, paths, result, error FROM {self.table_name} WHERE run_id = :run_id ORDER BY job_id"),
+                {"run_id": run_id},
+            ).mappings().all()
+        return [dict(row) for row in rows]
+
+    def clear(self, run_id: str):
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {self.table_name} WHERE run_id = :run_id"), {"run_id": run_id})
@@ -0,0 +1,217 @@
+# src/ai_assistant/index_snapshot.py
+import hashlib
+import json
+import mmap
+import shutil
+import sys
+import tarfile
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+
+try:
+    import numpy as np
+except ImportError:
+    # This will be caught by the checks in SnapshotWriter and IndexSnapshot
+    np = None
+
+from .index_store import cosine_top_k, hnswlib
+
+logger = structlog.get_logger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_MANIFEST = "snapshot.json"
+VECTORS_FILE = "vectors.bin"
+COLUMNS_FILE = "columns.bin"
+GRAPH_FILE = "graph.hnsw"
+# Text columns stored Arrow-style: little-endian uint64 offsets (rows + 1), then the concatenated UTF-8 values.
+COLUMNS = ("id", "source", "chunk_hash", "language", "content", "metadata")
+_VECTOR_DTYPES = {"vector": "<f4", "halfvec": "<f2"}
+
+def file_sha256(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while buf := f.read(1 << 20):
+            hasher.update(buf)
+    return hasher.hexdigest()
+
+class SnapshotWriter:
+    """
+    Streams index rows into a snapshot directory, so exports of large indexes never hold more
+    than the column offsets in memory. `close` writes the columnar file, the optional HNSW graph
+    and `snapshot.json`, which lists every file with its checksum.
+    """
+    def __init__(self, directory: Path, dim: int, storage_type: str = "vector", hnsw_m: int = 16, hnsw_ef_construction: int = 64):
+        if np is None:
+            raise ImportError("Index snapshots require numpy. Please run 'pip install -e .[indexing]'")
+        self.directory = directory
+        self.dim = dim
+        self.storage_type = storage_type
+        self.dtype = np.dtype(_VECTOR_DTYPES[storage_type])
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        if directory.exists():
+            shutil.rmtree(directory)
+        directory.mkdir(parents=True)
+        self.rows = 0
+        self._vectors = open(directory / VECTORS_FILE, 'wb')
+        self._column_files = {name: open(directory / f"{name}.column.tmp", 'wb') for name in COLUMNS}
+        self._offsets = {name: array('Q', [0]) for name in COLUMNS}
+
+    def add(self, rows: Iterable[Dict[str, Any]]):
+        """Appends rows shaped like `Indexer._row_values`: id, content, metadata, embedding, source, chunk_hash, language."""
+        batch = list(rows)
+        if not batch:
+            return
+        vectors = np.asarray([row['embedding'] for row in batch], dtype=np.float32).reshape(len(batch), self.dim)
+        self._vectors.write(vectors.astype(self.dtype).tobytes())
+        for row in batch:
+            for name in COLUMNS:
+                value = row[name]
+                data = (json.dumps(value, separators=(",", ":")) if name == "metadata" else (value or "")).encode('utf-8')
+                self._column_files[name].write(data)
+                self._offsets[name].append(self._offsets[name][-1] + len(data))
+        self.rows += len(batch)
+
+    def _write_columns(self) -> Dict[str, Dict[str, int]]:
+        layout = {}
+        with open(self.directory / COLUMNS_FILE, 'wb') as out:
+            for name in COLUMNS:
+                self._column_files[name].close()
+                offsets = self._offsets[name]
+                if offsets.itemsize != 8:
+                    raise RuntimeError("array('Q') is not 64-bit on this platform.")
+                if sys.byteorder == "big":
+                    offsets.byteswap()
+                layout[name] = {"offsets_at": out.tell()}
+                offsets.tofile(out)
+                column_path = self.directory / f"{name}.column.tmp"
+                layout[name]["data_at"] = out.tell()
+                with open(column_path, 'rb') as data:
+                    shutil.copyfileobj(data, out, 1 << 20)
+                layout[name]["data_bytes"] = out.tell() - layout[name]["data_at"]
+                column_path.unlink()
+                # Keep the next offsets array 8-byte aligned so readers can view it in place.
+                out.write(b"\0" * (-out.tell() % 8))
+        return layout
+
+    def _build_graph(self) -> bool:
+        if hnswlib is None or not self.rows:
+            if hnswlib is None:
+                logger.info("hnswlib is not installed; exporting the snapshot without an ANN graph.")
+            return False
+        vectors = np.memmap(self.directory / VECTORS_FILE, dtype=self.dtype, mode='r', shape=(self.rows, self.dim))
+        graph = hnswlib.Index(space='cosine', dim=self.dim)
+        graph.init_index(max_elements=self.rows, ef_construction=self.hnsw_ef_construction, M=self.hnsw_m)
+        for start in range(0, self.rows, 65536):
+            block = np.asarray(vectors[start:start + 65536], dtype=np.float32)
+            graph.add_items(block, np.arange(start, start + len(block)))
+        graph.save_index(str(self.directory / GRAPH_FILE))
+        return True
+
+    def close(self, **info: Any) -> Dict[str, Any]:
+        """Finishes the snapshot. Extra keyword arguments (commit, model, ...) are recorded in snapshot.json."""
+        self._vectors.close()
+        layout = self._write_columns()
+        has_graph = self._build_graph()
+        files = [VECTORS_FILE, COLUMNS_FILE] + ([GRAPH_FILE] if has_graph else [])
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "created_at_utc": datetime.now(timezone.utc).isoformat(),
+            "rows": self.rows,
+            "dim": self.dim,
+            "storage_type": self.storage_type,
+            "vector_dtype": self.dtype.str,
+            "columns": layout,
+            "graph": {"file": GRAPH_FILE, "space": "cosine", "m": self.hnsw_m} if has_graph else None,
+            "files": {name: {"bytes": (self.directory / name).stat().st_size, "sha256": file_sha256(self.directory / name)} for name in files},
+            **info,
+        }
+        with open(self.directory / SNAPSHOT_MANIFEST, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        logger.info("Wrote index snapshot", path=str(self.directory), rows=self.rows, graph=has_graph)
+        return manifest
+
+def pack_snapshot(directory: Path, archive_path: Path) -> Path:
+    """Compresses a snapshot directory into a single gzip'd tarball for transfer."""
+    temp_path = archive_path.with_name(archive_path.name + ".tmp")
+    with tarfile.open(temp_path, "w:gz", compresslevel=6) as tar:
+        for path in sorted(directory.iterdir()):
+            tar.add(path, arcname=path.name)
+    temp_path.replace(archive_path)
+    return archive_path
+
+def unpack_snapshot(archive_path: Path, directory: Path) -> Path:
+    """Extracts a snapshot tarball and verifies every file against the checksums in snapshot.json."""
+    if directory.exists():
+        shutil.rmtree(directory)
+    directory.mkdir(parents=True)
+    with tarfile.open(archive_path, "r:gz") as tar:
+        tar.extractall(directory, filter="data")
+    with open(directory / SNAPSHOT_MANIFEST, encoding='utf-8') as f:
+        manifest = json.load(f)
+    for name, expected in manifest["files"].items():
+        if file_sha256(directory / name) != expected["sha256"]:
+            raise ValueError(f"Snapshot file '{name}' does not match its checksum.")
+    return directory
+
+class IndexSnapshot:
+    """
+    Read-only view of an unpacked snapshot. Vectors and columns are memory-mapped and read in
+    place; only the rows a search returns are decoded.
+    """
+    def __init__(self, directory: Path):
+        if np is None:
+            raise ImportError("Index snapshots require numpy. Please run 'pip install -e .[indexing]'")
+        with open(directory / SNAPSHOT_MANIFEST, encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest["format_version"] > SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Snapshot format {self.manifest['format_version']} is newer than this client supports.")
+        self.directory = directory
+        self.rows = self.manifest["rows"]
+        self.dim = self.manifest["dim"]
+        self.vectors = (
+            np.memmap(directory / VECTORS_FILE, dtype=np.dtype(self.manifest["vector_dtype"]), mode='r', shape=(self.rows, self.dim))
+            if self.rows else np.empty((0, self.dim), dtype=np.dtype(self.manifest["vector_dtype"]))
+        )
+        self._columns_file = open(directory / COLUMNS_FILE, 'rb')
+        self._columns = mmap.mmap(self._columns_file.fileno(), 0, access=mmap.ACCESS_READ) if self.rows else b""
+        self._offsets = {
+            name: np.frombuffer(self._columns, dtype='<u8', count=self.rows + 1, offset=layout["offsets_at"]) if self.rows else None
+            for name, layout in self.manifest["columns"].items()
+        }
+        self.graph = None
+        if self.manifest.get("graph") and hnswlib is not None:
+            self.graph = hnswlib.Index(space=self.manifest["graph"]["space"], dim=self.dim)
+            self.graph.load_index(str(directory / self.manifest["graph"]["file"]))
+
+    def value(self, column: str, row: int) -> str:
+        offsets = self._offsets[column]
+        start = self.manifest["columns"][column]["data_at"]
+        return self._columns[start + int(offsets[row]):start + int(offsets[row + 1])].decode('utf-8')
+
+    def search(self, query_vector: List[float], k: int = 10, ef_search: int = 64) -> List[Dict[str, Any]]:
+        """The `k` chunks nearest to `query_vector` by cosine similarity, best first."""
+        k = min(k, self.rows)
+        if not k:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        if self.graph is not None:
+            self.graph.set_ef(max(ef_search, k))
+            labels, distances = self.graph.knn_query(query, k=k)
+            hits: List[Tuple[int, float]] = list(zip(labels[0].tolist(), (1.0 - distances[0]).tolist()))
+        else:
+            hits = cosine_top_k(self.vectors, np.arange(self.rows), query, k)
+        return [
+            {"id": self.value("id", row), "content": self.value("content", row), "metadata": json.loads(self.value("metadata", row)), "score": score}
+            for row, score in hits
+        ]
+
+    def close(self):
+        self._offsets = {}
+        if isinstance(self._columns, mmap.mmap):
+            self._columns.close()
+        self._columns_file.close()
@@ -0,0 +1,109 @@
+# src/ai_assistant/index_state.py
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# State entry keys, in column order. Entries written before a key existed simply lack it.
+STATE_FIELDS = ("hash", "size", "mtime_ns", "inode", "chunks", "commit")
+
+def _row(entry: Dict[str, Any]) -> Tuple[Any, ...]:
+    return tuple(entry.get(key) for key in STATE_FIELDS)
+
+class SQLiteStateStore:
+    """
+    Per-path indexer state in SQLite (WAL), for repositories where rewriting state.json on every
+    checkpoint and run gets expensive. `save` upserts only the entries that changed since the last
+    load or save. state.json is written by `export_json` only for its readers, the uploaded
+    artifact and CI checks. A state.json the store did not write itself, e.g. one downloaded by
+    CI, is imported over the store's contents on `load`.
+    """
+    def __init__(self, db_path: Path, json_path: Path):
+        self.db_path = db_path
+        self.json_path = json_path
+        self._lock = threading.Lock()
+        self._saved: Dict[str, Tuple[Any, ...]] = {}
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA synchronous=NORMAL;")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY, hash TEXT NOT NULL, size INTEGER, mtime_ns INTEGER, inode INTEGER,
+                    chunks INTEGER, commit_sha TEXT
+                ) WITHOUT ROWID
+            """)
+            self.conn.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _info(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM info WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _json_fingerprint(self) -> Optional[str]:
+        try:
+            st = self.json_path.stat()
+        except FileNotFoundError:
+            return None
+        return f"{st.st_size}:{st.st_mtime_ns}"
+
+    def _import_json(self):
+        with open(self.json_path, 'rb') as f:
+            state = orjson.loads(f.read())
+        # Older state files map path -> hash.
+        rows = [(path, *_row({"hash": entry} if isinstance(entry, str) else entry)) for path, entry in state.items()]
+        with self.conn:
+            self.conn.execute("DELETE FROM files")
+            self.conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('exported', ?)", (self._json_fingerprint(),))
+        logger.info("Imported state.json into the state database.", files=len(rows), path=str(self.db_path))
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            fingerprint = self._json_fingerprint()
+            if fingerprint is not None and fingerprint != self._info("exported"):
+                self._import_json()
+            self._saved = {row[0]: row[1:] for row in self.conn.execute("SELECT * FROM files")}
+            return {path: {key: value for key, value in zip(STATE_FIELDS, row) if value is not None} for path, row in self._saved.items()}
+
+    def save(self, state: Dict[str, Dict[str, Any]]) -> int:
+        """Writes the entries that differ from the stored ones in one transaction. Returns how many changed."""
+        with self._lock:
+            current = {path: _row(entry) for path, entry in state.items()}
+            upserts = [(path, *row) for path, row in current.items() if self._saved.get(path) != row]
+            deletes = [(path,) for path in self._saved.keys() - current.keys()]
+            if upserts or deletes:
+                with self.conn:
+                    self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", upserts)
+                    self.conn.executemany("DELETE FROM files WHERE path = ?", deletes)
+                    # Persisted with the rows, so an export missed by a crash still happens on the next run.
+                    self.conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('json_stale', '1')")
+                self._saved = current
+            return len(upserts) + len(deletes)
+
+    def export_json(self, force: bool = False):
+        """Rewrites state.json from the database, unless it already matches it."""
+        with self._lock:
+            fingerprint = self._json_fingerprint()
+            if not (force or self._info("json_stale") == '1' or fingerprint is None or fingerprint != self._info("exported")):
+                return
+            state = {
+                path: {key: value for key, value in zip(STATE_FIELDS, row) if value is not None}
+                for path, *row in self.conn.execute("SELECT * FROM files ORDER BY path")
+            }
+            temp_path = self.json_path.with_suffix('.tmp')
+            with open(temp_path, 'wb') as f:
+                f.write(orjson.dumps(state))
+            temp_path.replace(self.json_path)
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('exported', ?)", (self._json_fingerprint(),))
+                self.conn.execute("DELETE FROM info WHERE key = 'json_stale'")
+            logger.info("Exported state.json from the state database.", files=len(state))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,384 @@
+# src/ai_assistant/index_store.py
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+
+try:
+    import numpy as np
+except ImportError:
+    # This will be caught by the check in LocalVectorStore.__init__
+    np = None
+
+try:
+    import hnswlib
+except ImportError:
+    # Searches fall back to an exact scan of the memory-mapped matrix.
+    hnswlib = None
+
+logger = structlog.get_logger(__name__)
+
+# SQLite caps the number of bound parameters per statement; stay well below it.
+_MAX_PARAMS_PER_QUERY = 500
+# Tombstoned rows are compacted away once they make up this share of a store of at least _COMPACT_MIN_ROWS.
+_COMPACT_DEAD_RATIO = 0.5
+_COMPACT_MIN_ROWS = 1000
+_STORAGE_DTYPES = {"vector": "float32", "halfvec": "float16"}
+
+def cosine_top_k(matrix, rows, query, k: int) -> List[Tuple[int, float]]:
+    """Exact search: the `k` of `rows` whose vectors in `matrix` are most cosine-similar to `query`, best first."""
+    candidates = np.asarray(matrix[rows], dtype=np.float32)
+    norms = np.linalg.norm(candidates, axis=1) * (np.linalg.norm(query) or 1.0)
+    scores = candidates @ query / np.where(norms == 0, 1.0, norms)
+    best = np.argsort(-scores)[:k]
+    return list(zip(np.asarray(rows)[best].tolist(), scores[best].tolist()))
+
+class IndexStore:
+    """
+    Storage backend of the indexer. Rows are the dicts built by `Indexer._row_values`; a file's rows
+    are always replaced as a whole, so a backend only needs whole-file replace and delete.
+    The PostgreSQL backend is built into `Indexer` itself, because its bulk loads, shared chunk
+    store and work queue are PostgreSQL features.
+    """
+    def setup(self, reset: bool = False):
+        """Creates the store, or empties it when `reset` is set. Raises ValueError if it holds incompatible vectors."""
+        raise NotImplementedError
+
+    def fetch_embeddings(self, chunk_hashes: List[str]) -> Dict[str, List[float]]:
+        raise NotImplementedError
+
+    def delete_sources(self, sources: List[str]):
+        raise NotImplementedError
+
+    def replace_files(self, files: List[Tuple[str, List[Dict[str, Any]]]]):
+        """Atomically replaces all rows of each listed source with the given rows."""
+        raise NotImplementedError
+
+    def flush(self):
+        """Persists anything held in memory, e.g. at the end of a run."""
+
+    def close(self):
+        pass
+
+class LocalVectorStore(IndexStore):
+    """
+    An embedded store for indexes that need no database server. Vectors are appended to a raw
+    float matrix that readers memory-map. Chunk text and metadata live in SQLite, keyed by matrix
+    row. An HNSW graph (hnswlib) over the rows is kept in memory while indexing and saved by
+    `flush`. Deletes only tombstone rows; the matrix is compacted once tombstones dominate.
+    """
+    def __init__(self, path: Path, dim: int, storage_type: str = "vector", hnsw_m: int = 16, hnsw_ef_construction: int = 64, read_only: bool = False):
+        if np is None:
+            raise ImportError("The local index store requires numpy. Please run 'pip install -e .[indexing-local]'")
+        self.path = path
+        self.dim = dim
+        self.storage_type = storage_type
+        self.dtype = np.dtype(_STORAGE_DTYPES[storage_type])
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.read_only = read_only
+        self.db_path = path / "metadata.sqlite"
+        self.graph_path = path / "hnsw.bin"
+        self.conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._info: Dict[str, Any] = {}
+        self._matrix = None
+        self._graph = None
+        self._graph_dirty = False
+        if read_only:
+            self._connect()
+            self._load_graph()
+
+    @classmethod
+    def load(cls, path: Path) -> "LocalVectorStore":
+        """Opens an existing store for searching. Costs a SQLite open, an mmap and, with hnswlib, a graph load."""
+        conn = sqlite3.connect(f"file:{path / 'metadata.sqlite'}?mode=ro", uri=True)
+        try:
+            info = dict(conn.execute("SELECT key, value FROM info").fetchall())
+        finally:
+            conn.close()
+        return cls(path, int(info["dim"]), info["storage_type"], read_only=True)
+
+    # --- Opening and layout ---
+
+    def _connect(self):
+        if self.read_only:
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL;")
+            self.conn.execute("PRAGMA synchronous=NORMAL;")
+            with self.conn:
+                self.conn.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS chunks (
+                        row INTEGER PRIMARY KEY, id TEXT NOT NULL, source TEXT NOT NULL, chunk_hash TEXT NOT NULL,
+                        language TEXT, content TEXT NOT NULL, metadata TEXT NOT NULL, live INTEGER NOT NULL DEFAULT 1
+                    )
+                """)
+                self.conn.execute("CREATE INDEX IF NOT EXISTS chunks_source_idx ON chunks (source) WHERE live = 1")
+                self.conn.execute("CREATE INDEX IF NOT EXISTS chunks_hash_idx ON chunks (chunk_hash) WHERE live = 1")
+                self.conn.executemany("INSERT OR IGNORE INTO info (key, value) VALUES (?, ?)", [
+                    ("dim", str(self.dim)), ("storage_type", self.storage_type), ("rows", "0"), ("version", "0"),
+                    ("graph_version", "-1"), ("vectors_file", "vectors.0.bin"),
+                ])
+        self._info = dict(self.conn.execute("SELECT key, value FROM info").fetchall())
+        self._matrix = None
+
+    def _set_info(self, **values: Any):
+        """Must run inside the caller's transaction."""
+        self.conn.executemany("UPDATE info SET value = ? WHERE key = ?", [(str(v), k) for k, v in values.items()])
+        self._info.update({k: str(v) for k, v in values.items()})
+
+    @property
+    def rows(self) -> int:
+        return int(self._info["rows"])
+
+    @property
+    def version(self) -> int:
+        return int(self._info["version"])
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.path / self._info["vectors_file"]
+
+    def setup(self, reset: bool = False):
+        with self._lock:
+            if reset:
+                self.close()
+                for leftover in self.path.glob("*") if self.path.exists() else ():
+                    leftover.unlink()
+            self._connect()
+            if int(self._info["dim"]) != self.dim or self._info["storage_type"] != self.storage_type:
+                raise ValueError(
+                    f"Local index at '{self.path}' stores {self._info['storage_type']}({self._info['dim']}) "
+                    f"but the indexer produces {self.storage_type}({self.dim}). Run with --force-reindex to rebuild it."
+                )
+            row_bytes = self.dim * self.dtype.itemsize
+            if self.vectors_path.exists() and self.vectors_path.stat().st_size > self.rows * row_bytes:
+                # Vectors of a write whose metadata transaction never committed.
+                os.truncate(self.vectors_path, self.rows * row_bytes)
+            for leftover in self.path.glob("vectors.*.bin"):
+                if leftover != self.vectors_path:
+                    leftover.unlink()
+            self._load_graph()
+
+    # --- Vectors and graph ---
+
+    def _vectors(self):
+        """The live memory map of the vector matrix, re-mapped after it grew."""
+        if self._matrix is None or len(self._matrix) != self.rows:
+            if self.rows == 0:
+                self._matrix = np.empty((0, self.dim), dtype=self.dtype)
+            else:
+                self._matrix = np.memmap(self.vectors_path, dtype=self.dtype, mode='r', shape=(self.rows, self.dim))
+        return self._matrix
+
+    def _live_rows(self) -> "np.ndarray":
+        return np.fromiter((r for (r,) in self.conn.execute("SELECT row FROM chunks WHERE live = 1 ORDER BY row")), dtype=np.int64)
+
+    def _load_graph(self):
+        if hnswlib is None:
+            logger.info("hnswlib is not installed; local index searches scan all vectors.", path=str(self.path))
+            return
+        if self.graph_path.exists() and self._info["graph_version"] == self._info["version"]:
+            self._graph = hnswlib.Index(space='cosine', dim=self.dim)
+            self._graph.load_index(str(self.graph_path), max_elements=max(self.rows, 1), allow_replace_deleted=False)
+            return
+        if self.read_only:
+            logger.warning("Local HNSW graph is missing or stale; searches scan all vectors.", path=str(self.path))
+            return
+        self._rebuild_graph()
+
+    def _rebuild_graph(self):
+        live = self._live_rows()
+        logger.info("Building local HNSW graph", rows=len(live), path=str(self.path))
+        self._graph = hnswlib.Index(space='cosine', dim=self.dim)
+        self._graph.init_index(max_elements=max(len(live), 1024), ef_construction=self.hnsw_ef_construction, M=self.hnsw_m)
+        if len(live):
+            self._graph.add_items(np.asarray(self._vectors()[live], dtype=np.float32), live)
+        self._graph_dirty = True
+
+    def _graph_add(self, vectors: "np.ndarray", ids: "np.ndarray"):
+        if self._graph is None or not len(ids):
+            return
+        needed = self._graph.get_current_count() + len(ids)
+        if needed > self._graph.get_max_elements():
+            self._graph.resize_index(max(needed, self._graph.get_max_elements() * 2))
+        self._graph.add_items(vectors, ids)
+        self._graph_dirty = True
+
+    def _graph_delete(self, ids: Iterable[int]):
+        if self._graph is None:
+            return
+        for row in ids:
+            self._graph.mark_deleted(int(row))
+            self._graph_dirty = True
+
+    # --- IndexStore ---
+
+    def _rows_for(self, column: str, values: List[str]) -> List[Tuple[int, str]]:
+        found = []
+        for i in range(0, len(values), _MAX_PARAMS_PER_QUERY):
+            batch = values[i:i + _MAX_PARAMS_PER_QUERY]
+            placeholders = ",".join("?" * len(batch))
+            found.extend(self.conn.execute(f"SELECT row, {column} FROM chunks WHERE live = 1 AND {column} IN ({placeholders})", batch))
+        return found
+
+    def fetch_embeddings(self, chunk_hashes: List[str]) -> Dict[str, List[float]]:
+        with self._lock:
+            matrix = self._vectors()
+            return {chunk_hash: matrix[row].astype(np.float32).tolist() for row, chunk_hash in self._rows_for("chunk_hash", list(dict.fromkeys(chunk_hashes)))}
+
+    def _tombstone(self, sources: List[str]) -> List[int]:
+        """Must run inside the caller's transaction."""
+        dead = [row for row, _ in self._rows_for("source", sources)]
+        self.conn.executemany("UPDATE chunks SET live = 0 WHERE row = ?", [(row,) for row in dead])
+        return dead
+
+    def delete_sources(self, sources: List[str]):
+        with self._lock:
+            with self.conn:
+                dead = self._tombstone(sources)
+                self._set_info(version=self.version + 1)
+            self._graph_delete(dead)
+
+    def replace_files(self, files: List[Tuple[str, List[Dict[str, Any]]]]):
+        with self._lock:
+            rows = [row for _, file_rows in files for row in file_rows]
+            vectors = np.asarray([row['embedding'] for row in rows], dtype=np.float32).reshape(len(rows), self.dim)
+            start = self.rows
+            ids = np.arange(start, start + len(rows), dtype=np.int64)
+            try:
+                if rows:
+                    with open(self.vectors_path, 'ab') as f:
+                        f.write(vectors.astype(self.dtype).tobytes())
+                with self.conn:
+                    dead = self._tombstone([source for source, _ in files])
+                    self.conn.executemany(
+                        "INSERT INTO chunks (row, id, source, chunk_hash, language, content, metadata) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (int(row_id), row['id'], row['source'], row['chunk_hash'], row['language'], row['content'], json.dumps(row['metadata']))
+                            for row_id, row in zip(ids, rows)
+                        ],
+                    )
+                    self._set_info(rows=start + len(rows), version=self.version + 1)
+            except BaseException:
+                if self.vectors_path.exists():
+                    os.truncate(self.vectors_path, start * self.dim * self.dtype.itemsize)
+                self._info = dict(self.conn.execute("SELECT key, value FROM info").fetchall())
+                raise
+            self._graph_delete(dead)
+            self._graph_add(vectors, ids)
+
+    def iter_rows(self, batch_size: int = 1000) -> Iterable[List[Dict[str, Any]]]:
+        """Yields the live rows in batches, shaped like `Indexer._row_values`, with vectors as views into the matrix."""
+        last_row = -1
+        while True:
+            with self._lock:
+                matrix = self._vectors()
+                batch = self.conn.execute(
+                    "SELECT row, id, source, chunk_hash, language, content, metadata FROM chunks WHERE live = 1 AND row > ? ORDER BY row LIMIT ?",
+                    (last_row, batch_size),
+                ).fetchall()
+                if not batch:
+                    return
+                rows = [
+                    {"id": chunk_id, "source": source, "chunk_hash": chunk_hash, "language": language,
+                     "content": content, "metadata": json.loads(metadata), "embedding": matrix[row]}
+                    for row, chunk_id, source, chunk_hash, language, content, metadata in batch
+                ]
+            last_row = batch[-1][0]
+            yield rows
+
+    def iter_chunk_hashes(self, sources: Optional[List[str]] = None) -> Iterable[Tuple[str, str, str]]:
+        """Yields (source, id, chunk_hash) for every live row, or only for `sources`, without touching the vectors."""
+        with self._lock:
+            if sources is None:
+                rows = self.conn.execute("SELECT source, id, chunk_hash FROM chunks WHERE live = 1").fetchall()
+            else:
+                rows = []
+                for i in range(0, len(sources), _MAX_PARAMS_PER_QUERY):
+                    batch = sources[i:i + _MAX_PARAMS_PER_QUERY]
+                    rows += self.conn.execute(
+                        f"SELECT source, id, chunk_hash FROM chunks WHERE live = 1 AND source IN ({','.join('?' * len(batch))})", batch
+                    ).fetchall()
+        yield from rows
+
+    def compact(self):
+        """Rewrites the matrix without tombstoned rows, renumbers the metadata and rebuilds the graph."""
+        with self._lock:
+            live = self._live_rows()
+            generation = int(self._info["vectors_file"].split(".")[1]) + 1
+            new_file = f"vectors.{generation}.bin"
+            with open(self.path / new_file, 'wb') as f:
+                for i in range(0, len(live), 65536):
+                    f.write(np.ascontiguousarray(self._vectors()[live[i:i + 65536]]).tobytes())
+            old_path = self.vectors_path
+            with self.conn:
+                self.conn.execute("DELETE FROM chunks WHERE live = 0")
+                self.conn.execute("CREATE TEMP TABLE row_map AS SELECT row AS old_row, ROW_NUMBER() OVER (ORDER BY row) - 1 AS new_row FROM chunks")
+                # Renumber through negative ids so no intermediate row id collides with an existing one.
+                self.conn.execute("UPDATE chunks SET row = -1 - row")
+                self.conn.execute("UPDATE chunks SET row = (SELECT new_row FROM row_map WHERE old_row = -1 - chunks.row)")
+                self.conn.execute("DROP TABLE row_map")
+                self._set_info(rows=len(live), version=self.version + 1, vectors_file=new_file)
+            old_path.unlink(missing_ok=True)
+            self._matrix = None
+            logger.info("Compacted local index", rows=len(live), path=str(self.path))
+            if hnswlib is not None:
+                self._rebuild_graph()
+
+    def flush(self):
+        with self._lock:
+            dead = self.conn.execute("SELECT count(*) FROM chunks WHERE live = 0").fetchone()[0]
+            if self.rows >= _COMPACT_MIN_ROWS and dead >= self.rows * _COMPACT_DEAD_RATIO:
+                self.compact()
+            if self._graph is None or not self._graph_dirty:
+                return
+            temp_path = self.graph_path.with_suffix('.tmp')
+            self._graph.save_index(str(temp_path))
+            temp_path.replace(self.graph_path)
+            with self.conn:
+                self._set_info(graph_version=self.version)
+            self._graph_dirty = False
+
+    def close(self):
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+            self._matrix = None
+            self._graph = None
+
+    # --- Retrieval ---
+
+    def search(self, query_vector: List[float], k: int = 10, ef_search: int = 64) -> List[Dict[str, Any]]:
+        """The `k` chunks nearest to `query_vector` by cosine similarity, best first."""
+        with self._lock:
+            query = np.asarray(query_vector, dtype=np.float32)
+            live_count = self.conn.execute("SELECT count(*) FROM chunks WHERE live = 1").fetchone()[0]
+            k = min(k, live_count)
+            if not k:
+                return []
+            if self._graph is not None:
+                self._graph.set_ef(max(ef_search, k))
+                labels, distances = self._graph.knn_query(query, k=k)
+                hits = list(zip(labels[0].tolist(), (1.0 - distances[0]).tolist()))
+            else:
+                hits = cosine_top_k(self._vectors(), self._live_rows(), query, k)
+            by_row = {}
+            rows = [row for row, _ in hits]
+            for i in range(0, len(rows), _MAX_PARAMS_PER_QUERY):
+                batch = rows[i:i + _MAX_PARAMS_PER_QUERY]
+                placeholders = ",".join("?" * len(batch))
+                for row, chunk_id, content, metadata in self.conn.execute(
+                    f"SELECT row, id, content, metadata FROM chunks WHERE row IN ({placeholders})", batch
+                ):
+                    by_row[row] = {"id": chunk_id, "content": content, "metadata": json.loads(metadata)}
+            return [{**by_row[row], "score": score} for row, score in hits if row in by_row]
@@ -0,0 +1,158 @@
+# src/ai_assistant/index_watcher.py
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Set
+
+import structlog
+
+try:
+    from watchdog.events import FileSystemEvent, FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    # This will be caught by the check in IndexWatcher.__init__
+    FileSystemEventHandler, Observer = object, None
+
+from .config import ai_settings
+
+logger = structlog.get_logger()
+
+class _ChangeCollector(FileSystemEventHandler):
+    """Accumulates the project-relative paths touched by filesystem events until the watcher drains them."""
+
+    def __init__(self, project_root: Path):
+        super().__init__()
+        self.project_root = project_root
+        self.paths: Set[str] = set()
+        self.first_event_at: Optional[float] = None
+        self.last_event_at: Optional[float] = None
+        self.lock = threading.Lock()
+        self.changed = threading.Event()
+
+    def _relative(self, path) -> Optional[str]:
+        path = path.decode() if isinstance(path, bytes) else path
+        try:
+            return Path(path).relative_to(self.project_root).as_posix()
+        except ValueError:
+            return None
+
+    def on_any_event(self, event: "FileSystemEvent"):
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        touched = [self._relative(event.src_path)]
+        if getattr(event, "dest_path", None):
+            touched.append(self._relative(event.dest_path))
+        touched = [p for p in touched if p and p != "."]
+        if not touched:
+            return
+        now = time.monotonic()
+        with self.lock:
+            self.paths.update(touched)
+            self.first_event_at = self.first_event_at or now
+            self.last_event_at = now
+        self.changed.set()
+
+    def drain(self) -> Set[str]:
+        with self.lock:
+            paths, self.paths = self.paths, set()
+            self.first_event_at = self.last_event_at = None
+            self.changed.clear()
+        return paths
+
+class IndexWatcher:
+    """
+    Keeps an index current by re-indexing files as they change. One Indexer, and with it the
+    embedding model and the database pool, stays loaded for the watcher's lifetime. Bursts of
+    events such as a branch switch are debounced into a single incremental run.
+    """
+    def __init__(self, indexer, debounce_seconds: Optional[float] = None, max_delay_seconds: Optional[float] = None):
+        if Observer is None:
+            raise ImportError("Watch mode requires the 'watchdog' package. Please run 'pip install -e .[indexing-watch]'")
+        self.indexer = indexer
+        self.debounce_seconds = debounce_seconds if debounce_seconds is not None else ai_settings.rag.watch_debounce_seconds
+        self.max_delay_seconds = max_delay_seconds if max_delay_seconds is not None else ai_settings.rag.watch_max_delay_seconds
+        self._collector = _ChangeCollector(indexer.project_root.resolve())
+        self._stop = threading.Event()
+
+    def _wait_for_quiet(self) -> bool:
+        """
+        Blocks until events have stopped arriving for `debounce_seconds`, or the first pending event
+        is `max_delay_seconds` old. Returns False if the watcher was stopped meanwhile.
+        """
+        collector = self._collector
+        while not self._stop.is_set():
+            if not collector.changed.wait(timeout=0.5):
+                continue
+            with collector.lock:
+                first, last = collector.first_event_at, collector.last_event_at
+            if first is None:
+                continue
+            now = time.monotonic()
+            if now - last >= self.debounce_seconds or now - first >= self.max_delay_seconds:
+                return True
+            time.sleep(min(self.debounce_seconds - (now - last), self.max_delay_seconds - (now - first), 0.5))
+        return False
+
+    def _indexable_changes(self, paths: Set[str]) -> Optional[Set[str]]:
+        """
+        Narrows raw event paths to what the indexer should revisit. Directories are expanded to the
+        files below them and to indexed files that used to live there. Returns None when an
+        ignore file changed, since that can change which files belong in the index at all.
+        """
+        indexer = self.indexer
+        ignore_file_names = set(indexer.ignore_matcher.ignore_file_names)
+        if any(Path(p).name in ignore_file_names for p in paths):
+            return None
+        changes: Set[str] = set()
+        for rel_path in paths:
+            full_path = indexer.project_root / rel_path
+            if full_path.is_dir():
+                if indexer.ignore_matcher.is_path_ignored(rel_path, is_dir=True):
+                    continue
+                changes.update(
+                    p.relative_to(indexer.project_root).as_posix()
+                    for p in full_path.rglob("*")
+                    if p.is_file() and not indexer.ignore_matcher.is_path_ignored(p.relative_to(indexer.project_root).as_posix())
+                )
+                changes.update(p for p in indexer.state if p.startswith(rel_path + "/"))
+                continue
+            if rel_path in indexer.state or not indexer.ignore_matcher.is_path_ignored(rel_path):
+                changes.add(rel_path)
+            if not full_path.exists():
+                # A deleted directory is reported once; drop whatever was indexed under it.
+                changes.update(p for p in indexer.state if p.startswith(rel_path + "/"))
+        return changes
+
+    def _reindex(self, paths: Set[str]):
+        changes = self._indexable_changes(paths)
+        if changes is None:
+            logger.info("Ignore rules changed; rescanning the whole project.")
+            self.indexer.reload_ignore_rules()
+        elif not changes:
+            return
+        else:
+            logger.info("Re-indexing changed files", count=len(changes))
+        try:
+            self.indexer.run(changed_paths=changes, upload_artifacts=False)
+        except Exception as e:
+            # A failed batch must not end the daemon; its files are retried on their next change
+            # and are listed in the manifest's pending_paths meanwhile.
+            logger.error("Incremental re-index failed; continuing to watch.", error=str(e), exc_info=True)
+
+    def watch(self):
+        """Runs an initial incremental pass, then re-indexes on change until interrupted."""
+        self.indexer.run(upload_artifacts=False)
+        observer = Observer()
+        observer.schedule(self._collector, str(self.indexer.project_root.resolve()), recursive=True)
+        observer.start()
+        logger.info("Watching for changes", project_root=str(self.indexer.project_root), debounce_seconds=self.debounce_seconds)
+        try:
+            while self._wait_for_quiet():
+                self._reindex(self._collector.drain())
+        finally:
+            observer.stop()
+            observer.join()
+            logger.info("Stopped watching.")
+
+    def stop(self):
+        self._stop.set()
@@ -2,40 +2,68 @@
 
 import argparse
 import hashlib
+import importlib.util
+import io
 import os
 import re
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Generator
-import fnmatch
+from typing import List, Dict, Any, Optional, Generator, Callable, Iterable, Tuple, Union
 import subprocess
 from datetime import datetime, timezone
-import ast
-from collections import defaultdict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+import uuid
+from functools import partial
 
+# Missing libraries are caught by the check in main(). The embedding model, the PostgreSQL driver
+# and the OCI SDK are imported only where the backend that needs them is used.
 try:
-    from sentence_transformers import SentenceTransformer
-    from openai import OpenAI
     from sqlalchemy import create_engine, text, insert, table, column, String, JSON, TEXT
-    from pgvector.sqlalchemy import VECTOR
-    import psycopg2
-    import oci
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    from pgvector.sqlalchemy import VECTOR, HALFVEC
+except ImportError:
+    create_engine = None
+try:
     import orjson
 except ImportError:
-    # This will be caught by the check in main()
-    SentenceTransformer, OpenAI, create_engine, psycopg2, oci, orjson = (None,)*6
+    orjson = None
 
 import structlog
 from dotenv import load_dotenv
 
+from .chunker import chunk_file, estimate_tokens
 from .config import ai_settings
+from .embedding_cache import EmbeddingCache
+from .index_merkle import MERKLE_FORMAT_VERSION, build_tree, content_hashes, update_tree
+from .index_queue import IndexWorkQueue
+from .index_snapshot import SNAPSHOT_FORMAT_VERSION, SnapshotWriter, file_sha256, pack_snapshot
+from .index_state import SQLiteStateStore
+from .index_store import IndexStore, LocalVectorStore
+from .index_watcher import IndexWatcher
 from .logging_config import setup_logging
+from .object_store import OCIObjectStore, upload_file
+from .remote_embeddings import RemoteEmbeddingClient
+from .utils import file_sniffer, pg_copy
 from .utils.git_utils import get_normalized_branch_name
+from .utils.ignore_matcher import IgnoreMatcher
 
 load_dotenv()
 logger = structlog.get_logger()
 
-EMBEDDING_BATCH_SIZE = 16
-DEFAULT_IGNORE_PATTERNS = [".git/", ".venv/", "venv/", "__pycache__/", "*.pyc", "*.log", ".DS_Store", "node_modules/", "build/", "dist/", ".idea/", ".vscode/", "*.egg-info/", "src/ai_assistant/personas/", ".ai/personas/", "src/ai_assistant/internal_data/"]
+# Column order shared by the bulk COPY staging table and the final INSERT ... SELECT.
+_ROW_COLUMNS = "id, content, metadata, embedding, source, chunk_hash, language"
+# With the shared chunk store, a branch table holds only these; content and embedding live in the chunk table.
+_MEMBER_COLUMNS = "id, metadata, source, chunk_hash, language"
+# Sentinel passed between the stages of the `_process_files` pipeline.
+_PIPELINE_DONE = object()
+# Evaluated with .gitignore semantics before any .gitignore/.aiignore file, so those files can override them.
+DEFAULT_IGNORE_PATTERNS = (".git/", ".venv/", "venv/", "__pycache__/", "*.pyc", "*.log", ".DS_Store", "node_modules/", "build/", "dist/", ".idea/", ".vscode/", "*.egg-info/", "src/ai_assistant/personas/", ".ai/personas/", "src/ai_assistant/internal_data/")
 
 LANGUAGE_MAP = {
     '.py': 'python', '.js': 'javascript', '.ts': 'typescript', '.md': 'markdown',
@@ -45,74 +73,274 @@ LANGUAGE_MAP = {
     '.yaml': 'yaml', '.yml': 'yaml', '.json': 'json'
 }
 
+def _apply_batch(func: Callable, items: List[Any]) -> List[Any]:
+    """Worker entry point that amortizes process-pool IPC by running `func` over a batch of items."""
+    return [func(item) for item in items]
+
+def _hash_file_task(file_path: Path) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Worker entry point for sniffing and hashing. Returns (hash, skip_reason, error) so one bad file
+    cannot abort a batch.
+    """
+    try:
+        return (*Indexer._calculate_hash(file_path), None)
+    except Exception as e:
+        return None, None, str(e)
+
+def _chunk_file_task(project_root: Path, model_name: str, file_path: Path) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Worker entry point for reading, metadata extraction and chunking. Returns (chunks, error)."""
+    try:
+        return Indexer._build_file_chunks(project_root, file_path, model_name), None
+    except Exception as e:
+        return [], str(e)
+
+def embedding_to_list(value: Any) -> List[float]:
+    """
+    An embedding column value as a list of floats. pgvector returns VECTOR values as numpy arrays
+    but HALFVEC values as `HalfVector` objects, which are not iterable in the pinned version.
+    """
+    if hasattr(value, "to_list"):
+        return value.to_list()
+    return [float(x) for x in value]
+
+def truncate_embedding(vector: List[float], dimensions: Optional[int]) -> List[float]:
+    """
+    Keeps the leading `dimensions` components of a Matryoshka embedding and re-normalizes it to unit
+    length, so cosine distances stay comparable. Query vectors must be truncated the same way as the
+    indexed ones; `None` or a size at least as large as the vector returns it unchanged.
+    """
+    if not dimensions or dimensions >= len(vector):
+        return list(vector)
+    head = vector[:dimensions]
+    norm = sum(x * x for x in head) ** 0.5
+    return [x / norm for x in head] if norm else list(head)
+
+def plan_token_batches(lengths: List[int], token_budget: int, max_batch_size: int) -> List[List[int]]:
+    """
+    Groups text indices, longest first, into batches whose padded size (texts x longest text)
+    stays within `token_budget`. A text longer than the budget gets a batch of its own.
+    """
+    batches: List[List[int]] = []
+    for index in sorted(range(len(lengths)), key=lambda i: -lengths[i]):
+        if batches and len(batches[-1]) < max_batch_size and (len(batches[-1]) + 1) * lengths[batches[-1][0]] <= token_budget:
+            batches[-1].append(index)
+        else:
+            batches.append([index])
+    return batches
+
 class EmbeddingProvider:
 
-    def __init__(self, provider_name: str = "local"):
+    def __init__(self, provider_name: str = "local", backend: Optional[str] = None):
         self.provider_name = provider_name
+        self.backend = None
+        self.dimensions: Optional[int] = None
         
         if self.provider_name == "local":
             self.model_name = ai_settings.rag.embedding_model_name
-            logger.info("Loading local embedding model", model_name=self.model_name)
-            if not SentenceTransformer:
+            self.backend = backend or ai_settings.rag.embedding_backend
+            # Chunk hashes are keyed on this: quantized vectors must never be confused with fp32 ones.
+            self.cache_key = self.model_name
+            logger.info("Loading local embedding model", model_name=self.model_name, backend=self.backend)
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
                 raise ImportError("sentence-transformers is not installed. Please run 'pip install -e .[indexing]'")
-            self.model = SentenceTransformer(self.model_name)
+            if self.backend == "onnx":
+                self.model = self._load_onnx_model()
+            else:
+                if ai_settings.rag.embedding_num_threads:
+                    import torch
+                    torch.set_num_threads(ai_settings.rag.embedding_num_threads)
+                self.model = SentenceTransformer(self.model_name)
             self.embedding_dim = self.model.get_sentence_embedding_dimension()
+            self._apply_dimensions()
             logger.info("Local model loaded successfully.", embedding_dim=self.embedding_dim)
         elif self.provider_name == "openai":
-            if not OpenAI:
-                raise ImportError("openai library is not installed. Please run 'pip install openai'.")
             api_key = os.getenv("OPENAI_API_KEY")
             if not api_key:
                 raise ValueError("OPENAI_API_KEY environment variable is not set.")
-            self.client = OpenAI(api_key=api_key)
-            self.model_name = "text-embedding-3-large"
-            self.embedding_dim = 3072 
-            logger.info("Using OpenAI embedding provider", model_name=self.model_name)
+            rag = ai_settings.rag
+            self.model_name = rag.remote_embedding_model
+            self.cache_key = self.model_name
+            self.embedding_dim = rag.remote_embedding_dim
+            self._apply_dimensions()
+            self.client = RemoteEmbeddingClient(
+                rag.remote_embedding_base_url,
+                api_key,
+                self.model_name,
+                dimensions=self.dimensions,
+                request_tokens=rag.remote_embedding_request_tokens,
+                request_inputs=rag.remote_embedding_request_inputs,
+                concurrency=rag.remote_embedding_concurrency,
+                tokens_per_minute=rag.remote_embedding_tokens_per_minute,
+                requests_per_minute=rag.remote_embedding_requests_per_minute,
+                max_retries=rag.remote_embedding_max_retries,
+                timeout_seconds=rag.remote_embedding_timeout_seconds,
+            )
+            logger.info("Using OpenAI embedding provider", model_name=self.model_name, embedding_dim=self.embedding_dim, base_url=rag.remote_embedding_base_url)
         else:
             raise ValueError(f"Unsupported embedding provider: {provider_name}")
 
+    def _apply_dimensions(self):
+        """Applies 'rag.embedding_dimensions'. Truncated vectors get their own cache key and chunk hashes."""
+        self.dimensions = ai_settings.rag.embedding_dimensions
+        if not self.dimensions or self.dimensions == self.embedding_dim:
+            self.dimensions = None
+            return
+        if self.dimensions > self.embedding_dim:
+            raise ValueError(
+                f"rag.embedding_dimensions ({self.dimensions}) exceeds the native size of '{self.model_name}' ({self.embedding_dim})."
+            )
+        self.embedding_dim = self.dimensions
+        self.cache_key = f"{self.cache_key}@{self.dimensions}"
+
+    def _load_onnx_model(self):
+        """
+        Loads the configured model through ONNX Runtime on the CPU. When a quantization target is
+        configured, a dynamically int8-quantized export is created once and reused from the cache.
+        """
+        try:
+            import onnxruntime as ort
+            from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+        except ImportError:
+            raise ImportError("The ONNX backend requires extra packages. Please run 'pip install -e .[indexing-onnx]'")
+
+        session_options = ort.SessionOptions()
+        session_options.intra_op_num_threads = ai_settings.rag.embedding_num_threads or os.cpu_count() or 1
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        model_kwargs = {"provider": "CPUExecutionProvider", "session_options": session_options}
+
+        quantization = ai_settings.rag.embedding_onnx_quantization
+        if not quantization:
+            return SentenceTransformer(self.model_name, backend="onnx", model_kwargs=model_kwargs)
+
+        file_name = f"onnx/model_qint8_{quantization}.onnx"
+        self.cache_key = f"{self.model_name}#onnx-qint8-{quantization}"
+        export_dir = Path(ai_settings.rag.embedding_onnx_cache_dir).expanduser() / re.sub(r'[^a-zA-Z0-9_.-]', '_', self.model_name)
+        if not (export_dir / file_name).exists():
+            logger.info("Exporting int8-quantized ONNX model. This happens once per model.", export_dir=str(export_dir), quantization=quantization)
+            fp32_model = SentenceTransformer(self.model_name, backend="onnx", model_kwargs=model_kwargs)
+            fp32_model.save(str(export_dir))
+            export_dynamic_quantized_onnx_model(fp32_model, quantization, str(export_dir))
+        return SentenceTransformer(str(export_dir), backend="onnx", model_kwargs={**model_kwargs, "file_name": file_name})
+
+    def _encode_local(self, texts: List[str]) -> List[List[float]]:
+        """
+        Encodes texts in length-bucketed batches under a padded-token budget and returns the
+        vectors in input order. A fixed batch count pads every short docstring to the longest
+        chunk beside it; bucketing keeps the padding, and the wasted compute, small.
+        """
+        max_tokens = getattr(self.model, "max_seq_length", None)
+        lengths = [min(estimate_tokens(t), max_tokens) if max_tokens else estimate_tokens(t) for t in texts]
+        batches = plan_token_batches(lengths, ai_settings.rag.embedding_batch_token_budget, ai_settings.rag.embedding_max_batch_size)
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        started = time.perf_counter()
+        for batch in batches:
+            batch_started = time.perf_counter()
+            embeddings = self.model.encode([texts[i] for i in batch], batch_size=len(batch), show_progress_bar=False)
+            elapsed = time.perf_counter() - batch_started
+            for i, emb in zip(batch, embeddings):
+                vectors[i] = truncate_embedding(emb.tolist(), self.dimensions)
+            tokens = sum(lengths[i] for i in batch)
+            logger.debug(
+                "Embedded batch",
+                texts=len(batch),
+                tokens=tokens,
+                padded_tokens=len(batch) * lengths[batch[0]],
+                texts_per_second=round(len(batch) / elapsed, 1) if elapsed else None,
+                tokens_per_second=round(tokens / elapsed) if elapsed else None,
+            )
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "Embedded texts",
+            texts=len(texts),
+            batches=len(batches),
+            texts_per_second=round(len(texts) / elapsed, 1) if elapsed else None,
+            tokens_per_second=round(sum(lengths) / elapsed) if elapsed else None,
+        )
+        return vectors
+
     def get_embeddings(self, texts: List[str]) -> List[List[float]]:
         if not texts: return []
         
         if self.provider_name == "local":
-            return [emb.tolist() for emb in self.model.encode(texts, show_progress_bar=True)]
+            return self._encode_local(texts)
         elif self.provider_name == "openai":
-            response = self.client.embeddings.create(input=texts, model=self.model_name)
-            return [item.embedding for item in response.data]
+            return self.client.embed(texts)
         return []
 
+PARITY_SAMPLE_TEXTS = (
+    "def calculate_hash(file_path):\n    hasher = hashlib.sha256()\n    return hasher.hexdigest()",
+    "class Indexer:\n    \"\"\"Scans a project, chunks source files and stores embeddings.\"\"\"",
+    "# Installation\n\nRun `pip install -e .[indexing]` to install the indexing dependencies.",
+    "rag:\n  embedding_model_name: 'BAAI/bge-large-en-v1.5'\n  enable_reranking: true",
+)
+
+def check_backend_parity(backend: str, texts: Optional[List[str]] = None) -> Dict[str, float]:
+    """
+    Embeds the same texts with the reference torch backend and with `backend`, and reports the
+    cosine similarity between corresponding vectors. A quantized backend is only safe to use for an
+    existing index when the minimum similarity stays above 'rag.embedding_parity_threshold'.
+    """
+    texts = list(texts or PARITY_SAMPLE_TEXTS)
+    reference = EmbeddingProvider("local", backend="torch").get_embeddings(texts)
+    candidate = EmbeddingProvider("local", backend=backend).get_embeddings(texts)
+    similarities = []
+    for ref, cand in zip(reference, candidate):
+        dot = sum(a * b for a, b in zip(ref, cand))
+        norm = (sum(a * a for a in ref) ** 0.5) * (sum(b * b for b in cand) ** 0.5)
+        similarities.append(dot / norm if norm else 0.0)
+    return {
+        "min_cosine": min(similarities),
+        "mean_cosine": sum(similarities) / len(similarities),
+        "threshold": ai_settings.rag.embedding_parity_threshold,
+        "samples": len(similarities),
+    }
+
 class Indexer:
     def __init__(
         self,
         project_root: Path,
         branch_override: Optional[str] = None,
-        embedding_provider: str = "local",
+        embedding_provider: Union[str, EmbeddingProvider] = "local",
         database_url_override: Optional[str] = None,
+        workers: Optional[int] = None,
     ):
         self.project_root = project_root
+        # --- Hashing and chunking run in a process pool when more than one worker is requested ---
+        self.workers = max(1, workers or ai_settings.rag.indexer_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
         self.staging_path = project_root / ai_settings.rag.local_index_path
         self.state_path = self.staging_path / "state.json"
         self.manifest_path = self.staging_path / "index_manifest.json"
+        self.checkpoint_path = self.staging_path / "checkpoint.json"
+        self.snapshot_dir = self.staging_path / "snapshot"
+        self.snapshot_archive_path = self.staging_path / "snapshot.tar.gz"
         self.staging_path.mkdir(exist_ok=True)
 
-        db_url = database_url_override or ai_settings.rag.database_url
-        if not db_url:
-            raise ValueError("DATABASE_URL is not configured via command-line, settings, or environment variables.")
-                
-        # --- Configure the engine for connection pooling and resilience ---
-        self.engine = create_engine(
-            db_url,
-            pool_size=5,          # Maintain a pool of 5 connections
-            max_overflow=10,      # Allow 10 more connections under heavy load
-            pool_recycle=1800,    # Recycle connections after 30 minutes (1800s)
-            pool_pre_ping=True
-        )       
+        # --- 'local' keeps the whole index under local_index_path; no database server is involved ---
+        self.index_backend = ai_settings.rag.index_backend
+        self.engine = None
+        if self.index_backend == "postgres":
+            db_url = database_url_override or ai_settings.rag.database_url
+            if not db_url:
+                raise ValueError("DATABASE_URL is not configured via command-line, settings, or environment variables.")
+
+            # --- Configure the engine for connection pooling and resilience ---
+            self.engine = create_engine(
+                db_url,
+                pool_size=5,          # Maintain a pool of 5 connections
+                max_overflow=10,      # Allow 10 more connections under heavy load
+                pool_recycle=1800,    # Recycle connections after 30 minutes (1800s)
+                pool_pre_ping=True
+            )
          
-        if embedding_provider != "local":
-            raise ValueError("FATAL: The indexer only supports 'local' embedding provider for production RAG.")
-        
-        self.active_provider = EmbeddingProvider(embedding_provider)
-        logger.info(f"Successfully initialized '{embedding_provider}' as the embedding provider.")
+        if isinstance(embedding_provider, str):
+            self.active_provider = EmbeddingProvider(embedding_provider)
+        else:
+            # A ready-made provider with the same interface, e.g. a stub model for benchmarks.
+            self.active_provider = embedding_provider
+        logger.info(f"Successfully initialized '{self.active_provider.provider_name}' as the embedding provider.")
             
         # --- Get the project name from the environment, default to repo name ---
         project_name = os.getenv("PROJECT_NAME", self.project_root.name)
@@ -126,19 +354,74 @@ class Indexer:
         
         logger.info("Indexer targeting database table", table_name=self.table_name)
 
-        self.table = table(
-            self.table_name,
-            column("id", String),
+        # --- halfvec stores float16 components: half the heap and HNSW footprint of VECTOR ---
+        self.vector_storage_type = ai_settings.rag.vector_storage_type
+        self.vector_sql_type = f"{self.vector_storage_type}({self.active_provider.embedding_dim})"
+
+        # --- With the shared store, 'table_name' becomes a view over this branch's chunk references ---
+        self.shared_chunk_store = ai_settings.rag.shared_chunk_store
+        self.project_prefix = f"{ai_settings.rag.collection_name}_{sanitized_project}"
+        self.chunks_table_name = self._index_name("chunks", self.project_prefix)
+        self.branches_table_name = self._index_name("branches", self.project_prefix)
+        self.members_table_name = self._index_name("members")
+        self.chunks_table = table(
+            self.chunks_table_name,
+            column("chunk_hash", TEXT),
             column("content", TEXT),
-            column("metadata", JSON),
-            column("embedding", VECTOR(self.active_provider.embedding_dim))
+            column("embedding", self._vector_column_type()),
         )
+        self._set_write_table(self.members_table_name if self.shared_chunk_store else self.table_name)
 
+        self.store: Optional[IndexStore] = None
+        if self.index_backend == "local":
+            if self.shared_chunk_store:
+                raise ValueError("rag.shared_chunk_store requires the 'postgres' index backend.")
+            self.store = LocalVectorStore(
+                self.staging_path / "store" / self.table_name,
+                self.active_provider.embedding_dim,
+                self.vector_storage_type,
+                hnsw_m=ai_settings.rag.hnsw_m,
+                hnsw_ef_construction=ai_settings.rag.hnsw_ef_construction,
+            )
+
+        # --- 'sqlite' keeps per-file state in state.sqlite; state.json is then only an export of it ---
+        self.state_store = (
+            SQLiteStateStore(self.staging_path / "state.sqlite", self.state_path)
+            if ai_settings.rag.state_backend == "sqlite" else None
+        )
         self.state = self._load_state()
+        # Recorded in the state entries of the files this run writes.
+        self._run_commit_sha: Optional[str] = None
+        self.embedding_cache = (
+            EmbeddingCache(self.staging_path / ai_settings.rag.embedding_cache_filename)
+            if ai_settings.rag.enable_embedding_cache else None
+        )
+        # Paths that failed to hash, chunk or sync this run; recorded in the manifest so the next
+        # git-incremental run revisits them even though git reports no change.
+        self._failed_paths: set = set()
+        self.bulk_sync = ai_settings.rag.bulk_sync
+        self._run_completed = False
+        # Table DDL runs once per instance; long-lived instances (watch mode) skip it on later runs.
+        self._database_ready = False
+        # --- Progress cursor for resumable runs; see _write_checkpoint ---
+        self._checkpoint: Optional[Dict[str, Any]] = None
+        # Set by export_snapshot; recorded in the manifest and used by the uploader.
+        self._snapshot_info: Optional[Dict[str, Any]] = None
+        # Merkle tree of the last completed run and its leaves' content hashes; see _build_merkle_tree.
+        self._merkle_tree: Optional[Dict[str, Any]] = None
+        self._merkle_content_hashes: Dict[str, str] = {}
+        self._forced_run = False
+        self._files_since_checkpoint = 0
+        self._last_checkpoint_at = time.monotonic()
         self.ignore_patterns = self._load_ignore_patterns()
+        self.ignore_matcher = IgnoreMatcher(self.project_root, self.ignore_patterns, ai_settings.rag.ignore_file_names)
+        # Jobs for 'ai-index --worker' processes; one queue per branch table.
+        self.work_queue = IndexWorkQueue(self.engine, self._index_name("queue"))
         self._init_database()
 
     def _init_database(self):
+        if self.store is not None:
+            return
         try:
             with self.engine.connect() as conn:
                 conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
@@ -148,92 +431,480 @@ class Indexer:
             logger.critical("Failed to connect to the database or enable vector extension.", error=str(e))
             raise
 
-    def _setup_database_table(self):
-        create_table_sql = text(f"""
-            CREATE TABLE IF NOT EXISTS {self.table_name} (
-                id VARCHAR(1024) PRIMARY KEY,
+    def _vector_column_type(self):
+        vector_type = HALFVEC if self.vector_storage_type == "halfvec" else VECTOR
+        return vector_type(self.active_provider.embedding_dim)
+
+    def _index_name(self, suffix: str, table_name: Optional[str] = None) -> str:
+        """
+        Deterministic index name within PostgreSQL's 63-byte identifier limit. Suffixes too long to
+        fit are cut at 63 bytes, exactly as PostgreSQL truncated them when they were created, so
+        existing indexes keep their names. The hash of the full table name keeps them unique.
+        """
+        table_name = table_name or self.table_name
+        digest = hashlib.sha1(table_name.encode('utf-8')).hexdigest()[:8]
+        return f"{table_name[:40]}_{digest}_{suffix}".encode('utf-8')[:63].decode('utf-8', 'ignore')
+
+    def _existing_vector_type(self, conn, table_name: Optional[str] = None) -> Optional[str]:
+        """The declared type of the table's embedding column, e.g. 'vector(1024)', or None if the table is new."""
+        return conn.execute(text("""
+            SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+            WHERE attrelid = to_regclass(:table_name) AND attname = 'embedding' AND NOT attisdropped;
+        """), {"table_name": table_name or self.table_name}).scalar()
+
+    @staticmethod
+    def _relation_kind(conn, name: str) -> Optional[str]:
+        """pg_class.relkind of `name` ('r' table, 'v' view), or None if it does not exist."""
+        return conn.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": name}
+        ).scalar()
+
+    def _drop_relation_for_mode_switch(self, kind: str, force_reindex: bool):
+        """The branch name is a table in per-branch mode and a view with the shared store; switching needs a rebuild."""
+        if not force_reindex:
+            raise ValueError(
+                f"'{self.table_name}' was built {'without' if kind == 'r' else 'with'} the shared chunk store. "
+                f"Re-run with --force-reindex to rebuild it for the current 'rag.shared_chunk_store' setting."
+            )
+        logger.warning("Switching storage layout; dropping the branch relation.", relation=self.table_name)
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP {'TABLE' if kind == 'r' else 'VIEW'} {self.table_name};"))
+            if kind == 'v':
+                # The view's reference table goes too, so nothing of the shared layout stays attached to this branch.
+                conn.execute(text(f"DROP TABLE IF EXISTS {self.members_table_name};"))
+                if self._relation_kind(conn, self.branches_table_name) == 'r':
+                    conn.execute(text(f"DELETE FROM {self.branches_table_name} WHERE branch = :branch"), {"branch": self.branch})
+
+    def _create_table_sql(self, table_name: str):
+        return text(f"""
+            CREATE TABLE IF NOT EXISTS {table_name} (
+                id VARCHAR(1024),
                 content TEXT NOT NULL,
                 metadata JSONB,
-                embedding VECTOR({self.active_provider.embedding_dim})
+                embedding {self.vector_sql_type},
+                source TEXT,
+                chunk_hash TEXT,
+                language TEXT,
+                CONSTRAINT {self._index_name('pkey', table_name)} PRIMARY KEY (id)
             );
         """)
-        
-        create_index_sql = text(f"""
-            CREATE INDEX ON {self.table_name} USING hnsw (embedding vector_cosine_ops);
+
+    def _create_index_sql(self, table_name: str) -> List[Any]:
+        """Secondary indexes of a chunk table: btree lookups by column, then the HNSW graph."""
+        statements = [
+            text(f"CREATE INDEX IF NOT EXISTS {self._index_name(name + '_idx', table_name)} ON {table_name} ({name});")
+            for name in ("source", "chunk_hash", "language")
+        ]
+        statements.append(text(f"""
+            CREATE INDEX IF NOT EXISTS {self._index_name('hnsw_idx', table_name)} ON {table_name}
+            USING hnsw (embedding {self.vector_storage_type}_cosine_ops)
+            WITH (m = {ai_settings.rag.hnsw_m}, ef_construction = {ai_settings.rag.hnsw_ef_construction});
+        """))
+        return statements
+
+    def _drop_legacy_hnsw_indexes(self, conn, table_name: str) -> List[str]:
+        """
+        Drops HNSW indexes on `table_name` other than the named one. Older versions created an
+        unnamed HNSW index on every run, and each extra graph is maintained on every insert.
+        """
+        stale = conn.execute(text("""
+            SELECT indexname FROM pg_indexes
+            WHERE schemaname = current_schema() AND tablename = :table_name
+              AND indexdef ILIKE '%USING hnsw%' AND indexname <> :keep;
+        """), {"table_name": table_name, "keep": self._index_name('hnsw_idx', table_name)}).scalars().all()
+        for index_name in stale:
+            conn.execute(text(f'DROP INDEX IF EXISTS "{index_name}";'))
+        if stale:
+            logger.info("Dropped legacy HNSW indexes.", table=table_name, indexes=stale)
+        return stale
+
+    @staticmethod
+    def _apply_index_build_settings(conn):
+        """Transaction-local memory and parallelism for index builds."""
+        if ai_settings.rag.index_build_maintenance_work_mem:
+            conn.execute(text("SELECT set_config('maintenance_work_mem', :value, true)"),
+                         {"value": ai_settings.rag.index_build_maintenance_work_mem})
+        if ai_settings.rag.index_build_parallel_workers is not None:
+            conn.execute(text("SELECT set_config('max_parallel_maintenance_workers', :value, true)"),
+                         {"value": str(ai_settings.rag.index_build_parallel_workers)})
+
+    def _setup_database_table(self, force_reindex: bool = False):
+        if self.store is not None:
+            return self.store.setup(reset=force_reindex)
+        if self.shared_chunk_store:
+            return self._setup_shared_chunk_store(force_reindex)
+        with self.engine.connect() as conn:
+            kind = self._relation_kind(conn, self.table_name)
+        if kind == 'v':
+            self._drop_relation_for_mode_switch(kind, force_reindex)
+        with self.engine.connect() as conn:
+            existing_type = self._existing_vector_type(conn)
+        if existing_type and existing_type != self.vector_sql_type:
+            # Vectors of another size or precision cannot be compared with new ones; the table must be rebuilt.
+            if not force_reindex:
+                raise ValueError(
+                    f"Table '{self.table_name}' stores {existing_type} embeddings but the configuration requires "
+                    f"{self.vector_sql_type}. Re-run with --force-reindex to rebuild it."
+                )
+            # A forced run always rebuilds into a fresh table, which replaces this one when it is done.
+            logger.warning("Embedding column type changed; the table will be rebuilt.",
+                           table=self.table_name, old=existing_type, new=self.vector_sql_type)
+            return
+
+        # Tables created before the dedicated columns existed are migrated in place:
+        # adding nullable columns is metadata-only, and the backfill touches only rows still missing them.
+        migrate_columns_sql = [
+            text(f"ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS {name} TEXT;")
+            for name in ("source", "chunk_hash", "language")
+        ]
+        backfill_sql = text(f"""
+            UPDATE {self.table_name}
+            SET source = metadata->>'source',
+                chunk_hash = metadata->>'chunk_hash',
+                language = metadata->>'language'
+            WHERE source IS NULL;
         """)
         
         try:
             with self.engine.begin() as conn:
-                conn.execute(create_table_sql)
-                # We wrap the index creation in its own try/except block
-                # to gracefully handle the case where it already exists.
-                try:
-                    conn.execute(create_index_sql)
-                    logger.info("Successfully created HNSW index.", table=self.table_name)
-                except Exception as e:
-                    # Check if the error is because the index already exists
-                    if "already exists" in str(e):
-                        logger.info("HNSW index already exists, skipping creation.", table=self.table_name)
-                    else:
-                        # If it's a different error, we should raise it
-                        raise
-            logger.info("Database table and HNSW index are ready.", table=self.table_name)
+                conn.execute(self._create_table_sql(self.table_name))
+                for statement in migrate_columns_sql:
+                    conn.execute(statement)
+                backfilled = conn.execute(backfill_sql).rowcount
+                if backfilled:
+                    logger.info("Backfilled dedicated columns from JSONB metadata.", table=self.table_name, rows=backfilled)
+                self._drop_legacy_hnsw_indexes(conn, self.table_name)
+                self._apply_index_build_settings(conn)
+                for statement in self._create_index_sql(self.table_name):
+                    conn.execute(statement)
+            logger.info("Database table, btree indexes and HNSW index are ready.", table=self.table_name)
         except Exception as e:
             logger.critical("Failed to create database table or index.", table=self.table_name, error=str(e))
             raise
-        
-    def _load_state(self) -> Dict[str, str]:
+
+    def _setup_shared_chunk_store(self, force_reindex: bool):
+        """
+        Creates the project-wide chunk table, this branch's reference table, the compatibility view
+        and the branch registry. Chunks are keyed by content hash, so branches that share files
+        share rows, and the HNSW graph is built once per project instead of once per branch.
+        """
+        with self.engine.connect() as conn:
+            kind = self._relation_kind(conn, self.table_name)
+            existing_type = self._existing_vector_type(conn, self.chunks_table_name)
+        if existing_type and existing_type != self.vector_sql_type:
+            # Other branches depend on the shared table, so a single run must not rebuild it.
+            raise ValueError(
+                f"Shared chunk table '{self.chunks_table_name}' stores {existing_type} embeddings but the configuration "
+                f"requires {self.vector_sql_type}. Use a different 'rag.collection_name' for the new layout."
+            )
+        if kind == 'r':
+            self._drop_relation_for_mode_switch(kind, force_reindex)
+
+        try:
+            with self.engine.begin() as conn:
+                # Branches of one project may be indexed concurrently; serialize their DDL.
+                conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": self.chunks_table_name})
+                conn.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {self.chunks_table_name} (
+                        chunk_hash TEXT PRIMARY KEY,
+                        content TEXT NOT NULL,
+                        embedding {self.vector_sql_type}
+                    );
+                """))
+                conn.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {self.members_table_name} (
+                        id VARCHAR(1024) PRIMARY KEY,
+                        metadata JSONB,
+                        source TEXT,
+                        chunk_hash TEXT NOT NULL,
+                        language TEXT
+                    );
+                """))
+                self._rename_legacy_member_indexes(conn)
+                for name in ("source", "chunk_hash", "language"):
+                    conn.execute(text(
+                        f"CREATE INDEX IF NOT EXISTS {self._index_name(name + '_idx', self.members_table_name)} "
+                        f"ON {self.members_table_name} ({name});"
+                    ))
+                self._apply_index_build_settings(conn)
+                conn.execute(text(f"""
+                    CREATE INDEX IF NOT EXISTS {self._index_name('chunks_hnsw_idx', self.project_prefix)} ON {self.chunks_table_name}
+                    USING hnsw (embedding {self.vector_storage_type}_cosine_ops)
+                    WITH (m = {ai_settings.rag.hnsw_m}, ef_construction = {ai_settings.rag.hnsw_ef_construction});
+                """))
+                # Readers keep querying the branch name with the same columns as a per-branch table.
+                conn.execute(text(f"""
+                    CREATE OR REPLACE VIEW {self.table_name} AS
+                    SELECT m.id, c.content, m.metadata, c.embedding, m.source, m.chunk_hash, m.language
+                    FROM {self.members_table_name} m JOIN {self.chunks_table_name} c USING (chunk_hash);
+                """))
+                conn.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {self.branches_table_name} (
+                        branch TEXT PRIMARY KEY,
+                        members_table TEXT NOT NULL,
+                        updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                    );
+                """))
+                conn.execute(text(f"""
+                    INSERT INTO {self.branches_table_name} (branch, members_table) VALUES (:branch, :members_table)
+                    ON CONFLICT (branch) DO UPDATE SET members_table = EXCLUDED.members_table, updated_at = now();
+                """), {"branch": self.branch, "members_table": self.members_table_name})
+            logger.info("Shared chunk store is ready.", chunks_table=self.chunks_table_name, branch_table=self.members_table_name)
+        except Exception as e:
+            logger.critical("Failed to set up the shared chunk store.", table=self.chunks_table_name, error=str(e))
+            raise
+
+    def _rename_legacy_member_indexes(self, conn):
+        """
+        Older versions named the reference table's indexes like the per-branch table's, which
+        blocked those names after a switch back. Renaming keeps the built indexes.
+        """
+        legacy = {self._index_name(name + '_idx'): self._index_name(name + '_idx', self.members_table_name)
+                  for name in ("source", "chunk_hash", "language")}
+        found = conn.execute(text("""
+            SELECT indexname FROM pg_indexes
+            WHERE schemaname = current_schema() AND tablename = :table_name AND indexname = ANY(:names);
+        """), {"table_name": self.members_table_name, "names": list(legacy)}).scalars().all()
+        for name in found:
+            conn.execute(text(f'ALTER INDEX "{name}" RENAME TO "{legacy[name]}";'))
+
+    def prune_shared_chunks(self) -> int:
+        """
+        Deletes shared chunks that no registered branch references any more, e.g. after files
+        changed or branch tables were dropped. Returns the number of chunks removed. Syncs hold
+        the same advisory lock in shared mode while they insert chunks and their member rows, so
+        the exclusive lock here waits for them and never sees a chunk whose member is uncommitted.
+        """
+        with self.engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": self.chunks_table_name})
+            registered = conn.execute(text(f"SELECT branch, members_table FROM {self.branches_table_name}")).all()
+            live_tables = []
+            for branch, members_table in registered:
+                if self._relation_kind(conn, members_table) == 'r':
+                    live_tables.append(members_table)
+                else:
+                    conn.execute(text(f"DELETE FROM {self.branches_table_name} WHERE branch = :branch"), {"branch": branch})
+            referenced = " AND ".join(
+                f"NOT EXISTS (SELECT 1 FROM {name} m WHERE m.chunk_hash = c.chunk_hash)" for name in live_tables
+            ) or "TRUE"
+            pruned = conn.execute(text(f"DELETE FROM {self.chunks_table_name} c WHERE {referenced}")).rowcount
+        logger.info("Pruned unreferenced shared chunks.", chunks=pruned, branches=len(live_tables))
+        return pruned
+
+    def _should_defer_index_build(self, force_reindex: bool, files_to_index: List[Tuple[Path, Dict[str, Any]]]) -> bool:
+        """
+        A load is treated as bulk when it rewrites a large share of the index. Inserting row by row
+        into a live HNSW graph is far slower than building the graph once over the loaded table.
+        """
+        if self.shared_chunk_store or self.store is not None:
+            # The HNSW graph lives on the shared chunk table; branch tables only carry btree indexes.
+            # The local store updates its in-memory graph and saves it once per run.
+            return False
+        if force_reindex:
+            # Also replaces tables whose embedding column no longer matches the configuration.
+            return True
+        ratio = ai_settings.rag.deferred_index_build_ratio
+        if not ratio or not files_to_index:
+            return False
+        changed = {str(file_path.relative_to(self.project_root)) for file_path, _ in files_to_index}
+        return len(changed) >= ratio * len(changed | set(self.state))
+
+    def _begin_bulk_load(self, force_reindex: bool, files_to_index: List[Tuple[Path, Dict[str, Any]]]):
+        """
+        Creates an index-less build table and points all writes at it. Unless this is a forced
+        rebuild, rows of files that are not being re-indexed are carried over from the live table.
+        """
+        build_table = self._index_name("build")
+        with self.engine.begin() as conn:
+            # Leftovers of an interrupted bulk load are discarded; that run never swapped them in.
+            conn.execute(text(f"DROP TABLE IF EXISTS {build_table};"))
+            conn.execute(self._create_table_sql(build_table))
+            if not force_reindex:
+                sources = sorted(str(file_path.relative_to(self.project_root)) for file_path, _ in files_to_index)
+                carried = conn.execute(
+                    text(f"INSERT INTO {build_table} ({_ROW_COLUMNS}) SELECT {_ROW_COLUMNS} FROM {self.table_name} "
+                         f"WHERE NOT (source = ANY(:sources))"),
+                    {"sources": sources},
+                ).rowcount
+                logger.info("Carried unchanged rows into the build table.", rows=carried)
+        self._set_write_table(build_table)
+        logger.info("Bulk load detected; indexes will be built after loading.", build_table=build_table)
+
+    def _finish_bulk_load(self):
+        """
+        Builds all indexes over the loaded table with the configured HNSW and maintenance settings,
+        then swaps it in for the live table in one transaction. Readers block only for the rename
+        and never observe a partially built index.
+        """
+        build_table = self.write_table_name
+        logger.info("Building indexes on loaded table.", table=build_table, m=ai_settings.rag.hnsw_m,
+                    ef_construction=ai_settings.rag.hnsw_ef_construction)
+        with self.engine.begin() as conn:
+            self._apply_index_build_settings(conn)
+            for statement in self._create_index_sql(build_table):
+                conn.execute(statement)
+            conn.execute(text(f"ANALYZE {build_table};"))
+
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {self.table_name};"))
+            conn.execute(text(f"ALTER TABLE {build_table} RENAME TO {self.table_name};"))
+            for suffix in ("pkey", "source_idx", "chunk_hash_idx", "language_idx", "hnsw_idx"):
+                conn.execute(text(
+                    f"ALTER INDEX {self._index_name(suffix, build_table)} RENAME TO {self._index_name(suffix)};"
+                ))
+        self._set_write_table(self.table_name)
+        logger.info("Swapped freshly built table into place.", table=self.table_name)
+
+    def _abort_bulk_load(self):
+        build_table = self.write_table_name
+        self._set_write_table(self.table_name)
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE IF EXISTS {build_table};"))
+        except Exception as e:
+            logger.warning("Could not drop abandoned build table.", table=build_table, error=str(e))
+
+    def _set_write_table(self, table_name: str):
+        """Points inserts and deletes at `table_name`. Embedding reuse keeps reading the live table."""
+        self.write_table_name = table_name
+        if self.shared_chunk_store:
+            self.table = table(
+                table_name,
+                column("id", String),
+                column("metadata", JSON),
+                column("source", TEXT),
+                column("chunk_hash", TEXT),
+                column("language", TEXT),
+            )
+            return
+        self.table = table(
+            table_name,
+            column("id", String),
+            column("content", TEXT),
+            column("metadata", JSON),
+            column("embedding", self._vector_column_type()),
+            column("source", TEXT),
+            column("chunk_hash", TEXT),
+            column("language", TEXT),
+        )
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        if self.state_store is not None:
+            return self.state_store.load()
         if self.state_path.exists():
             with open(self.state_path, 'rb') as f:
-                return orjson.loads(f.read())
+                state = orjson.loads(f.read())
+            # Older state files map path -> hash. Upgrade them so the stat fast path can take over
+            # after one full hashing pass.
+            return {path: ({"hash": entry} if isinstance(entry, str) else entry) for path, entry in state.items()}
         return {}
 
     def _save_state(self):
+        """Persists the state. The SQLite store only upserts what changed; see `export_state` for state.json."""
+        if self.state_store is not None:
+            self.state_store.save(self.state)
+            return
         # --- Atomic write to prevent state file corruption ---
         temp_path = self.state_path.with_suffix('.tmp')
         with open(temp_path, 'wb') as f:
             f.write(orjson.dumps(self.state, option=orjson.OPT_INDENT_2))
         temp_path.replace(self.state_path)
 
+    def export_state(self):
+        """
+        Writes state.json from the SQLite store, if it changed since the last export. It is only
+        needed by readers of the file, i.e. the uploaded artifact and CI checks, so runs do not
+        export it themselves. With the JSON backend the file is always current.
+        """
+        if self.state_store is not None:
+            self.state_store.export_json()
+
+    @property
+    def checkpoints_enabled(self) -> bool:
+        return bool(ai_settings.rag.checkpoint_every_files or ai_settings.rag.checkpoint_interval_seconds)
+
+    def _load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """The cursor of an interrupted run, if it targets the same table and vector type as this one."""
+        if not self.checkpoint_path.exists():
+            return None
+        try:
+            with open(self.checkpoint_path, 'rb') as f:
+                checkpoint = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.warning("Ignoring unreadable checkpoint.", path=str(self.checkpoint_path), error=str(e))
+            return None
+        if checkpoint.get("table_name") != self.table_name or checkpoint.get("vector_sql_type") != self.vector_sql_type:
+            logger.warning("Ignoring checkpoint written for a different table or vector type.", checkpoint_table=checkpoint.get("table_name"))
+            return None
+        return checkpoint
+
+    def _write_checkpoint(self):
+        """
+        Atomically persists progress. Rows written to the live table are recorded straight in
+        state.json; during a bulk load the state describes the build table instead, so it is kept
+        in the checkpoint until the build table is swapped in.
+        """
+        checkpoint = {**self._checkpoint, "updated_at_utc": datetime.now(timezone.utc).isoformat()}
+        if checkpoint["bulk_load"]:
+            checkpoint["state"] = self.state
+        else:
+            self._save_state()
+        temp_path = self.checkpoint_path.with_suffix('.tmp')
+        with open(temp_path, 'wb') as f:
+            f.write(orjson.dumps(checkpoint))
+        temp_path.replace(self.checkpoint_path)
+        self._files_since_checkpoint = 0
+        self._last_checkpoint_at = time.monotonic()
+        logger.info("Checkpoint written.", files_indexed=len(self.state), bulk_load=checkpoint["bulk_load"])
+
+    def _maybe_checkpoint(self, files_synced: int):
+        """Called by the writer after each sync; the writer is the only thread mutating state meanwhile."""
+        if self._checkpoint is None:
+            return
+        self._files_since_checkpoint += files_synced
+        every_files = ai_settings.rag.checkpoint_every_files
+        interval = ai_settings.rag.checkpoint_interval_seconds
+        if (every_files and self._files_since_checkpoint >= every_files) or (
+            interval and time.monotonic() - self._last_checkpoint_at >= interval
+        ):
+            self._write_checkpoint()
+
     def _load_ignore_patterns(self) -> List[str]:
-        patterns = DEFAULT_IGNORE_PATTERNS
-        patterns.append(str(self.staging_path.relative_to(self.project_root)) + "/*")
-        ignore_file = self.project_root / ".aiignore"
-        if ignore_file.exists():
-            with open(ignore_file, 'r') as f:
-                patterns.extend([line.strip() for line in f if line.strip() and not line.startswith('#')])
-        return patterns
+        # Copy the defaults: appending to the module-level list would leak patterns across Indexer instances.
+        staging_rel = self.staging_path.relative_to(self.project_root).as_posix()
+        return [*DEFAULT_IGNORE_PATTERNS, f"/{staging_rel}/"]
+
+    def reload_ignore_rules(self):
+        """Re-reads ignore files on the next lookup, e.g. after a .gitignore was edited."""
+        self.ignore_matcher = IgnoreMatcher(self.project_root, self.ignore_patterns, ai_settings.rag.ignore_file_names)
 
     def _is_ignored(self, path: Path) -> bool:
-        rel_path_str = os.path.normpath(str(path.relative_to(self.project_root)))
-        for pattern in self.ignore_patterns:
-            norm_pattern = os.path.normpath(pattern)
-            if fnmatch.fnmatch(rel_path_str, norm_pattern) or (norm_pattern.endswith(os.sep) and (rel_path_str + os.sep).startswith(norm_pattern)):
-                return True
-        return False
+        return self.ignore_matcher.is_ignored(path.relative_to(self.project_root).as_posix(), is_dir=path.is_dir())
+
+    def _is_path_indexable(self, rel_path_str: str) -> bool:
+        """Applies the ignore rules to a single path and all of its parent directories, as `_walk_project` would."""
+        return not self.ignore_matcher.is_path_ignored(Path(rel_path_str).as_posix())
 
     def _walk_project(self) -> Generator[Path, None, None]:
-        for root, dirs, files in os.walk(self.project_root, topdown=True):
-            root_path = Path(root)
-            dirs[:] = [d for d in dirs if not self._is_ignored(root_path / d)]
-            for name in files:
-                file_path = root_path / name
-                if not self._is_ignored(file_path):
-                    yield file_path
+        return self.ignore_matcher.walk()
                         
     @staticmethod
-    def _calculate_hash(file_path: Path) -> str:
-        hasher = hashlib.sha256()
-        with open(file_path, 'rb') as f:
-            while buf := f.read(65536): hasher.update(buf)
-        return hasher.hexdigest()
+    def _stat_record(file_path: Path) -> Dict[str, int]:
+        st = file_path.stat()
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "inode": st.st_ino}
 
     @staticmethod
-    def _is_chunk_valid(chunk: str, min_length: int = 20) -> bool:
-        return len(chunk.strip()) >= min_length and (len(chunk.strip()) / len(chunk)) > 0.5 and '\x00' not in chunk
+    def _stat_unchanged(entry: Dict[str, Any], stat_record: Dict[str, int]) -> bool:
+        return all(entry.get(key) == value for key, value in stat_record.items())
 
-    def _extract_file_metadata(self, file_path: Path) -> Dict[str, Any]:
-        rel_path_str = str(file_path.relative_to(self.project_root))
+    @staticmethod
+    def _calculate_hash(file_path: Path) -> Tuple[Optional[str], Optional[str]]:
+        """(hash, None) for an indexable file; (None, reason) for one too large or not text."""
+        return file_sniffer.sniff_and_hash(file_path, ai_settings.rag.index_max_file_bytes, ai_settings.rag.index_mmap_threshold_bytes)
+
+    @staticmethod
+    def _extract_file_metadata(project_root: Path, file_path: Path) -> Dict[str, Any]:
+        rel_path_str = str(file_path.relative_to(project_root))
         service_match = re.search(r'src/(?:services/)?([^/]+)/', rel_path_str)
         return {
             'language': LANGUAGE_MAP.get(file_path.suffix.lower(), 'unknown'),
@@ -241,127 +912,654 @@ class Indexer:
             'service_name': service_match.group(1) if service_match else 'unknown'
         }
 
-    def _chunk_file(self, text: str, file_path: Path) -> List[Dict[str, Any]]:
-        chunks_with_metadata = []
-        if file_path.suffix.lower() == '.py':
+    @staticmethod
+    def _chunk_file(text: str, file_path: Path) -> List[Dict[str, Any]]:
+        return chunk_file(text, file_path, ai_settings.rag.chunk_max_tokens, LANGUAGE_MAP.get(file_path.suffix.lower()))
+
+    @staticmethod
+    def _chunk_hash(model_name: str, chunk_text: str) -> str:
+        """Content address of a chunk's embedding: identical text under the same model yields the same vector."""
+        return hashlib.sha256(f"{model_name}\0{chunk_text}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _build_file_chunks(project_root: Path, file_path: Path, model_name: str) -> List[Dict[str, Any]]:
+        rel_path_str = str(file_path.relative_to(project_root))
+        content = file_sniffer.read_text(file_path, ai_settings.rag.index_mmap_threshold_bytes)
+        file_metadata = Indexer._extract_file_metadata(project_root, file_path)
+        chunks = []
+        for i, chunk_data in enumerate(Indexer._chunk_file(content, file_path)):
+            chunk_metadata = dict(chunk_data['metadata'])
+            parent_index = chunk_metadata.pop('parent_index', None)
+            if parent_index is not None:
+                chunk_metadata['parent_id'] = f"{rel_path_str}:{parent_index}"
+            final_metadata = {
+                "source": rel_path_str,
+                "chunk_index": i,
+                "chunk_hash": Indexer._chunk_hash(model_name, chunk_data['text']),
+                **file_metadata,
+                **chunk_metadata,
+            }
+            chunks.append({"id": f"{rel_path_str}:{i}", "document": chunk_data['text'], "metadata": final_metadata})
+        return chunks
+
+    def _map_files(self, func: Callable, items: List[Any]) -> Iterable[Any]:
+        """
+        Applies `func` to every item, fanning out to the process pool when one is active.
+        Results are always yielded in input order so chunk ids and state.json stay stable.
+        Only a bounded window of batches is in flight, so a slow consumer applies back-pressure
+        instead of letting finished results pile up in memory.
+        """
+        if self._executor is None:
+            yield from map(func, items)
+            return
+        chunksize = max(1, min(256, len(items) // (self.workers * 4)))
+        batches = (items[i:i + chunksize] for i in range(0, len(items), chunksize))
+        in_flight = deque()
+        for batch in batches:
+            in_flight.append(self._executor.submit(_apply_batch, func, batch))
+            if len(in_flight) >= self.workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+    def _find_modified_files(self, current_files: Dict[str, Path], paranoid: bool = False) -> List[Tuple[Path, Dict[str, Any]]]:
+        """
+        Returns (path, state entry) pairs for new or modified files.
+        Files whose (size, mtime_ns, inode) match the stored entry are trusted without re-hashing
+        unless `paranoid` is set.
+        """
+        files_to_hash = []
+        for rel_path_str, file_path in current_files.items():
             try:
-                tree = ast.parse(text)
-                source_lines = text.splitlines()
-                for node in ast.walk(tree):
-                    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-                        start_line = node.lineno - 1
-                        end_line = node.end_lineno or start_line + 1
-                        chunk_text = "\n".join(source_lines[start_line:end_line])
-                        if self._is_chunk_valid(chunk_text):
-                            chunks_with_metadata.append({
-                                "text": chunk_text,
-                                "metadata": {"entity_type": "class" if isinstance(node, ast.ClassDef) else "function", "name": node.name, "start_line": node.lineno, "end_line": end_line}
-                            })
-                if not chunks_with_metadata: raise SyntaxError("No functions/classes found")
-            except (SyntaxError, ValueError):
-                if self._is_chunk_valid(text):
-                    chunks_with_metadata = [{"text": text, "metadata": {"entity_type": "file", "name": file_path.name}}]
-        else:
-            chunk_size, overlap = 1000, 200
-            for i in range(0, len(text), chunk_size - overlap):
-                chunk_text = text[i:i+chunk_size]
-                if self._is_chunk_valid(chunk_text):
-                    chunks_with_metadata.append({"text": chunk_text, "metadata": {"entity_type": "file", "name": file_path.name}})
-        return chunks_with_metadata
-
-    def run(self, force_reindex: bool = False):
-        logger.info("Starting indexer", project_root=self.project_root, db_table=self.table_name)
+                stat_record = self._stat_record(file_path)
+            except OSError as e:
+                logger.error("Could not stat file, skipping.", file=rel_path_str, error=str(e))
+                continue
+            previous = self.state.get(rel_path_str)
+            if not paranoid and previous and self._stat_unchanged(previous, stat_record):
+                continue
+            files_to_hash.append((rel_path_str, file_path, stat_record))
+
+        logger.info("Change detection", total=len(current_files), stat_unchanged=len(current_files) - len(files_to_hash), to_hash=len(files_to_hash))
+
+        files_to_index, no_longer_indexable, skipped = [], [], {}
+        hash_results = self._map_files(_hash_file_task, [file_path for _, file_path, _ in files_to_hash])
+        for (rel_path_str, file_path, stat_record), (new_hash, skip_reason, error) in zip(files_to_hash, hash_results):
+            if error:
+                logger.error("Could not process file, skipping.", file=rel_path_str, error=error)
+                self._failed_paths.add(rel_path_str)
+                continue
+            if skip_reason:
+                # Not recorded in state, so it is sniffed again next run; that costs one block read.
+                skipped[skip_reason] = skipped.get(skip_reason, 0) + 1
+                if rel_path_str in self.state:
+                    no_longer_indexable.append(rel_path_str)
+                continue
+            entry = {"hash": new_hash, **stat_record}
+            if self.state.get(rel_path_str, {}).get("hash") == new_hash:
+                # Content is identical (e.g. touched or re-checked-out); only refresh the stat tuple.
+                self.state[rel_path_str] = {**self.state[rel_path_str], **entry}
+            else:
+                files_to_index.append((file_path, entry))
+        if skipped:
+            logger.info("Skipped files that are too large or not text", **skipped)
+        if no_longer_indexable:
+            logger.info("Removing files from the index that are no longer indexable", count=len(no_longer_indexable))
+            self._delete_sources(no_longer_indexable)
+            for rel_path_str in no_longer_indexable:
+                self.state.pop(rel_path_str)
+        return files_to_index
+
+    def run(
+        self,
+        force_reindex: bool = False,
+        paranoid: bool = False,
+        git_incremental: bool = False,
+        resume: bool = False,
+        changed_paths: Optional[Iterable[str]] = None,
+        upload_artifacts: bool = True,
+        distributed: bool = False,
+    ):
+        """
+        Brings the index up to date. By default every file is checked; `changed_paths` restricts
+        the run to those project-relative paths (missing ones are removed from the index), and
+        `git_incremental` derives them from git instead. With `distributed`, this process only
+        coordinates: changed files are queued for `ai-index --worker` processes to embed and write.
+        """
+        logger.info("Starting indexer", project_root=self.project_root, db_table=self.table_name, workers=self.workers)
+        if distributed and self.store is not None:
+            raise ValueError("--distributed requires the 'postgres' index backend.")
+        self._failed_paths = set()
+        self._run_completed = False
+        self._snapshot_info = None
+        self._forced_run = force_reindex
+        self._run_commit_sha = self._get_current_commit_sha()
         
         try:
-            self._setup_database_table()
+            if self.workers > 1:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+            checkpoint = self._load_checkpoint() if resume else None
+            if resume and checkpoint is None:
+                logger.warning("No usable checkpoint found; starting a regular run.")
+            elif checkpoint:
+                # The interrupted run's mode wins, so a forced rebuild is resumed as one.
+                force_reindex = checkpoint["force_reindex"]
+                logger.info("Resuming interrupted run.", started_at=checkpoint["started_at_utc"], bulk_load=checkpoint["bulk_load"])
+            elif self.checkpoint_path.exists():
+                logger.warning("Discarding checkpoint of an interrupted run. Pass --resume to continue it instead.")
+                self.checkpoint_path.unlink()
 
-            if force_reindex:
-                logger.warning("Forcing re-index of all files and clearing table.")
+            if force_reindex or not self._database_ready:
+                # A resumed forced run keeps what it already wrote; its checkpointed state describes it.
+                self._setup_database_table(force_reindex and not checkpoint)
+                self._database_ready = True
+
+            # Restored if a bulk load fails, because the live table it describes is left untouched.
+            previous_state = dict(self.state)
+            if checkpoint and checkpoint["bulk_load"]:
+                with self.engine.connect() as conn:
+                    if self._relation_kind(conn, checkpoint["write_table"]) != 'r':
+                        raise ValueError(f"Build table '{checkpoint['write_table']}' of the checkpoint no longer exists. Re-run without --resume.")
+                self.state = checkpoint["state"]
+                self._set_write_table(checkpoint["write_table"])
+            elif force_reindex and not checkpoint:
+                logger.warning("Forcing re-index of all files into a freshly built table.")
                 self.state = {}
-                with self.engine.begin() as conn:
-                    conn.execute(text(f"TRUNCATE TABLE {self.table_name};"))
+                if self.shared_chunk_store:
+                    # Only this branch's references are rebuilt; shared chunks stay reusable.
+                    with self.engine.begin() as conn:
+                        conn.execute(text(f"TRUNCATE TABLE {self.members_table_name};"))
+
+            git_changes = None
+            if changed_paths is not None and not force_reindex and not checkpoint:
+                git_changes = (set(changed_paths), set())
+            elif git_incremental and not force_reindex and not checkpoint:
+                git_changes = self._git_changed_paths(self._load_previous_manifest())
 
-            current_files = {str(p.relative_to(self.project_root)): p for p in self._walk_project()}
             indexed_files = set(self.state.keys())
-            deleted_files = indexed_files - set(current_files.keys())
+            if git_changes is None:
+                current_files = {str(p.relative_to(self.project_root)): p for p in self._walk_project()}
+                deleted_files = indexed_files - set(current_files.keys())
+            else:
+                changed_paths, removed_paths = git_changes
+                current_files = {}
+                for rel_path_str in sorted(changed_paths):
+                    file_path = self.project_root / rel_path_str
+                    if file_path.is_file() and self._is_path_indexable(rel_path_str):
+                        current_files[rel_path_str] = file_path
+                    else:
+                        removed_paths.add(rel_path_str)
+                deleted_files = removed_paths & indexed_files
             
             if deleted_files:
                 logger.info("Found orphaned files to remove from index", count=len(deleted_files))
-                with self.engine.begin() as conn:
-                    for file_path_str in deleted_files:
-                        conn.execute(text(f"DELETE FROM {self.table_name} WHERE metadata->>'source' = :file_path"), {"file_path": file_path_str})
-                        self.state.pop(file_path_str, None)
+                self._delete_sources(sorted(deleted_files))
+                for file_path_str in deleted_files:
+                    self.state.pop(file_path_str, None)
 
-            files_to_index = []
-            for rel_path_str, file_path in current_files.items():
-                try:
-                    new_hash = self._calculate_hash(file_path)
-                    if self.state.get(rel_path_str) != new_hash:
-                        files_to_index.append((file_path, new_hash))
-                except Exception as e:
-                    logger.error("Could not process file, skipping.", file=rel_path_str, error=str(e))
-            
-            if not files_to_index:
-                logger.info("No new or modified files to index. Project is up to date.")
+            files_to_index = self._find_modified_files(current_files, paranoid=paranoid)
+            if checkpoint:
+                bulk_load = checkpoint["bulk_load"]
             else:
-                logger.info("Found new or modified files to index", count=len(files_to_index))
-                self._process_files(files_to_index)
+                bulk_load = self._should_defer_index_build(force_reindex, files_to_index)
+                if bulk_load:
+                    self._begin_bulk_load(force_reindex, files_to_index)
+            if self.checkpoints_enabled:
+                self._checkpoint = {
+                    "table_name": self.table_name,
+                    "vector_sql_type": self.vector_sql_type,
+                    "write_table": self.write_table_name,
+                    "bulk_load": bulk_load,
+                    "force_reindex": force_reindex,
+                    "started_at_utc": checkpoint["started_at_utc"] if checkpoint else datetime.now(timezone.utc).isoformat(),
+                }
+            
+            try:
+                if not files_to_index:
+                    logger.info("No new or modified files to index. Project is up to date.")
+                else:
+                    logger.info("Found new or modified files to index", count=len(files_to_index))
+                    if distributed:
+                        self._process_files_distributed(files_to_index)
+                    else:
+                        self._process_files(files_to_index)
+                if bulk_load:
+                    self._finish_bulk_load()
+            except BaseException:
+                if self._checkpoint is not None:
+                    self._write_checkpoint()
+                    logger.warning("Run interrupted. Re-run with --resume to continue from the last checkpoint.")
+                if bulk_load:
+                    if self._checkpoint is not None:
+                        # The build table is kept for --resume; the live table is still intact.
+                        self._set_write_table(self.table_name)
+                    else:
+                        self._abort_bulk_load()
+                    self.state = previous_state
+                raise
+            self._run_completed = True
+            self._checkpoint = None
+            self.checkpoint_path.unlink(missing_ok=True)
+            if ai_settings.rag.export_snapshot:
+                self.export_snapshot()
 
         finally:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
             # This guarantees that our artifact files are always created.
             logger.info("Finalizing run: saving state and creating manifest.")
+            if self.store is not None:
+                self.store.flush()
             self._save_state()
             self._create_manifest()
             
             # Only attempt upload if the main logic didn't crash before OCI config was checked.
-            try:
-                self._upload_artifacts_to_oci()
-                logger.info("Indexing process and artifact upload complete.")
-            except Exception as e:
-                logger.critical("Artifact upload failed. The CI job should fail.", error=str(e))
-                # Re-raise the exception to ensure the CI step fails.
-                raise
+            if upload_artifacts:
+                try:
+                    self._upload_artifacts_to_oci()
+                    logger.info("Indexing process and artifact upload complete.")
+                except Exception as e:
+                    logger.critical("Artifact upload failed. The CI job should fail.", error=str(e))
+                    # Re-raise the exception to ensure the CI step fails.
+                    raise
             
-    def _process_files(self, files_to_process: List[tuple[Path, str]]):
-        chunks_by_file = defaultdict(list)
-        file_hashes_to_update = {}
+    @staticmethod
+    def _put_until_stopped(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
 
-        for file_path, new_hash in files_to_process:
-            rel_path_str = str(file_path.relative_to(self.project_root))
+    @staticmethod
+    def _get_until_stopped(q: queue.Queue, stop: threading.Event) -> Any:
+        while not stop.is_set():
             try:
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
-                file_metadata = self._extract_file_metadata(file_path)
-                for i, chunk_data in enumerate(self._chunk_file(content, file_path)):
-                    chunk_id = f"{rel_path_str}:{i}"
-                    final_metadata = {"source": rel_path_str, "chunk_index": i, **file_metadata, **chunk_data['metadata']}
-                    chunks_by_file[rel_path_str].append({"id": chunk_id, "document": chunk_data['text'], "metadata": final_metadata})
-                file_hashes_to_update[rel_path_str] = new_hash
-            except Exception as e:
-                logger.error("Error chunking file", file=rel_path_str, error=str(e))
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _PIPELINE_DONE
 
-        all_chunks = [chunk for chunks in chunks_by_file.values() for chunk in chunks]
-        if not all_chunks:
-            logger.warning("No valid chunks were produced from the files to be indexed.")
-            return
+    def _process_files(self, files_to_process: List[Tuple[Path, Dict[str, Any]]]):
+        """
+        Streams files through three concurrent stages: chunking (optionally in the process pool),
+        batched embedding, and per-file database upserts. The stages are connected by bounded
+        queues, so memory stays flat regardless of how many files changed and the database
+        starts receiving rows as soon as the first batch is embedded.
+        """
+        queue_depth = ai_settings.rag.indexer_queue_depth
+        batch_size = ai_settings.rag.embedding_pipeline_batch_size
+        chunk_queue: queue.Queue = queue.Queue(maxsize=queue_depth)
+        write_queue: queue.Queue = queue.Queue(maxsize=queue_depth)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        stats = {"files": 0, "chunks": 0, "batches": 0, "embedded": 0, "reused": 0}
 
-        logger.info("Generating embeddings for all new/modified chunks", count=len(all_chunks))
-        all_texts = [c['document'] for c in all_chunks]
-        all_embeddings = self.active_provider.get_embeddings(all_texts)
-        for chunk, embedding in zip(all_chunks, all_embeddings):
-            chunk['embedding'] = embedding
+        def produce_chunks():
+            try:
+                chunk_task = partial(_chunk_file_task, self.project_root, self.active_provider.cache_key)
+                chunk_results = self._map_files(chunk_task, [file_path for file_path, _ in files_to_process])
+                for (file_path, state_entry), (chunks, error) in zip(files_to_process, chunk_results):
+                    rel_path_str = str(file_path.relative_to(self.project_root))
+                    if error:
+                        logger.error("Error chunking file", file=rel_path_str, error=error)
+                        self._failed_paths.add(rel_path_str)
+                        continue
+                    state_entry = {**state_entry, "chunks": len(chunks)}
+                    if self._run_commit_sha:
+                        state_entry["commit"] = self._run_commit_sha
+                    if not self._put_until_stopped(chunk_queue, (rel_path_str, state_entry, chunks), stop):
+                        return
+                self._put_until_stopped(chunk_queue, _PIPELINE_DONE, stop)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
 
-        for rel_path_str, chunks in chunks_by_file.items():
-            logger.info("Syncing file to database", file=rel_path_str, chunks=len(chunks))
+        def write_files():
             try:
-                with self.engine.begin() as conn:
-                    conn.execute(text(f"DELETE FROM {self.table_name} WHERE metadata->>'source' = :file_path"), {"file_path": rel_path_str})
-                    if chunks:
-                        conn.execute(insert(self.table), [
-                            {"id": c['id'], "content": c['document'], "metadata": c['metadata'], "embedding": c['embedding']} for c in chunks
-                        ])
-                self.state[rel_path_str] = file_hashes_to_update[rel_path_str]
-            except Exception as e:
-                logger.error("Failed to sync file to database. Skipping.", file=rel_path_str, error=str(e))
+                pending, pending_rows = [], 0
+                while (item := self._get_until_stopped(write_queue, stop)) is not _PIPELINE_DONE:
+                    stats["files"] += 1
+                    if not self.bulk_sync:
+                        self._sync_file(*item)
+                        self._maybe_checkpoint(1)
+                        continue
+                    pending.append(item)
+                    pending_rows += len(item[2])
+                    if pending_rows >= ai_settings.rag.bulk_sync_batch_rows:
+                        self._sync_files_bulk(pending)
+                        self._maybe_checkpoint(len(pending))
+                        pending, pending_rows = [], 0
+                if pending and not stop.is_set():
+                    self._sync_files_bulk(pending)
+                    self._maybe_checkpoint(len(pending))
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+        def embed_and_forward(pending: List[Tuple[str, Dict[str, Any], List[Dict[str, Any]]]]):
+            batch_chunks = [chunk for _, _, chunks in pending for chunk in chunks]
+            for i in range(0, len(batch_chunks), batch_size):
+                embedded = self._embed_chunks(batch_chunks[i:i + batch_size])
+                stats["embedded"] += embedded
+                stats["reused"] += len(batch_chunks[i:i + batch_size]) - embedded
+                stats["batches"] += 1
+            stats["chunks"] += len(batch_chunks)
+            for item in pending:
+                if not self._put_until_stopped(write_queue, item, stop):
+                    return
+
+        producer = threading.Thread(target=produce_chunks, name="indexer-chunker", daemon=True)
+        writer = threading.Thread(target=write_files, name="indexer-writer", daemon=True)
+        producer.start()
+        writer.start()
+        try:
+            pending, pending_chunks = [], 0
+            while (item := self._get_until_stopped(chunk_queue, stop)) is not _PIPELINE_DONE:
+                pending.append(item)
+                pending_chunks += len(item[2])
+                if pending_chunks >= batch_size:
+                    embed_and_forward(pending)
+                    pending, pending_chunks = [], 0
+            if pending and not stop.is_set():
+                embed_and_forward(pending)
+            self._put_until_stopped(write_queue, _PIPELINE_DONE, stop)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            producer.join()
+            writer.join()
+
+        logger.info("Indexing pipeline finished", **stats)
+        if errors:
+            raise errors[0]
+
+    def _process_files_distributed(self, files_to_process: List[Tuple[Path, Dict[str, Any]]]):
+        """
+        Queues the files as jobs for `ai-index --worker` processes and waits until every job is
+        done or has failed. Workers write rows straight into the current write table (the build
+        table during a bulk load); the state entries they report back are merged here, so
+        state.json and the manifest are still written by this process alone.
+        """
+        rag = ai_settings.rag
+        self.work_queue.ensure_table()
+        run_id = uuid.uuid4().hex
+        items = [(str(file_path.relative_to(self.project_root)), state_entry) for file_path, state_entry in files_to_process]
+        jobs = self.work_queue.enqueue(run_id, self.write_table_name, items, rag.work_queue_batch_files)
+        logger.info("Queued indexing jobs for workers", run_id=run_id, jobs=jobs, files=len(items), queue=self.work_queue.table_name)
+        try:
+            last_report = None
+            while True:
+                progress = self.work_queue.progress(run_id, rag.work_queue_lease_seconds, rag.work_queue_max_attempts)
+                if not progress.get("pending") and not progress.get("claimed"):
+                    break
+                if progress != last_report:
+                    logger.info("Waiting for workers", **progress)
+                    last_report = progress
+                time.sleep(rag.work_queue_poll_seconds)
+
+            for job in self.work_queue.results(run_id):
+                if job["status"] == "done":
+                    self.state.update(job["result"]["state"])
+                    self._failed_paths.update(job["result"]["failed"])
+                else:
+                    logger.error("Indexing job failed on every attempt.", files=len(job["paths"]), error=job["error"])
+                    self._failed_paths.update(rel_path_str for rel_path_str, _ in job["paths"])
+        finally:
+            # Also withdraws unclaimed jobs if the coordinator is interrupted.
+            self.work_queue.clear(run_id)
+        logger.info("Workers finished", run_id=run_id, jobs=jobs)
+
+    def _run_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Indexes one queued batch and returns the state entries of the files it wrote. A file whose
+        content differs from what the coordinator saw (e.g. a worker on another checkout) is
+        reported as failed rather than indexed under the wrong hash.
+        """
+        self.state, self._failed_paths = {}, set()
+        self._run_commit_sha = self._get_current_commit_sha()
+        self._set_write_table(job["write_table"])
+        try:
+            files = []
+            for rel_path_str, state_entry in job["paths"]:
+                file_path = self.project_root / rel_path_str
+                try:
+                    current_hash, _ = self._calculate_hash(file_path)
+                except OSError as e:
+                    current_hash = None
+                    logger.error("Queued file is not readable on this worker", file=rel_path_str, error=str(e))
+                if current_hash != state_entry["hash"]:
+                    if current_hash is not None:
+                        logger.error("Queued file differs from the coordinator's copy", file=rel_path_str)
+                    self._failed_paths.add(rel_path_str)
+                    continue
+                files.append((file_path, state_entry))
+            if files:
+                self._process_files(files)
+            return {"state": self.state, "failed": sorted(self._failed_paths)}
+        finally:
+            self._set_write_table(self.members_table_name if self.shared_chunk_store else self.table_name)
+
+    def work(self, idle_exit_seconds: Optional[float] = None):
+        """
+        Claims and indexes queued jobs until interrupted, or until the queue has been empty for
+        `idle_exit_seconds` (0 means never). Any number of workers may run, on any host that has
+        the same checkout and database access.
+        """
+        if self.store is not None:
+            raise ValueError("--worker requires the 'postgres' index backend.")
+        rag = ai_settings.rag
+        idle_exit_seconds = rag.work_queue_idle_exit_seconds if idle_exit_seconds is None else idle_exit_seconds
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.work_queue.ensure_table()
+        logger.info("Worker waiting for jobs", worker_id=worker_id, queue=self.work_queue.table_name)
+        idle_since = time.monotonic()
+        try:
+            if self.workers > 1:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            while True:
+                job = self.work_queue.claim(worker_id, rag.work_queue_lease_seconds, rag.work_queue_max_attempts)
+                if job is None:
+                    if idle_exit_seconds and time.monotonic() - idle_since >= idle_exit_seconds:
+                        logger.info("Work queue idle; worker exiting.", worker_id=worker_id)
+                        return
+                    time.sleep(rag.work_queue_poll_seconds)
+                    continue
+                logger.info("Claimed indexing job", job_id=job["job_id"], files=len(job["paths"]), attempt=job["attempts"])
+                try:
+                    result = self._run_job(job)
+                except BaseException as e:
+                    # Hand the job back right away instead of letting its lease run out.
+                    if not self.work_queue.fail(job["job_id"], worker_id, str(e) or type(e).__name__, rag.work_queue_max_attempts):
+                        logger.warning("Lost the lease on a failed job; another worker owns it now.", job_id=job["job_id"])
+                    if not isinstance(e, Exception):
+                        raise
+                    logger.error("Indexing job failed; returned it to the queue.", job_id=job["job_id"], error=str(e), exc_info=True)
+                else:
+                    if not self.work_queue.complete(job["job_id"], worker_id, result):
+                        # Its rows are already written, and the new owner rewrites the same files.
+                        logger.warning("Lost the lease before completing a job; discarding its result.", job_id=job["job_id"])
+                idle_since = time.monotonic()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    def _fetch_existing_embeddings(self, chunk_hashes: List[str]) -> Dict[str, List[float]]:
+        """
+        Looks up vectors for already-indexed chunks with the same content address: in the branch
+        table, or across all branches of the project when the shared chunk store is enabled.
+        """
+        if self.store is not None:
+            return self.store.fetch_embeddings(chunk_hashes)
+        source_table = self.chunks_table_name if self.shared_chunk_store else self.table_name
+        query = text(
+            f"SELECT DISTINCT ON (chunk_hash) chunk_hash, embedding "
+            f"FROM {source_table} WHERE chunk_hash = ANY(:hashes)"
+        ).columns(column("chunk_hash", String), column("embedding", self._vector_column_type()))
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(query, {"hashes": chunk_hashes}).all()
+        except Exception as e:
+            logger.warning("Could not look up existing embeddings; recomputing.", error=str(e))
+            return {}
+        return {row.chunk_hash: embedding_to_list(row.embedding) for row in rows}
+
+    def _embed_chunks(self, chunks: List[Dict[str, Any]]) -> int:
+        """
+        Attaches an embedding to every chunk, reusing vectors from the local embedding cache and
+        the existing table by chunk hash. Only the remaining texts reach the embedding provider.
+        Returns the number of texts actually embedded.
+        """
+        hashes = [c['metadata']['chunk_hash'] for c in chunks]
+        vectors = self.embedding_cache.get_many(hashes) if self.embedding_cache else {}
+        missing = [h for h in dict.fromkeys(hashes) if h not in vectors]
+        if missing:
+            from_table = self._fetch_existing_embeddings(missing)
+            vectors.update(from_table)
+            if self.embedding_cache:
+                self.embedding_cache.put_many(from_table)
+
+        texts_to_embed = {}
+        for chunk, chunk_hash in zip(chunks, hashes):
+            if chunk_hash not in vectors:
+                texts_to_embed.setdefault(chunk_hash, chunk['document'])
+        if texts_to_embed:
+            embeddings = self.active_provider.get_embeddings(list(texts_to_embed.values()))
+            computed = dict(zip(texts_to_embed.keys(), embeddings))
+            vectors.update(computed)
+            if self.embedding_cache:
+                self.embedding_cache.put_many(computed)
+
+        for chunk, chunk_hash in zip(chunks, hashes):
+            chunk['embedding'] = vectors[chunk_hash]
+        return len(texts_to_embed)
+
+    @staticmethod
+    def _row_values(chunk: Dict[str, Any]) -> Dict[str, Any]:
+        metadata = chunk['metadata']
+        return {
+            "id": chunk['id'],
+            "content": chunk['document'],
+            "metadata": metadata,
+            "embedding": chunk['embedding'],
+            "source": metadata['source'],
+            "chunk_hash": metadata['chunk_hash'],
+            "language": metadata['language'],
+        }
+
+    def _sync_files_bulk(self, items: List[Tuple[str, Dict[str, Any], List[Dict[str, Any]]]]):
+        """
+        Syncs a batch of files in a single transaction: rows are streamed into a temporary table
+        with binary COPY, then the old rows are deleted and the new ones inserted set-wise.
+        If anything in the batch fails, each file is retried on its own so one bad file cannot
+        block the rest.
+        """
+        if self.store is not None:
+            return self._sync_files_to_store(items)
+        sources = [rel_path_str for rel_path_str, _, _ in items]
+        encode_embedding = pg_copy.encode_halfvec if self.vector_storage_type == "halfvec" else pg_copy.encode_vector
+        rows = (
+            (
+                pg_copy.encode_text(row['id']),
+                pg_copy.encode_text(row['content']),
+                pg_copy.encode_jsonb(row['metadata']),
+                encode_embedding(row['embedding']),
+                pg_copy.encode_text(row['source']),
+                pg_copy.encode_text(row['chunk_hash']),
+                pg_copy.encode_text(row['language']),
+            )
+            for _, _, chunks in items for row in map(self._row_values, chunks)
+        )
+        staging_table = f"_ai_index_staging_{os.getpid()}"
+        buffer = io.BytesIO()
+        row_count = pg_copy.write_copy_binary(rows, buffer)
+        buffer.seek(0)
+
+        raw_conn = self.engine.raw_connection()
+        try:
+            with raw_conn.cursor() as cur:
+                cur.execute(
+                    f"CREATE TEMP TABLE {staging_table} (id VARCHAR(1024), content TEXT, metadata JSONB, "
+                    f"embedding {self.vector_sql_type}, source TEXT, chunk_hash TEXT, language TEXT) ON COMMIT DROP"
+                )
+                cur.copy_expert(f"COPY {staging_table} ({_ROW_COLUMNS}) FROM STDIN WITH (FORMAT binary)", buffer)
+                row_columns = _ROW_COLUMNS
+                if self.shared_chunk_store:
+                    row_columns = _MEMBER_COLUMNS
+                    # Held until commit, so a prune cannot delete these chunks before their members exist.
+                    cur.execute("SELECT pg_advisory_xact_lock_shared(hashtext(%s))", (self.chunks_table_name,))
+                    cur.execute(
+                        f"INSERT INTO {self.chunks_table_name} (chunk_hash, content, embedding) "
+                        f"SELECT DISTINCT ON (chunk_hash) chunk_hash, content, embedding FROM {staging_table} "
+                        f"ON CONFLICT (chunk_hash) DO NOTHING"
+                    )
+                cur.execute(f"DELETE FROM {self.write_table_name} WHERE source = ANY(%s)", (sources,))
+                cur.execute(
+                    f"INSERT INTO {self.write_table_name} ({row_columns}) SELECT {row_columns} FROM {staging_table}"
+                )
+            raw_conn.commit()
+        except Exception as e:
+            raw_conn.rollback()
+            logger.warning("Bulk sync failed; falling back to per-file sync.", files=len(items), error=str(e))
+            for item in items:
+                self._sync_file(*item)
+            return
+        finally:
+            raw_conn.close()
+
+        for rel_path_str, state_entry, _ in items:
+            self.state[rel_path_str] = state_entry
+        logger.info("Bulk-synced files to database", files=len(items), rows=row_count)
+
+    def _sync_files_to_store(self, items: List[Tuple[str, Dict[str, Any], List[Dict[str, Any]]]]):
+        """Bulk sync into the local store: one append and one metadata transaction per batch."""
+        try:
+            self.store.replace_files([(rel_path_str, [self._row_values(c) for c in chunks]) for rel_path_str, _, chunks in items])
+        except Exception as e:
+            logger.warning("Bulk sync failed; falling back to per-file sync.", files=len(items), error=str(e))
+            for item in items:
+                self._sync_file(*item)
+            return
+        for rel_path_str, state_entry, _ in items:
+            self.state[rel_path_str] = state_entry
+        logger.info("Bulk-synced files to local index", files=len(items), rows=sum(len(chunks) for _, _, chunks in items))
+
+    def _delete_sources(self, sources: List[str]):
+        """Removes every row of the given files from the table being written."""
+        if self.store is not None:
+            return self.store.delete_sources(sources)
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {self.write_table_name} WHERE source = ANY(:file_paths)"), {"file_paths": sources})
+
+    def _sync_file(self, rel_path_str: str, state_entry: Dict[str, Any], chunks: List[Dict[str, Any]]):
+        # Files that no longer yield chunks are still synced so their stale rows are removed.
+        logger.info("Syncing file to database", file=rel_path_str, chunks=len(chunks))
+        try:
+            if self.store is not None:
+                self.store.replace_files([(rel_path_str, [self._row_values(c) for c in chunks])])
+                self.state[rel_path_str] = state_entry
+                return
+            with self.engine.begin() as conn:
+                conn.execute(text(f"DELETE FROM {self.write_table_name} WHERE source = :file_path"), {"file_path": rel_path_str})
+                if chunks:
+                    rows = [self._row_values(c) for c in chunks]
+                    if self.shared_chunk_store:
+                        conn.execute(text("SELECT pg_advisory_xact_lock_shared(hashtext(:name))"), {"name": self.chunks_table_name})
+                        shared_rows = {r['chunk_hash']: {k: r[k] for k in ("chunk_hash", "content", "embedding")} for r in rows}
+                        conn.execute(pg_insert(self.chunks_table).on_conflict_do_nothing(index_elements=["chunk_hash"]), list(shared_rows.values()))
+                        rows = [{k: r[k] for k in ("id", "metadata", "source", "chunk_hash", "language")} for r in rows]
+                    conn.execute(insert(self.table), rows)
+            self.state[rel_path_str] = state_entry
+        except Exception as e:
+            logger.error("Failed to sync file to database. Skipping.", file=rel_path_str, error=str(e))
+            self._failed_paths.add(rel_path_str)
 
     def _get_current_commit_sha(self) -> Optional[str]:
         try:
@@ -369,14 +1567,208 @@ class Indexer:
         except Exception:
             return None
 
+    def _git(self, *args: str) -> Optional[str]:
+        try:
+            return subprocess.run(['git', *args], capture_output=True, text=True, check=True, cwd=self.project_root).stdout
+        except Exception:
+            return None
+
+    def _get_uncommitted_paths(self) -> List[str]:
+        """Tracked paths that differ from HEAD plus untracked, non-excluded paths, relative to project_root."""
+        modified = self._git('diff', '--name-only', '-z', '--relative', 'HEAD')
+        untracked = self._git('ls-files', '--others', '--exclude-standard', '-z')
+        paths = set()
+        for output in (modified, untracked):
+            if output:
+                paths.update(p for p in output.split('\0') if p)
+        return sorted(paths)
+
+    def _load_previous_manifest(self) -> Dict[str, Any]:
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, 'rb') as f:
+                    return orjson.loads(f.read())
+            except Exception as e:
+                logger.warning("Could not read previous index manifest.", error=str(e))
+        return {}
+
+    def _git_changed_paths(self, previous_manifest: Dict[str, Any]) -> Optional[Tuple[set, set]]:
+        """
+        Returns (changed, deleted) project-relative paths since the last completed run, or None
+        when the previous run cannot serve as an incremental base and a full walk is required.
+        """
+        base_sha = previous_manifest.get("commit_sha")
+        if not (base_sha and previous_manifest.get("run_completed")):
+            logger.info("No completed previous run recorded; falling back to a full walk.")
+            return None
+        if previous_manifest.get("branch") != self.branch:
+            logger.info("Previous manifest belongs to another branch; falling back to a full walk.", previous_branch=previous_manifest.get("branch"))
+            return None
+        if self._git('cat-file', '-e', f"{base_sha}^{{commit}}") is None:
+            logger.warning("Previous indexed commit is unreachable (shallow clone or rewritten history); falling back to a full walk.", commit_sha=base_sha)
+            return None
+
+        # Comparing against the working tree (not just HEAD) also picks up uncommitted edits.
+        diff_output = self._git('diff', '--name-status', '-z', '-M', '--relative', base_sha)
+        if diff_output is None:
+            return None
+
+        changed, deleted = set(), set()
+        fields = [f for f in diff_output.split('\0') if f]
+        i = 0
+        while i < len(fields):
+            status = fields[i]
+            if status[0] in ('R', 'C'):
+                old_path, new_path = fields[i + 1], fields[i + 2]
+                if status[0] == 'R':
+                    deleted.add(old_path)
+                changed.add(new_path)
+                i += 3
+                continue
+            path = fields[i + 1]
+            (deleted if status[0] == 'D' else changed).add(path)
+            i += 2
+
+        # Untracked files, plus anything the previous run left uncommitted or failed to index.
+        changed.update(self._get_uncommitted_paths())
+        changed.update(previous_manifest.get("pending_paths", []))
+        logger.info("Git-incremental change set", base_commit=base_sha, changed=len(changed), deleted=len(deleted))
+        return changed, deleted
+
+    def _iter_index_rows(self, batch_size: int = 2000) -> Iterable[List[Dict[str, Any]]]:
+        """Streams every row of the live index in batches, shaped like `_row_values`."""
+        if self.store is not None:
+            yield from self.store.iter_rows(batch_size)
+            return
+        query = text(f"SELECT {_ROW_COLUMNS} FROM {self.table_name} ORDER BY id").columns(
+            column("id", String), column("content", TEXT), column("metadata", JSON), column("embedding", self._vector_column_type()),
+            column("source", TEXT), column("chunk_hash", TEXT), column("language", TEXT),
+        )
+        with self.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+            for partition in result.mappings().partitions():
+                yield [{**row, "embedding": embedding_to_list(row["embedding"])} for row in partition]
+
+    def _iter_chunk_hashes(self, sources: Optional[List[str]] = None) -> Iterable[Tuple[str, str, str]]:
+        """Yields (source, id, chunk_hash) for every row of the live index, or only for `sources`."""
+        if self.store is not None:
+            yield from self.store.iter_chunk_hashes(sources)
+            return
+        if sources is None:
+            query, params = text(f"SELECT source, id, chunk_hash FROM {self.table_name}"), {}
+        else:
+            query, params = text(f"SELECT source, id, chunk_hash FROM {self.table_name} WHERE source = ANY(:sources)"), {"sources": sources}
+        with self.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=10000).execute(query, params)
+            for row in result:
+                yield tuple(row)
+
+    def _merkle_leaves(self, sources: Optional[List[str]] = None) -> Dict[str, Tuple[str, List[str]]]:
+        """(content hash, chunk hashes in chunk order) of the indexed files, or only of `sources`."""
+        chunks_by_source: Dict[str, List[Tuple[int, str]]] = {}
+        for source, chunk_id, chunk_hash in self._iter_chunk_hashes(sources):
+            chunks_by_source.setdefault(source, []).append((int(chunk_id.rsplit(":", 1)[1]), chunk_hash))
+        return {
+            rel_path_str: (self.state[rel_path_str]["hash"], [chunk_hash for _, chunk_hash in sorted(chunks_by_source.get(rel_path_str, []))])
+            for rel_path_str in (self.state if sources is None else sources) if rel_path_str in self.state
+        }
+
+    def _previous_merkle_tree(self) -> Optional[Dict[str, Any]]:
+        """The tree of the last completed run: kept in memory by long-lived instances, else read from the manifest."""
+        if self._merkle_tree is None:
+            tree = self._load_previous_manifest().get("merkle_tree")
+            if tree and tree.get("format_version") == MERKLE_FORMAT_VERSION:
+                self._merkle_tree, self._merkle_content_hashes = tree, content_hashes(tree["root"])
+        tree = self._merkle_tree
+        if tree is None or tree.get("cache_key") != self.active_provider.cache_key or tree.get("table_name") != self.table_name:
+            return None
+        return tree
+
+    def _build_merkle_tree(self) -> Optional[Dict[str, Any]]:
+        """
+        The directory -> file -> chunk hash tree of the finished index (see index_merkle). Only
+        completed runs get one, because a partial index would advertise content it does not hold.
+        """
+        if not self._run_completed:
+            return None
+        previous = None if self._forced_run else self._previous_merkle_tree()
+        try:
+            if previous is None:
+                leaves = self._merkle_leaves()
+                tree = {
+                    "format_version": MERKLE_FORMAT_VERSION,
+                    "cache_key": self.active_provider.cache_key,
+                    "table_name": self.table_name,
+                    "root": build_tree(leaves),
+                }
+                self._merkle_tree, self._merkle_content_hashes = tree, {path: leaf[0] for path, leaf in leaves.items()}
+                return tree
+            # Chunk hashes follow from content and model, so only files whose content hash moved need re-reading.
+            known = self._merkle_content_hashes
+            changed = [path for path, entry in self.state.items() if known.get(path) != entry["hash"]]
+            removed = [path for path in known if path not in self.state]
+            if not (changed or removed):
+                return previous
+            leaves = self._merkle_leaves(changed)
+        except Exception as e:
+            logger.warning("Could not read chunk hashes; the manifest will not carry a Merkle tree.", error=str(e))
+            return None
+        update_tree(previous["root"], {**dict.fromkeys(removed), **leaves})
+        for path in removed:
+            known.pop(path)
+        known.update((path, leaf[0]) for path, leaf in leaves.items())
+        logger.info("Updated Merkle tree", files_changed=len(changed), files_removed=len(removed))
+        return previous
+
+    def export_snapshot(self) -> Dict[str, Any]:
+        """
+        Writes the current index as a self-contained snapshot (see index_snapshot) and packs it into
+        `snapshot.tar.gz`. Each export gets its own version, so a client holding an older
+        manifest keeps downloading the snapshot that manifest describes.
+        """
+        rag = ai_settings.rag
+        writer = SnapshotWriter(self.snapshot_dir, self.active_provider.embedding_dim, self.vector_storage_type, rag.hnsw_m, rag.hnsw_ef_construction)
+        for batch in self._iter_index_rows():
+            writer.add(batch)
+        commit_sha = self._get_current_commit_sha()
+        info = writer.close(
+            branch=self.branch,
+            commit_sha=commit_sha,
+            embedding_model=self.active_provider.model_name,
+            embedding_cache_key=self.active_provider.cache_key,
+        )
+        pack_snapshot(self.snapshot_dir, self.snapshot_archive_path)
+        version = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{(commit_sha or 'nogit')[:12]}"
+        self._snapshot_info = {
+            "object": f"snapshots/{version}/{self.snapshot_archive_path.name}",
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "rows": info["rows"],
+            "bytes": self.snapshot_archive_path.stat().st_size,
+            "sha256": file_sha256(self.snapshot_archive_path),
+        }
+        logger.info("Exported index snapshot", **self._snapshot_info)
+        return self._snapshot_info
+
     def _create_manifest(self):
         manifest_data = {
             "branch": self.branch,
             "commit_sha": self._get_current_commit_sha(),
+            "run_completed": self._run_completed,
+            "pending_paths": sorted(set(self._get_uncommitted_paths()) | self._failed_paths),
             "created_at_utc": datetime.now(timezone.utc).isoformat(),
             "embedding_provider": self.active_provider.provider_name,
             "embedding_model": self.active_provider.model_name,
-            "db_table_name": self.table_name
+            "embedding_backend": self.active_provider.backend,
+            "shared_chunk_table": self.chunks_table_name if self.shared_chunk_store else None,
+            # Query-side consumers must embed with the same truncation and cast to the same column type.
+            "embedding_dimensions": self.active_provider.embedding_dim,
+            "vector_storage_type": self.vector_storage_type,
+            "index_backend": self.index_backend,
+            "local_store_path": str(self.store.path.relative_to(self.project_root)) if self.store is not None else None,
+            "db_table_name": self.table_name,
+            "snapshot": self._snapshot_info,
+            # Lets clients diff two manifests and refresh only the files and chunks that changed.
+            "merkle_tree": self._build_merkle_tree(),
         }
         with open(self.manifest_path, 'wb') as f:
             f.write(orjson.dumps(manifest_data, option=orjson.OPT_INDENT_2))
@@ -388,6 +1780,10 @@ class Indexer:
         if not (oci_settings and oci_settings.bucket and oci_settings.namespace):
             logger.warning("OCI configuration is incomplete in settings. Skipping upload.")
             return
+        try:
+            import oci
+        except ImportError:
+            raise ImportError("Uploading artifacts requires the OCI SDK. Please run 'pip install -e .[indexing]'")
 
         try:
             # This will raise an exception if config is invalid, failing the CI job correctly.
@@ -398,54 +1794,161 @@ class Indexer:
             logger.critical("FATAL: Failed to initialize OCI client. Check credentials and config.", error=str(e))
             raise
 
+        self._publish_artifacts(OCIObjectStore(object_storage_client, oci_settings.namespace, oci_settings.bucket))
+
+    def _publish_artifacts(self, store):
+        """
+        Uploads the run's artifacts to `store`. The snapshot goes first and the manifest last, so
+        the manifest under 'latest/' never points at a snapshot that is not there yet.
+        """
         project_name = os.getenv("PROJECT_NAME", self.project_root.name)
-        artifacts = {"index_manifest.json": self.manifest_path, "state.json": self.state_path}
+        prefix = f"indexes/{project_name}/{self.branch}"
+        artifacts = []
+        if self._snapshot_info:
+            artifacts.append((self.snapshot_archive_path, f"{prefix}/{self._snapshot_info['object']}"))
+        self.export_state()
+        artifacts.append((self.state_path, f"{prefix}/latest/state.json"))
+        artifacts.append((self.manifest_path, f"{prefix}/latest/index_manifest.json"))
 
-        for filename, local_path in artifacts.items():
+        part_size = ai_settings.rag.artifact_upload_part_mb * 1024 * 1024
+        for local_path, object_name in artifacts:
             if local_path.exists():
-                object_name = f"indexes/{project_name}/{self.branch}/latest/{filename}"
                 logger.info("Uploading artifact to OCI", local_path=str(local_path), object_name=object_name)
                 try:
-                    with open(local_path, 'rb') as f:
-                        object_storage_client.put_object(
-                            namespace_name=oci_settings.namespace,
-                            bucket_name=oci_settings.bucket,
-                            object_name=object_name,
-                            put_object_body=f,
-                            if_match=None, # Overwrite unconditionally
-                        )
-                    logger.info("Successfully uploaded artifact.", filename=filename)
-                except oci.exceptions.ServiceError as e:
-                    logger.error("Failed to upload artifact to OCI.", filename=filename, status=e.status, message=e.message)
+                    upload_file(store, local_path, object_name, part_size, ai_settings.rag.artifact_upload_parallelism)
+                    logger.info("Successfully uploaded artifact.", filename=local_path.name)
+                except Exception as e:
+                    logger.error("Failed to upload artifact to OCI.", filename=local_path.name, status=getattr(e, "status", None), error=str(e))
                     # Re-raise to ensure the CI job fails if the upload itself fails
                     raise
             else:
-                logger.warning("Artifact not found locally, cannot upload.", filename=filename)
+                logger.warning("Artifact not found locally, cannot upload.", filename=local_path.name)
+
+def _missing_dependencies(embedding_provider: str, check_parity: bool = False) -> List[str]:
+    """Returns the packages the selected embedding, index and upload backends need but cannot import."""
+    rag = ai_settings.rag
+    required = {"sqlalchemy": "sqlalchemy", "pgvector": "pgvector", "orjson": "orjson"}
+    if embedding_provider == "local" or check_parity:
+        required["sentence_transformers"] = "sentence-transformers"
+    if rag.index_backend == "postgres":
+        required["psycopg2"] = "psycopg2-binary"
+    if rag.oracle_cloud and rag.oracle_cloud.bucket and rag.oracle_cloud.namespace:
+        required["oci"] = "oci"
+    return [package for module, package in required.items() if importlib.util.find_spec(module) is None]
 
 def main():
     setup_logging()
-    
-    if not all([SentenceTransformer, OpenAI, create_engine, psycopg2, oci, orjson]):
-        logger.critical("FATAL: One or more required libraries for indexing are not installed. Please run 'pip install -e .[indexing]'")
-        return
 
     parser = argparse.ArgumentParser(description="AI Assistant RAG Indexer")
     parser.add_argument("directory", nargs="?", default=".", help="The project directory to index.")
     parser.add_argument("--force-reindex", action="store_true", help="Force re-indexing of all files.")
+    parser.add_argument(
+        "--git-incremental",
+        action="store_true",
+        help="Only consider paths git reports as changed since the last indexed commit. Falls back to a full walk when that commit is unreachable."
+    )
+    parser.add_argument("--paranoid", action="store_true", help="Hash every file instead of trusting unchanged size/mtime/inode.")
     parser.add_argument("--branch", help="The git branch being indexed (for CI/CD). Overrides local git detection.")
     parser.add_argument(
         "--database-url",
         help="The PostgreSQL connection URL. Overrides any value from config files or .env."
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes for hashing and chunking. Overrides 'rag.indexer_workers'."
+    )
+    parser.add_argument(
+        "--check-embedding-parity",
+        action="store_true",
+        help="Compare the configured embedding backend against the torch backend and exit."
+    )
+    parser.add_argument(
+        "--prune-shared-chunks",
+        action="store_true",
+        help="After indexing, delete shared chunks no branch references any more. Requires 'rag.shared_chunk_store'."
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Stay running and re-index files as they change, keeping the model and database pool loaded."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from its last checkpoint instead of starting over."
+    )
+    parser.add_argument(
+        "--embedding-provider",
+        choices=["local", "openai"],
+        help="Embedding provider to index with. Overrides 'rag.embedding_provider'."
+    )
+    parser.add_argument(
+        "--export-state",
+        action="store_true",
+        help="Write state.json after the run even if no artifacts are uploaded. Only matters with 'rag.state_backend: sqlite'."
+    )
+    parser.add_argument(
+        "--distributed",
+        action="store_true",
+        help="Coordinate only: queue changed files for 'ai-index --worker' processes and merge their results."
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Claim and index jobs queued by 'ai-index --distributed' for this project and branch."
+    )
     args = parser.parse_args()
+
+    embedding_provider = args.embedding_provider or ai_settings.rag.embedding_provider
+    missing = _missing_dependencies(embedding_provider, args.check_embedding_parity)
+    if missing:
+        logger.critical("FATAL: Libraries required by the selected backends are not installed. Please run 'pip install -e .[indexing]'", missing=missing)
+        return
+
+    if args.check_embedding_parity:
+        report = check_backend_parity(ai_settings.rag.embedding_backend)
+        if report["min_cosine"] < report["threshold"]:
+            logger.critical("Embedding backend diverges from the torch reference.", backend=ai_settings.rag.embedding_backend, **report)
+            raise SystemExit(1)
+        logger.info("Embedding backend matches the torch reference.", backend=ai_settings.rag.embedding_backend, **report)
+        return
     
     try:
         indexer = Indexer(
             project_root=Path(args.directory), 
             branch_override=args.branch,
-            database_url_override=args.database_url # Use the parsed arg here
+            database_url_override=args.database_url, # Use the parsed arg here
+            workers=args.workers,
+            embedding_provider=embedding_provider,
+        )
+        # CI timeouts and spot preemption send SIGTERM; unwinding normally lets the run write its checkpoint.
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+        if args.watch:
+            try:
+                IndexWatcher(indexer).watch()
+            except KeyboardInterrupt:
+                pass
+            return
+        if args.worker:
+            try:
+                indexer.work()
+            except KeyboardInterrupt:
+                pass
+            return
+        indexer.run(
+            force_reindex=args.force_reindex,
+            paranoid=args.paranoid,
+            git_incremental=args.git_incremental,
+            resume=args.resume,
+            distributed=args.distributed,
         )
-        indexer.run(force_reindex=args.force_reindex)
+        if args.export_state:
+            indexer.export_state()
+        if args.prune_shared_chunks:
+            if not indexer.shared_chunk_store:
+                raise ValueError("--prune-shared-chunks requires 'rag.shared_chunk_store' to be enabled.")
+            indexer.prune_shared_chunks()
     except (ValueError, RuntimeError) as e:
         logger.critical("A configuration or runtime error occurred during indexer setup.", error=str(e))
     except Exception as e:
@@ -0,0 +1,150 @@
+# src/ai_assistant/object_store.py
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+class ObjectStore:
+    """The object-storage operations the indexer needs for publishing artifacts, single-shot and multipart."""
+
+    def put_object(self, name: str, path: Path):
+        raise NotImplementedError
+
+    def create_multipart_upload(self, name: str) -> str:
+        raise NotImplementedError
+
+    def upload_part(self, name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        """Uploads one part (numbered from 1) and returns its ETag."""
+        raise NotImplementedError
+
+    def commit_multipart_upload(self, name: str, upload_id: str, parts: List[Tuple[int, str]]):
+        raise NotImplementedError
+
+    def abort_multipart_upload(self, name: str, upload_id: str):
+        raise NotImplementedError
+
+class LocalObjectStore(ObjectStore):
+    """
+    A filesystem stand-in for a bucket, for tests and air-gapped mirrors. Parts are staged
+    separately and only appear under their object name once the upload is committed.
+    """
+    def __init__(self, root: Path):
+        self.root = root
+        self.uploads_dir = root / ".multipart"
+
+    def _object_path(self, name: str) -> Path:
+        path = (self.root / name).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Object name escapes the store root: {name}")
+        return path
+
+    def put_object(self, name: str, path: Path):
+        target = self._object_path(name)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_name(target.name + ".tmp")
+        shutil.copyfile(path, temp_path)
+        temp_path.replace(target)
+
+    def create_multipart_upload(self, name: str) -> str:
+        upload_id = uuid.uuid4().hex
+        (self.uploads_dir / upload_id).mkdir(parents=True)
+        return upload_id
+
+    def upload_part(self, name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        part_path = self.uploads_dir / upload_id / f"{part_number:05d}"
+        part_path.write_bytes(data)
+        return f"{upload_id}-{part_number}-{len(data)}"
+
+    def commit_multipart_upload(self, name: str, upload_id: str, parts: List[Tuple[int, str]]):
+        target = self._object_path(name)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_name(target.name + ".tmp")
+        with open(temp_path, 'wb') as out:
+            for part_number, etag in sorted(parts):
+                part_path = self.uploads_dir / upload_id / f"{part_number:05d}"
+                if etag != f"{upload_id}-{part_number}-{part_path.stat().st_size}":
+                    raise ValueError(f"ETag mismatch for part {part_number} of {name}.")
+                with open(part_path, 'rb') as part:
+                    shutil.copyfileobj(part, out)
+        temp_path.replace(target)
+        shutil.rmtree(self.uploads_dir / upload_id)
+
+    def abort_multipart_upload(self, name: str, upload_id: str):
+        shutil.rmtree(self.uploads_dir / upload_id, ignore_errors=True)
+
+class OCIObjectStore(ObjectStore):
+    """OCI Object Storage bucket, using the SDK's native multipart API."""
+
+    def __init__(self, client, namespace: str, bucket: str):
+        import oci
+        self._models = oci.object_storage.models
+        self.client = client
+        self.namespace = namespace
+        self.bucket = bucket
+
+    def put_object(self, name: str, path: Path):
+        with open(path, 'rb') as f:
+            self.client.put_object(
+                namespace_name=self.namespace,
+                bucket_name=self.bucket,
+                object_name=name,
+                put_object_body=f,
+                if_match=None, # Overwrite unconditionally
+            )
+
+    def create_multipart_upload(self, name: str) -> str:
+        details = self._models.CreateMultipartUploadDetails(object=name)
+        return self.client.create_multipart_upload(self.namespace, self.bucket, details).data.upload_id
+
+    def upload_part(self, name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        response = self.client.upload_part(self.namespace, self.bucket, name, upload_id, part_number, data)
+        return response.headers["etag"]
+
+    def commit_multipart_upload(self, name: str, upload_id: str, parts: List[Tuple[int, str]]):
+        details = self._models.CommitMultipartUploadDetails(
+            parts_to_commit=[self._models.CommitMultipartUploadPartDetails(part_num=n, etag=etag) for n, etag in sorted(parts)]
+        )
+        self.client.commit_multipart_upload(self.namespace, self.bucket, name, upload_id, details)
+
+    def abort_multipart_upload(self, name: str, upload_id: str):
+        self.client.abort_multipart_upload(self.namespace, self.bucket, name, upload_id)
+
+def upload_file(store: ObjectStore, path: Path, name: str, part_size: int, parallelism: int = 4):
+    """
+    Uploads `path` as object `name`. Files larger than `part_size` go up as a multipart upload
+    with up to `parallelism` parts in flight; each worker reads only its own part, so memory use
+    stays at parallelism x part_size. A failed part aborts the whole upload.
+    """
+    size = path.stat().st_size
+    if size <= part_size:
+        store.put_object(name, path)
+        return
+    upload_id = store.create_multipart_upload(name)
+    part_count = (size + part_size - 1) // part_size
+    logger.info("Starting multipart upload", object_name=name, bytes=size, parts=part_count, parallelism=parallelism)
+
+    def send(part_number: int) -> Tuple[int, str]:
+        offset = (part_number - 1) * part_size
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            data = os.pread(fd, min(part_size, size - offset), offset)
+        finally:
+            os.close(fd)
+        return part_number, store.upload_part(name, upload_id, part_number, data)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, parallelism)) as executor:
+            parts: Dict[int, str] = dict(executor.map(send, range(1, part_count + 1)))
+        store.commit_multipart_upload(name, upload_id, list(parts.items()))
+    except BaseException:
+        try:
+            store.abort_multipart_upload(name, upload_id)
+        except Exception as e:
+            logger.warning("Could not abort multipart upload.", object_name=name, error=str(e))
+        raise
@@ -0,0 +1,185 @@
+# src/ai_assistant/remote_embeddings.py
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import structlog
+
+from .chunker import estimate_tokens
+
+logger = structlog.get_logger(__name__)
+
+RETRIABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+class RemoteEmbeddingError(RuntimeError):
+    """A remote embeddings request failed and will not be retried."""
+    pass
+
+def plan_requests(lengths: List[int], token_budget: int, max_inputs: int) -> List[List[int]]:
+    """
+    Packs consecutive texts into requests of at most `token_budget` estimated tokens and
+    `max_inputs` texts. Unlike local batches nothing is padded, so order is kept and only the
+    token sum counts. A text longer than the budget is sent in a request of its own.
+    """
+    requests: List[List[int]] = []
+    tokens = 0
+    for index, length in enumerate(lengths):
+        if requests and len(requests[-1]) < max_inputs and tokens + length <= token_budget:
+            requests[-1].append(index)
+            tokens += length
+        else:
+            requests.append([index])
+            tokens = length
+    return requests
+
+class TokenBucket:
+    """
+    A reservation-style token bucket: `reserve` deducts immediately, even into debt, and returns
+    how long the caller must wait before using what it reserved. Callers are thereby served in
+    reservation order, and the state does not belong to any event loop, so one bucket can pace
+    successive `asyncio.run` calls.
+    """
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+class RemoteEmbeddingClient:
+    """
+    Embeds texts through an OpenAI-compatible `/embeddings` endpoint. Inputs are split into
+    token-bounded requests, up to `concurrency` of them run at once, both client-side rate limits
+    are honoured before each request, and rate-limited, failed or timed-out requests are retried
+    with full-jitter exponential backoff (or after the server's Retry-After).
+    """
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        model: str,
+        dimensions: Optional[int] = None,
+        request_tokens: int = 16384,
+        request_inputs: int = 64,
+        concurrency: int = 8,
+        tokens_per_minute: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+        max_retries: int = 6,
+        timeout_seconds: float = 60.0,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 30.0,
+    ):
+        self.url = base_url.rstrip("/") + "/embeddings"
+        self.api_key = api_key
+        self.model = model
+        self.dimensions = dimensions
+        self.request_tokens = request_tokens
+        self.request_inputs = request_inputs
+        self.concurrency = concurrency
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.max_retries = max_retries
+        self.timeout_seconds = timeout_seconds
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Blocking wrapper around `embed_async` for the indexer's embedding thread."""
+        return asyncio.run(self.embed_async(texts))
+
+    async def embed_async(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        lengths = [estimate_tokens(t) for t in texts]
+        requests = plan_requests(lengths, self.request_tokens, self.request_inputs)
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        stats = {"retries": 0}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+
+        async def run(session: aiohttp.ClientSession, indices: List[int]):
+            async with semaphore:
+                embeddings = await self._post_with_retries(session, [texts[i] for i in indices], sum(lengths[i] for i in indices), stats)
+            for i, embedding in zip(indices, embeddings):
+                vectors[i] = embedding
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout_seconds)
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+            tasks = [asyncio.create_task(run(session, indices)) for indices in requests]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "Embedded texts remotely",
+            texts=len(texts),
+            requests=len(requests),
+            retries=stats["retries"],
+            texts_per_second=round(len(texts) / elapsed, 1) if elapsed else None,
+            tokens_per_second=round(sum(lengths) / elapsed) if elapsed else None,
+        )
+        return vectors
+
+    async def _wait_for_rate_limits(self, tokens: int):
+        wait = max(
+            self.token_bucket.reserve(tokens) if self.token_bucket else 0.0,
+            self.request_bucket.reserve(1) if self.request_bucket else 0.0,
+        )
+        if wait:
+            logger.debug("Waiting for the embeddings rate limit", seconds=round(wait, 3))
+            await asyncio.sleep(wait)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+
+    async def _post_with_retries(self, session: aiohttp.ClientSession, inputs: List[str], tokens: int, stats: Dict[str, int]) -> List[List[float]]:
+        payload: Dict[str, Any] = {"input": inputs, "model": self.model}
+        if self.dimensions:
+            # text-embedding-3 models shorten and re-normalize server-side.
+            payload["dimensions"] = self.dimensions
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_rate_limits(tokens)
+            retry_after = None
+            try:
+                async with session.post(self.url, json=payload) as response:
+                    if response.status == 200:
+                        body = await response.json()
+                        data = sorted(body["data"], key=lambda item: item["index"])
+                        if len(data) != len(inputs):
+                            raise RemoteEmbeddingError(f"Embeddings API returned {len(data)} vectors for {len(inputs)} inputs.")
+                        return [item["embedding"] for item in data]
+                    detail = (await response.text())[:500]
+                    if response.status not in RETRIABLE_STATUSES:
+                        raise RemoteEmbeddingError(f"Embeddings API returned HTTP {response.status}: {detail}")
+                    retry_after = response.headers.get("Retry-After")
+                    reason = f"HTTP {response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                reason = f"{type(e).__name__}: {e}"
+            if attempt == self.max_retries:
+                raise RemoteEmbeddingError(f"Embeddings request failed after {attempt + 1} attempts ({reason}).")
+            delay = self._backoff(attempt, retry_after)
+            stats["retries"] += 1
+            logger.warning("Retrying embeddings request", attempt=attempt + 1, inputs=len(inputs), reason=reason, delay_seconds=round(delay, 3))
+            await asyncio.sleep(delay)
@@ -0,0 +1,88 @@
+# src/ai_assistant/utils/file_sniffer.py
+import hashlib
+import math
+import mmap
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Optional, Tuple
+
+# Bytes inspected to decide whether a file is text. Also the first read when hashing it.
+SNIFF_BYTES = 8192
+# Signatures of common formats that can slip past the NUL check within the first block.
+BINARY_SIGNATURES = (
+    b"\x89PNG", b"GIF87a", b"GIF89a", b"\xff\xd8\xff", b"PK\x03\x04", b"\x1f\x8b", b"%PDF-",
+    b"\x7fELF", b"\xfd7zXZ", b"7z\xbc\xaf\x27\x1c", b"\xca\xfe\xba\xbe", b"\x00asm",
+)
+# Control characters that legitimately appear in text files.
+_TEXT_CONTROL_BYTES = frozenset(b"\t\n\r\f\b\x1b")
+_MAX_CONTROL_RATIO = 0.1
+# Bits per byte above which a non-UTF-8 block is treated as compressed or encrypted data.
+_MAX_ENTROPY = 7.5
+_MIN_ENTROPY_SAMPLE = 1024
+
+def _entropy(data: bytes) -> float:
+    total = len(data)
+    return -sum(count / total * math.log2(count / total) for count in Counter(data).values())
+
+def sniff_bytes(head: bytes) -> Optional[str]:
+    """Classifies a file by its first block. Returns 'binary' if it should not be indexed, else None."""
+    if not head:
+        return None
+    if head.startswith(BINARY_SIGNATURES) or b"\0" in head:
+        return "binary"
+    try:
+        head.decode("utf-8")
+        return None
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off by the end of the block is still valid UTF-8.
+        if e.reason == "unexpected end of data" and e.start >= len(head) - 3:
+            return None
+    # Not UTF-8: may still be text in a legacy 8-bit encoding.
+    control = sum(1 for b in head if b < 32 and b not in _TEXT_CONTROL_BYTES)
+    if control / len(head) > _MAX_CONTROL_RATIO:
+        return "binary"
+    if len(head) >= _MIN_ENTROPY_SAMPLE and _entropy(head) > _MAX_ENTROPY:
+        return "binary"
+    return None
+
+def sniff_and_hash(file_path: Path, max_bytes: int = 0, mmap_threshold: int = 0) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns (sha256, None) for a file worth indexing, or (None, reason) with reason 'too_large' or
+    'binary'. Skipped files cost a stat and at most one block read. Files of at least
+    `mmap_threshold` bytes are hashed straight from a memory map instead of buffered reads.
+    A limit of 0 disables the size check or the memory map.
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if max_bytes and size > max_bytes:
+            return None, "too_large"
+        head = f.read(SNIFF_BYTES)
+        reason = sniff_bytes(head)
+        if reason:
+            return None, reason
+        hasher = hashlib.sha256(head)
+        if mmap_threshold and size >= mmap_threshold and size > len(head):
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                hasher.update(view[len(head):])
+        else:
+            while buf := f.read(65536):
+                hasher.update(buf)
+    return hasher.hexdigest(), None
+
+def read_text(file_path: Path, mmap_threshold: int = 0) -> str:
+    """
+    Reads a file like `Path.read_text(errors='ignore')`, including its newline translation, so
+    chunk hashes do not change. Files of at least `mmap_threshold` bytes are decoded directly
+    from a memory map, skipping the intermediate bytes copy of a buffered read.
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if mmap_threshold and size >= mmap_threshold:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                text = str(mm, 'utf-8', 'ignore')
+        else:
+            text = f.read().decode('utf-8', errors='ignore')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
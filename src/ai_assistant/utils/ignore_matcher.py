@@ -0,0 +1,163 @@
+# src/ai_assistant/utils/ignore_matcher.py
+import os
+import re
+from pathlib import Path
+from typing import Dict, Generator, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_IGNORE_FILE_NAMES = (".gitignore", ".aiignore")
+
+def _translate(pattern: str) -> str:
+    """Translates the body of a gitignore pattern (no '!', no trailing '/') into a regex fragment."""
+    i, n, out = 0, len(pattern), []
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i):
+                j = i + 2
+                # '**' is only special when it forms a whole path segment.
+                if (i == 0 or pattern[i - 1] == '/') and (j == n or pattern[j] == '/'):
+                    if j == n:
+                        out.append('.*')
+                    else:
+                        out.append('(?:.*/)?')
+                        j += 1
+                    i = j
+                    continue
+                out.append('[^/]*')
+                i = j
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = pattern.find(']', i + 2)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                body = body.replace('\\', '\\\\')
+                out.append(f'(?!/)[{body}]')
+                i = j + 1
+                continue
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+def _parse_line(line: str) -> Optional[Tuple[str, bool, bool]]:
+    """Parses one ignore-file line into (regex, negate, dir_only), or None for blanks and comments."""
+    line = line.rstrip('\r\n')
+    # Trailing spaces are insignificant unless escaped with a backslash.
+    line = re.sub(r'(?<!\\) +$', '', line)
+    if not line or line.startswith('#'):
+        return None
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    # A separator at the start or in the middle anchors the pattern to the ignore file's directory;
+    # otherwise it matches at any depth.
+    anchored = '/' in line
+    body = _translate(line.lstrip('/'))
+    regex = body if anchored else f'(?:.*/)?{body}'
+    return regex, negate, dir_only
+
+class _RuleSet:
+    """
+    The rules of one ignore source compiled into two alternations, one for files and one for
+    directories. Alternatives are ordered last rule first, so the first alternative that matches
+    is the rule git would apply, and `lastindex` identifies it in a single regex evaluation.
+    """
+    def __init__(self, lines: Iterable[str]):
+        rules = [rule for rule in map(_parse_line, lines) if rule]
+        self.is_empty = not rules
+        self._file_regex, self._file_negations = self._compile([r for r in rules if not r[2]])
+        self._dir_regex, self._dir_negations = self._compile(rules)
+
+    @staticmethod
+    def _compile(rules: List[Tuple[str, bool, bool]]) -> Tuple[Optional['re.Pattern[str]'], List[bool]]:
+        if not rules:
+            return None, []
+        ordered = list(reversed(rules))
+        alternation = '|'.join(f'({regex})' for regex, _, _ in ordered)
+        return re.compile(f'^(?:{alternation})$', re.DOTALL), [negate for _, negate, _ in ordered]
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """Returns True if ignored, False if explicitly re-included, None if no rule matches."""
+        regex, negations = (self._dir_regex, self._dir_negations) if is_dir else (self._file_regex, self._file_negations)
+        if regex is None:
+            return None
+        m = regex.match(rel_path)
+        if m is None:
+            return None
+        return not negations[m.lastindex - 1]
+
+class IgnoreMatcher:
+    """
+    Precompiled matcher with .gitignore semantics: negation, anchored patterns, '**', directory-only
+    rules, last-match-wins, and per-directory ignore files that apply to everything below them.
+    Paths are POSIX-style strings relative to `root`.
+    """
+    def __init__(self, root: Path, patterns: Iterable[str] = (), ignore_file_names: Sequence[str] = DEFAULT_IGNORE_FILE_NAMES):
+        self.root = root
+        self.ignore_file_names = tuple(ignore_file_names)
+        self._base_rules = _RuleSet(patterns)
+        self._scopes: Dict[str, Optional[_RuleSet]] = {}
+
+    def _scope(self, dir_rel: str) -> Optional[_RuleSet]:
+        """Rules from the ignore files located directly in `dir_rel` ('' for the root), loaded once."""
+        if dir_rel not in self._scopes:
+            lines: List[str] = []
+            directory = self.root / dir_rel if dir_rel else self.root
+            for name in self.ignore_file_names:
+                ignore_file = directory / name
+                if ignore_file.is_file():
+                    try:
+                        lines.extend(ignore_file.read_text(encoding='utf-8', errors='ignore').splitlines())
+                    except OSError:
+                        continue
+            rules = _RuleSet(lines) if lines else None
+            self._scopes[dir_rel] = rules if rules and not rules.is_empty else None
+        return self._scopes[dir_rel]
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        """
+        Decides a single path, assuming its parent directories are not ignored (as during a
+        pruned walk). Deeper ignore files take precedence over shallower ones and over `patterns`.
+        """
+        parts = rel_path.split('/')
+        for depth in range(len(parts) - 1, -1, -1):
+            rules = self._scope('/'.join(parts[:depth]))
+            if rules is not None:
+                decision = rules.match('/'.join(parts[depth:]), is_dir)
+                if decision is not None:
+                    return decision
+        return bool(self._base_rules.match(rel_path, is_dir))
+
+    def is_path_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        """Like `is_ignored`, but also applies the rules to every parent directory of the path."""
+        parts = rel_path.split('/')
+        for depth in range(1, len(parts)):
+            if self.is_ignored('/'.join(parts[:depth]), is_dir=True):
+                return True
+        return self.is_ignored(rel_path, is_dir)
+
+    def walk(self) -> Generator[Path, None, None]:
+        """Yields every non-ignored file under the root, pruning ignored directories."""
+        for root, dirs, files in os.walk(self.root, topdown=True):
+            root_path = Path(root)
+            rel_root = root_path.relative_to(self.root).as_posix()
+            prefix = '' if rel_root == '.' else rel_root + '/'
+            dirs[:] = [d for d in dirs if not self.is_ignored(prefix + d, is_dir=True)]
+            for name in files:
+                if not self.is_ignored(prefix + name):
+                    yield root_path / name
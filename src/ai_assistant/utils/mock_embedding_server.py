@@ -0,0 +1,173 @@
+# src/ai_assistant/utils/mock_embedding_server.py
+import argparse
+import hashlib
+import json
+import math
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from ..chunker import estimate_tokens
+
+def mock_embedding(text: str, dim: int) -> List[float]:
+    """A deterministic unit vector derived from the text, so results can be compared across runs."""
+    digest = hashlib.sha512(text.encode('utf-8')).digest()
+    raw = (digest * (dim * 4 // len(digest) + 1))[:dim * 4]
+    values = [x / 4294967295.0 - 0.5 for x in struct.unpack(f"<{dim}I", raw)]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+class MockEmbeddingServer:
+    """
+    A local stand-in for an OpenAI-compatible `/embeddings` endpoint, for tests and offline
+    benchmarks of the remote embedding client. It enforces request limits the way the real API
+    does, simulates latency, can inject 429 and 5xx responses, and counts requests and the peak
+    number in flight.
+    """
+    def __init__(
+        self,
+        dim: int = 1024,
+        latency_ms: float = 0.0,
+        latency_ms_per_text: float = 0.0,
+        max_inputs: int = 2048,
+        max_request_tokens: int = 300_000,
+        rate_limit_every: int = 0,
+        error_every: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.dim = dim
+        self.latency_ms = latency_ms
+        self.latency_ms_per_text = latency_ms_per_text
+        self.max_inputs = max_inputs
+        self.max_request_tokens = max_request_tokens
+        self.rate_limit_every = rate_limit_every
+        self.error_every = error_every
+        self.requests = 0
+        self.texts = 0
+        self.injected_failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockEmbeddingServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-embedding-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockEmbeddingServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _respond(self, payload: Dict[str, Any]) -> tuple:
+        inputs = payload.get("input")
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        if not isinstance(inputs, list) or not inputs:
+            return 400, {"error": {"message": "'input' must be a non-empty string or list."}}, {}
+        if len(inputs) > self.max_inputs:
+            return 400, {"error": {"message": f"At most {self.max_inputs} inputs per request."}}, {}
+        tokens = sum(estimate_tokens(text) for text in inputs)
+        if tokens > self.max_request_tokens:
+            return 400, {"error": {"message": f"Request has {tokens} tokens; the limit is {self.max_request_tokens}."}}, {}
+        with self._lock:
+            self.requests += 1
+            number = self.requests
+        if self.rate_limit_every and number % self.rate_limit_every == 0:
+            with self._lock:
+                self.injected_failures += 1
+            return 429, {"error": {"message": "Rate limit reached."}}, {"Retry-After": "0"}
+        if self.error_every and number % self.error_every == 0:
+            with self._lock:
+                self.injected_failures += 1
+            return 503, {"error": {"message": "Service unavailable."}}, {}
+        time.sleep((self.latency_ms + self.latency_ms_per_text * len(inputs)) / 1000)
+        dim = payload.get("dimensions") or self.dim
+        with self._lock:
+            self.texts += len(inputs)
+        return 200, {
+            "object": "list",
+            "data": [{"object": "embedding", "index": i, "embedding": mock_embedding(text, dim)} for i, text in enumerate(inputs)],
+            "model": payload.get("model"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }, {}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                with server._lock:
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                    if not self.path.rstrip("/").endswith("/embeddings"):
+                        status, payload, headers = 404, {"error": {"message": "Not found."}}, {}
+                    elif not self.headers.get("Authorization", "").startswith("Bearer "):
+                        status, payload, headers = 401, {"error": {"message": "Missing API key."}}, {}
+                    else:
+                        try:
+                            status, payload, headers = server._respond(json.loads(body))
+                        except json.JSONDecodeError:
+                            status, payload, headers = 400, {"error": {"message": "Body is not JSON."}}, {}
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve mock embeddings on an OpenAI-compatible /v1/embeddings endpoint.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--dim", type=int, default=1024, help="Dimension of the returned vectors.")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated latency per request.")
+    parser.add_argument("--latency-ms-per-text", type=float, default=0.5, help="Simulated latency per input text.")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every Nth request with HTTP 429.")
+    parser.add_argument("--error-every", type=int, default=0, help="Answer every Nth request with HTTP 503.")
+    args = parser.parse_args()
+    server = MockEmbeddingServer(
+        dim=args.dim, latency_ms=args.latency_ms, latency_ms_per_text=args.latency_ms_per_text,
+        rate_limit_every=args.rate_limit_every, error_every=args.error_every, port=args.port,
+    )
+    print(f"Serving mock embeddings at {server.base_url}/embeddings")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
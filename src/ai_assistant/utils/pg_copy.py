@@ -0,0 +1,43 @@
+# src/ai_assistant/utils/pg_copy.py
+import json
+import struct
+from typing import Any, BinaryIO, Iterable, Optional, Sequence
+
+# Fixed 11-byte signature followed by a zero flags field and a zero-length header extension.
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+
+def encode_text(value: str) -> bytes:
+    """Binary COPY representation of TEXT/VARCHAR: plain UTF-8 bytes."""
+    return value.encode("utf-8")
+
+def encode_jsonb(value: Any) -> bytes:
+    """Binary COPY representation of JSONB: a version byte (1) followed by the JSON text."""
+    return b"\x01" + json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def encode_vector(values: Sequence[float]) -> bytes:
+    """Binary COPY representation of a pgvector VECTOR: int16 dim, int16 unused, float32 values."""
+    return struct.pack(f">HH{len(values)}f", len(values), 0, *values)
+
+def encode_halfvec(values: Sequence[float]) -> bytes:
+    """Binary COPY representation of a pgvector HALFVEC: int16 dim, int16 unused, float16 values."""
+    return struct.pack(f">HH{len(values)}e", len(values), 0, *values)
+
+def write_copy_binary(rows: Iterable[Sequence[Optional[bytes]]], out: BinaryIO) -> int:
+    """
+    Writes rows of already-encoded fields in PostgreSQL's binary COPY format.
+    A field of None is written as SQL NULL. Returns the number of rows written.
+    """
+    out.write(PGCOPY_HEADER)
+    count = 0
+    for row in rows:
+        out.write(struct.pack(">h", len(row)))
+        for field in row:
+            if field is None:
+                out.write(struct.pack(">i", -1))
+            else:
+                out.write(struct.pack(">i", len(field)))
+                out.write(field)
+        count += 1
+    out.write(PGCOPY_TRAILER)
+    return count
@@ -0,0 +1,134 @@
+# tests/test_bulk_load.py
+import shutil
+import tempfile
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+from ai_assistant.config import ai_settings
+from ai_assistant.indexer import Indexer
+
+class _Result:
+    rowcount = 0
+
+    def scalar(self):
+        return 'r'
+
+class _RecordingEngine:
+    """Records every statement; catalog lookups report an existing ordinary table."""
+
+    def __init__(self):
+        self.statements = []
+
+    @contextmanager
+    def connect(self):
+        yield self
+
+    begin = connect
+
+    def execute(self, statement, params=None):
+        self.statements.append(" ".join(str(statement).split()))
+        return _Result()
+
+class _Provider:
+    provider_name = "stub"
+    model_name = "stub-embedding"
+    backend = None
+    cache_key = "stub-embedding-4"
+    embedding_dim = 4
+    dimensions = None
+
+    def get_embeddings(self, texts):
+        return [[1.0, 0.0, 0.0, 0.0] for _ in texts]
+
+class TestDeferredIndexBuild(unittest.TestCase):
+    """Verifies when a run loads into a fresh table, and how that table is built, swapped in or abandoned."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        for name, value in {"index_backend": "local", "export_snapshot": False, "deferred_index_build_ratio": 0.5}.items():
+            self.addCleanup(setattr, ai_settings.rag, name, getattr(ai_settings.rag, name))
+            setattr(ai_settings.rag, name, value)
+        for i in range(4):
+            (self.root / f"module_{i}.py").write_text(f"def function_{i}():\n    return {i}\n")
+        # Built with the local backend so nothing connects to PostgreSQL, then pointed at a recording engine.
+        self.indexer = Indexer(self.root, branch_override="main", embedding_provider=_Provider())
+        self.indexer.store = None
+        self.indexer.engine = _RecordingEngine()
+        self.indexer._database_ready = True
+        self.indexer._set_write_table(self.indexer.table_name)
+        self.indexer.state = {f"module_{i}.py": {"hash": "stale"} for i in range(10)}
+        self.build_table = self.indexer._index_name("build")
+
+    def files(self, *indexes):
+        return [(self.root / f"module_{i}.py", {"hash": str(i)}) for i in indexes]
+
+    def test_decision_follows_changed_share(self):
+        self.assertFalse(self.indexer._should_defer_index_build(False, self.files(0, 1, 2, 3)))
+        self.indexer.state = {f"module_{i}.py": {"hash": "stale"} for i in range(8)}
+        self.assertTrue(self.indexer._should_defer_index_build(False, self.files(0, 1, 2, 3)))
+        self.assertTrue(self.indexer._should_defer_index_build(True, self.files(0)))
+        self.assertFalse(self.indexer._should_defer_index_build(False, []))
+
+    def test_disabled_by_zero_ratio_and_shared_store(self):
+        ai_settings.rag.deferred_index_build_ratio = 0
+        self.assertFalse(self.indexer._should_defer_index_build(False, self.files(0, 1, 2, 3)))
+        ai_settings.rag.deferred_index_build_ratio = 0.5
+        self.indexer.shared_chunk_store = True
+        self.assertFalse(self.indexer._should_defer_index_build(True, self.files(0)))
+
+    def test_build_then_swap(self):
+        live = self.indexer.table_name
+
+        self.indexer._begin_bulk_load(False, self.files(0, 1))
+        self.assertEqual(self.indexer.write_table_name, self.build_table)
+        self.indexer._finish_bulk_load()
+
+        sql = self.indexer.engine.statements
+        self.assertEqual(sql[0], f"DROP TABLE IF EXISTS {self.build_table};")
+        self.assertTrue(sql[1].startswith(f"CREATE TABLE IF NOT EXISTS {self.build_table}"))
+        self.assertTrue(sql[2].startswith(f"INSERT INTO {self.build_table}") and f"FROM {live} WHERE NOT" in sql[2])
+        hnsw = next(i for i, s in enumerate(sql) if "USING hnsw" in s)
+        self.assertIn(f"ON {self.build_table}", sql[hnsw])
+        self.assertLess(hnsw, sql.index(f"ALTER TABLE {self.build_table} RENAME TO {live};"))
+        self.assertIn(f"ALTER INDEX {self.indexer._index_name('hnsw_idx', self.build_table)} RENAME TO {self.indexer._index_name('hnsw_idx')};", sql)
+        self.assertEqual(self.indexer.write_table_name, live)
+
+    def test_forced_rebuild_carries_nothing_over(self):
+        self.indexer._begin_bulk_load(True, self.files(0))
+
+        self.assertFalse(any(s.startswith("INSERT INTO") for s in self.indexer.engine.statements))
+
+    def test_failed_load_drops_build_table_and_restores_state(self):
+        self.addCleanup(setattr, ai_settings.rag, "checkpoint_every_files", ai_settings.rag.checkpoint_every_files)
+        self.addCleanup(setattr, ai_settings.rag, "checkpoint_interval_seconds", ai_settings.rag.checkpoint_interval_seconds)
+        ai_settings.rag.checkpoint_every_files, ai_settings.rag.checkpoint_interval_seconds = 0, 0
+        self.indexer.state = {}
+
+        with mock.patch.object(self.indexer, "_process_files", side_effect=RuntimeError("embedding failed")):
+            with self.assertRaises(RuntimeError):
+                self.indexer.run(upload_artifacts=False)
+
+        sql = self.indexer.engine.statements
+        self.assertEqual(sql[-1], f"DROP TABLE IF EXISTS {self.build_table};")
+        self.assertFalse(any("RENAME" in s for s in sql))
+        self.assertEqual(self.indexer.write_table_name, self.indexer.table_name)
+        self.assertEqual(self.indexer.state, {})
+
+    def test_interrupted_load_keeps_build_table_for_resume(self):
+        self.indexer.state = {}
+
+        with mock.patch.object(self.indexer, "_process_files", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.indexer.run(upload_artifacts=False)
+
+        self.assertEqual(self.indexer.engine.statements.count(f"DROP TABLE IF EXISTS {self.build_table};"), 1)
+        checkpoint = self.indexer._load_checkpoint()
+        self.assertTrue(checkpoint["bulk_load"])
+        self.assertEqual(checkpoint["write_table"], self.build_table)
+        self.assertEqual(self.indexer.write_table_name, self.indexer.table_name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# tests/test_chunker.py
+import unittest
+from pathlib import Path
+
+from ai_assistant.chunker import PythonChunker, chunk_file, split_lines_by_tokens
+
+PYTHON_SOURCE = '''"""Module docstring for the sample."""
+import os
+
+CONSTANT = os.getenv("SAMPLE_CONSTANT", "default-value")
+
+class Service:
+    """Handles requests for the sample service."""
+    retries = 3
+
+    def handle(self, request):
+        payload = request.get("payload")
+        return self._process(payload)
+
+    @staticmethod
+    def _process(payload):
+        return {"processed": payload, "status": "ok"}
+
+def main():
+    service = Service()
+    print(service.handle({"payload": "hello world"}))
+
+if __name__ == "__main__":
+    main()
+'''
+
+class TestPythonChunker(unittest.TestCase):
+    """Verifies the hierarchical Python chunker emits non-overlapping, linked chunks."""
+
+    def setUp(self):
+        self.chunks = PythonChunker(max_tokens=512).chunk(PYTHON_SOURCE)
+        self.by_name = {c['metadata']['name']: c for c in self.chunks if c['metadata']['entity_type'] != 'module_code'}
+
+    def test_methods_are_not_embedded_twice(self):
+        for needle in ('return self._process(payload)', '"processed": payload'):
+            self.assertEqual(sum(needle in c['text'] for c in self.chunks), 1, needle)
+
+    def test_class_skeleton_and_parent_links(self):
+        skeleton = self.by_name['Service']
+        self.assertIn('retries = 3', skeleton['text'])
+        self.assertIn('def handle(self, request):', skeleton['text'])
+        self.assertIn('@staticmethod', skeleton['text'])
+
+        skeleton_index = self.chunks.index(skeleton)
+        for method in ('Service.handle', 'Service._process'):
+            self.assertEqual(self.by_name[method]['metadata']['entity_type'], 'method')
+            self.assertEqual(self.by_name[method]['metadata']['parent_index'], skeleton_index)
+        self.assertTrue(self.by_name['Service._process']['text'].startswith('    @staticmethod'))
+
+    def test_module_code_between_definitions(self):
+        module_chunks = [c['text'] for c in self.chunks if c['metadata']['entity_type'] == 'module_code']
+        self.assertEqual(len(module_chunks), 2)
+        self.assertIn('CONSTANT = ', module_chunks[0])
+        self.assertIn('if __name__ == "__main__":', module_chunks[1])
+
+    def test_oversized_definition_is_split_on_lines(self):
+        body = "\n".join(f"    value_{i} = compute_something_expensive({i})" for i in range(200))
+        chunks = PythonChunker(max_tokens=64).chunk(f"def big():\n{body}\n")
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(c['metadata']['name'] == 'big' for c in chunks))
+        self.assertTrue(all(len(c['text']) <= 64 * 4 for c in chunks))
+        self.assertEqual("\n".join(c['text'] for c in chunks), f"def big():\n{body}")
+
+    def test_syntax_error_falls_back_to_line_chunks(self):
+        chunks = chunk_file("def broken(:\n    pass but this is long enough\n", Path("broken.py"), max_tokens=512)
+        self.assertEqual([c['metadata']['entity_type'] for c in chunks], ['file'])
+
+    def test_split_lines_by_tokens_cuts_long_lines(self):
+        parts = split_lines_by_tokens([(1, "x" * 100)], max_tokens=10)
+        self.assertEqual([len(text) for _, _, text in parts], [40, 40, 20])
+
+class TestStructuredChunkers(unittest.TestCase):
+    """Verifies chunk boundaries follow document and code structure for non-Python files."""
+
+    def test_markdown_sections_ignore_headings_in_code(self):
+        text = "# Guide\n\nIntro paragraph for the guide.\n\n```bash\n# not a heading\n```\n\n## Setup\n\n" + "Install the package. " * 40
+        chunks = chunk_file(text, Path("guide.md"), max_tokens=64, language="markdown")
+        names = [c['metadata']['name'] for c in chunks]
+        self.assertEqual(names[0], "Guide")
+        self.assertTrue(all(name.startswith("Guide") for name in names))
+        self.assertIn("Guide > Setup", names)
+        self.assertIn("# not a heading", chunks[0]['text'])
+
+    def test_yaml_splits_on_top_level_keys(self):
+        text = "# Model settings\nmodel:\n  name: " + "x" * 200 + "\n  size: large\nrag:\n  enabled: true\n  top_n: 5\n"
+        chunks = chunk_file(text, Path("config.yml"), max_tokens=64, language="yaml")
+        self.assertEqual([c['metadata']['name'] for c in chunks], ["model", "rag"])
+        self.assertTrue(chunks[0]['text'].startswith("# Model settings"))
+
+    def test_braced_source_splits_on_blocks(self):
+        methods = "\n".join(f"  method{i}() {{\n    return compute({i}, '}}');\n  }}" for i in range(12))
+        text = f"import x from 'y';\n\n// Adds numbers\nfunction add(a, b) {{\n  return a + b;\n}}\n\nclass Widget {{\n{methods}\n}}\n"
+        chunks = chunk_file(text, Path("widget.js"), max_tokens=64, language="javascript")
+        self.assertGreater(len(chunks), 1)
+        for i in range(12):
+            method = f"  method{i}() {{\n    return compute({i}, '}}');\n  }}"
+            self.assertEqual(sum(method in c['text'] for c in chunks), 1, method)
+        self.assertIn("// Adds numbers\nfunction add(a, b) {", "\n".join(c['text'] for c in chunks))
+        self.assertTrue(any('method5' == c['metadata']['name'] for c in chunks))
+
+if __name__ == '__main__':
+    unittest.main()
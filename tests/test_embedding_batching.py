@@ -0,0 +1,56 @@
+# tests/test_embedding_batching.py
+import unittest
+
+import numpy as np
+
+from ai_assistant.config import ai_settings
+from ai_assistant.indexer import EmbeddingProvider, plan_token_batches
+
+class _LengthModel:
+    """Stands in for a SentenceTransformer: the 'embedding' of a text is its length, and calls are recorded."""
+    max_seq_length = 512
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size, show_progress_bar):
+        self.calls.append(list(texts))
+        return np.array([[float(len(t)), 1.0] for t in texts])
+
+class TestEmbeddingBatching(unittest.TestCase):
+    """Verifies length-bucketed, token-budgeted batching of local embeddings."""
+
+    def test_batches_respect_budget_and_cover_every_text(self):
+        lengths = [5, 300, 12, 80, 300, 7, 40]
+        batches = plan_token_batches(lengths, token_budget=600, max_batch_size=8)
+
+        self.assertCountEqual([i for batch in batches for i in batch], range(len(lengths)))
+        for batch in batches:
+            self.assertLessEqual(len(batch) * max(lengths[i] for i in batch), 600)
+            self.assertEqual(lengths[batch[0]], max(lengths[i] for i in batch))
+
+    def test_oversized_text_gets_its_own_batch(self):
+        self.assertEqual(plan_token_batches([1000, 10, 10], token_budget=100, max_batch_size=8), [[0], [1, 2]])
+
+    def test_max_batch_size(self):
+        self.assertEqual([len(b) for b in plan_token_batches([1] * 5, token_budget=100, max_batch_size=2)], [2, 2, 1])
+
+    def test_encode_restores_input_order(self):
+        provider = EmbeddingProvider.__new__(EmbeddingProvider)
+        provider.model = _LengthModel()
+        provider.dimensions = None
+        texts = ["a" * n for n in (10, 2000, 40, 400, 3)]
+
+        original = (ai_settings.rag.embedding_batch_token_budget, ai_settings.rag.embedding_max_batch_size)
+        ai_settings.rag.embedding_batch_token_budget, ai_settings.rag.embedding_max_batch_size = 600, 64
+        try:
+            vectors = provider._encode_local(texts)
+        finally:
+            ai_settings.rag.embedding_batch_token_budget, ai_settings.rag.embedding_max_batch_size = original
+
+        self.assertEqual([v[0] for v in vectors], [float(len(t)) for t in texts])
+        self.assertEqual(provider.model.calls[0], ["a" * 2000])
+        self.assertGreater(len(provider.model.calls), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+# tests/test_embedding_cache.py
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_assistant.embedding_cache import EmbeddingCache
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Verifies that the content-addressed embedding cache round-trips vectors across instances."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.cache_path = self.temp_dir / "embedding_cache.sqlite"
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip_and_persistence(self):
+        cache = EmbeddingCache(self.cache_path)
+        cache.put_many({"a": [0.5, -1.0], "b": [2.0, 0.25]})
+        cache.close()
+
+        reopened = EmbeddingCache(self.cache_path)
+        found = reopened.get_many(["a", "b", "missing"])
+        reopened.close()
+
+        self.assertEqual(found, {"a": [0.5, -1.0], "b": [2.0, 0.25]})
+
+    def test_lookup_larger_than_parameter_limit(self):
+        cache = EmbeddingCache(self.cache_path)
+        vectors = {f"h{i}": [float(i)] for i in range(1200)}
+        cache.put_many(vectors)
+        self.assertEqual(cache.get_many(vectors.keys()), vectors)
+        cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# tests/test_file_sniffer.py
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_assistant.utils.file_sniffer import SNIFF_BYTES, read_text, sniff_and_hash, sniff_bytes
+
+class TestFileSniffer(unittest.TestCase):
+    """Verifies which files the indexer skips before reading them, and that mmap reads match buffered ones."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name: str, data: bytes) -> Path:
+        path = self.temp_dir / name
+        path.write_bytes(data)
+        return path
+
+    def test_text_is_kept(self):
+        self.assertIsNone(sniff_bytes(b"def main():\n\treturn 0\n"))
+        self.assertIsNone(sniff_bytes("naïve café ✓\n".encode("utf-8")))
+        self.assertIsNone(sniff_bytes("Grüße aus Köln\n".encode("latin-1")))
+        self.assertIsNone(sniff_bytes(b""))
+
+    def test_multibyte_character_split_by_block_end_is_text(self):
+        head = ("x" * (SNIFF_BYTES - 1) + "é").encode("utf-8")[:SNIFF_BYTES]
+        self.assertIsNone(sniff_bytes(head))
+
+    def test_binary_is_skipped(self):
+        self.assertEqual(sniff_bytes(b"\x89PNG\r\n\x1a\n" + b"IHDR"), "binary")
+        self.assertEqual(sniff_bytes(b"abc\0def"), "binary")
+        self.assertEqual(sniff_bytes(bytes(range(1, 256)) * 16), "binary")
+
+    def test_size_limit(self):
+        path = self._write("big.txt", b"a" * 100)
+        self.assertEqual(sniff_and_hash(path, max_bytes=99), (None, "too_large"))
+        self.assertIsNotNone(sniff_and_hash(path, max_bytes=100)[0])
+
+    def test_hash_matches_sha256_with_and_without_mmap(self):
+        data = b"line\n" * (SNIFF_BYTES // 2)
+        path = self._write("text.txt", data)
+        expected = hashlib.sha256(data).hexdigest()
+        self.assertEqual(sniff_and_hash(path), (expected, None))
+        self.assertEqual(sniff_and_hash(path, mmap_threshold=1), (expected, None))
+
+    def test_read_text_matches_path_read_text(self):
+        data = "first\r\nsecond\rthird\n".encode("utf-8") * 1000 + b"\xff tail"
+        path = self._write("mixed.txt", data)
+        expected = path.read_text(encoding="utf-8", errors="ignore")
+        self.assertEqual(read_text(path), expected)
+        self.assertEqual(read_text(path, mmap_threshold=os.path.getsize(path)), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# tests/test_halfvec_reads.py
+import unittest
+from collections import namedtuple
+from contextlib import contextmanager
+
+from pgvector.sqlalchemy import HALFVEC, VECTOR
+
+from ai_assistant.indexer import Indexer, embedding_to_list
+
+_Row = namedtuple("_Row", "chunk_hash embedding")
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+    def mappings(self):
+        return self
+
+    def partitions(self):
+        yield [row._asdict() for row in self._rows]
+
+class _FakeEngine:
+    """Returns `rows` for any query; their embeddings are built with pgvector's own result processor."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @contextmanager
+    def connect(self):
+        yield self
+
+    def execution_options(self, **options):
+        return self
+
+    def execute(self, statement, params=None):
+        return _Result(self.rows)
+
+def _db_value(column_type, text):
+    """What SQLAlchemy hands back for `text` read from a column of `column_type`."""
+    return column_type.result_processor(None, None)(text)
+
+class TestHalfvecReads(unittest.TestCase):
+    """Verifies that stored vectors are read back as float lists for both storage types."""
+
+    def make_indexer(self, storage_type: str, rows) -> Indexer:
+        indexer = Indexer.__new__(Indexer)
+        indexer.store, indexer.shared_chunk_store = None, False
+        indexer.table_name = "codebase_collection_project_main"
+        indexer.vector_storage_type = storage_type
+        indexer.active_provider = type("Provider", (), {"embedding_dim": 3})()
+        indexer.engine = _FakeEngine(rows)
+        return indexer
+
+    def test_conversion(self):
+        for column_type in (HALFVEC(3), VECTOR(3)):
+            with self.subTest(column_type=column_type.get_col_spec()):
+                self.assertEqual(embedding_to_list(_db_value(column_type, "[0.5,0.25,1]")), [0.5, 0.25, 1.0])
+
+    def test_reused_halfvec_embeddings(self):
+        indexer = self.make_indexer("halfvec", [_Row("h1", _db_value(HALFVEC(3), "[0.5,0.25,1]"))])
+
+        self.assertEqual(indexer._fetch_existing_embeddings(["h1"]), {"h1": [0.5, 0.25, 1.0]})
+
+    def test_exported_halfvec_rows(self):
+        indexer = self.make_indexer("halfvec", [_Row("h1", _db_value(HALFVEC(3), "[0.5,0.25,1]"))])
+
+        batches = list(indexer._iter_index_rows())
+
+        self.assertEqual(batches, [[{"chunk_hash": "h1", "embedding": [0.5, 0.25, 1.0]}]])
+
+if __name__ == '__main__':
+    unittest.main()
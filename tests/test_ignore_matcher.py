@@ -0,0 +1,56 @@
+# tests/test_ignore_matcher.py
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_assistant.utils.ignore_matcher import IgnoreMatcher
+
+class TestIgnoreMatcher(unittest.TestCase):
+    """Exercises the .gitignore semantics the indexer relies on when walking a project."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _write(self, rel_path: str, content: str = "x"):
+        path = self.root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    def test_unanchored_and_anchored_patterns(self):
+        matcher = IgnoreMatcher(self.root, ["*.log", "/build", "docs/*.md"])
+        self.assertTrue(matcher.is_ignored("a/b/debug.log"))
+        self.assertTrue(matcher.is_ignored("build", is_dir=True))
+        self.assertFalse(matcher.is_ignored("src/build", is_dir=True))
+        self.assertTrue(matcher.is_ignored("docs/index.md"))
+        self.assertFalse(matcher.is_ignored("docs/api/index.md"))
+
+    def test_negation_last_match_wins(self):
+        matcher = IgnoreMatcher(self.root, ["*.md", "!README.md"])
+        self.assertTrue(matcher.is_ignored("CHANGES.md"))
+        self.assertFalse(matcher.is_ignored("README.md"))
+
+    def test_double_star_and_directory_only(self):
+        matcher = IgnoreMatcher(self.root, ["**/fixtures/**", "cache/"])
+        self.assertTrue(matcher.is_ignored("tests/unit/fixtures/data.json"))
+        self.assertFalse(matcher.is_ignored("tests/unit/fixtures", is_dir=True))
+        self.assertTrue(matcher.is_ignored("cache", is_dir=True))
+        self.assertFalse(matcher.is_ignored("cache"))
+
+    def test_per_directory_ignore_files_and_walk(self):
+        self._write(".aiignore", "*.tmp\n")
+        self._write("pkg/.gitignore", "generated/\n!keep.tmp\n")
+        for rel_path in ("a.py", "b.tmp", "pkg/c.py", "pkg/keep.tmp", "pkg/drop.tmp", "pkg/generated/d.py", "other/generated/e.py"):
+            self._write(rel_path)
+
+        matcher = IgnoreMatcher(self.root)
+        walked = sorted(p.relative_to(self.root).as_posix() for p in matcher.walk())
+
+        self.assertEqual(walked, [".aiignore", "a.py", "other/generated/e.py", "pkg/.gitignore", "pkg/c.py", "pkg/keep.tmp"])
+        self.assertTrue(matcher.is_path_ignored("pkg/generated/d.py"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+# tests/test_index_merkle.py
+import unittest
+
+from ai_assistant.index_merkle import MERKLE_FORMAT_VERSION, build_tree, content_hashes, diff_manifests, diff_trees, update_tree
+
+class TestIndexMerkle(unittest.TestCase):
+    """Verifies the manifest Merkle tree and that diffs only report what changed."""
+
+    def setUp(self):
+        self.files = {
+            "src/app/main.py": ("h-main", ["c1", "c2"]),
+            "src/app/util.py": ("h-util", ["c3"]),
+            "docs/guide.md": ("h-guide", ["c4", "c5"]),
+            "README.md": ("h-readme", []),
+        }
+
+    def test_root_hash_is_deterministic_and_content_sensitive(self):
+        tree = build_tree(self.files)
+        self.assertEqual(tree["hash"], build_tree(dict(reversed(list(self.files.items()))))["hash"])
+        reordered = dict(self.files, **{"src/app/main.py": ("h-main", ["c2", "c1"])})
+        self.assertNotEqual(tree["hash"], build_tree(reordered)["hash"])
+        self.assertEqual(tree["children"]["docs"]["hash"], build_tree(reordered)["children"]["docs"]["hash"])
+
+    def test_identical_trees_have_empty_diff(self):
+        diff = diff_trees(build_tree(self.files), build_tree(self.files))
+        self.assertEqual(diff, {"added": [], "removed": [], "modified": [], "new_chunks": []})
+
+    def test_diff_reports_changed_files_and_new_chunks(self):
+        new_files = dict(self.files)
+        new_files["src/app/main.py"] = ("h-main2", ["c1", "c9"])
+        new_files["src/app/extra/new.py"] = ("h-new", ["c10", "c3"])
+        del new_files["docs/guide.md"]
+        diff = diff_trees(build_tree(self.files), build_tree(new_files))
+        self.assertEqual(diff["added"], ["src/app/extra/new.py"])
+        self.assertEqual(diff["removed"], ["docs/guide.md"])
+        self.assertEqual(diff["modified"], ["src/app/main.py"])
+        self.assertEqual(diff["new_chunks"], ["c10", "c3", "c9"])
+
+    def test_file_replaced_by_directory(self):
+        new_files = dict(self.files)
+        del new_files["README.md"]
+        new_files["README.md/index.md"] = ("h-index", ["c11"])
+        diff = diff_trees(build_tree(self.files), build_tree(new_files))
+        self.assertEqual((diff["added"], diff["removed"], diff["modified"]), (["README.md/index.md"], ["README.md"], []))
+
+    def test_incremental_update_matches_full_build(self):
+        tree = build_tree(self.files)
+        new_files = dict(self.files)
+        new_files["src/app/main.py"] = ("h-main2", ["c1", "c9"])
+        new_files["lib/new.py"] = ("h-new", ["c10"])
+        del new_files["docs/guide.md"]
+        update_tree(tree, {"src/app/main.py": new_files["src/app/main.py"], "lib/new.py": new_files["lib/new.py"], "docs/guide.md": None})
+        self.assertEqual(tree, build_tree(new_files))
+        self.assertNotIn("docs", tree["children"])
+        self.assertEqual(content_hashes(tree), {path: leaf[0] for path, leaf in new_files.items()})
+
+    def test_manifests_without_tree_are_rejected(self):
+        manifest = {"merkle_tree": {"format_version": MERKLE_FORMAT_VERSION, "root": build_tree(self.files)}}
+        self.assertEqual(diff_manifests(manifest, manifest)["modified"], [])
+        with self.assertRaises(ValueError):
+            diff_manifests({"merkle_tree": None}, manifest)
+
+if __name__ == '__main__':
+    unittest.main()
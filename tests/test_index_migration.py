@@ -0,0 +1,89 @@
+# tests/test_index_migration.py
+import unittest
+from contextlib import contextmanager
+
+from ai_assistant.indexer import Indexer
+
+class _Result:
+    def __init__(self, scalar=None, rows=(), rowcount=0):
+        self._scalar, self._rows, self.rowcount = scalar, list(rows), rowcount
+
+    def scalar(self):
+        return self._scalar
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+class _FakeConnection:
+    """Answers the catalog queries of `_setup_database_table` for an existing legacy table and records every statement."""
+
+    def __init__(self, table_name: str, vector_sql_type: str, hnsw_indexes):
+        self.table_name, self.vector_sql_type, self.hnsw_indexes = table_name, vector_sql_type, hnsw_indexes
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        if "FROM pg_class" in sql:
+            return _Result(scalar='r')
+        if "format_type" in sql:
+            return _Result(scalar=self.vector_sql_type)
+        if "FROM pg_indexes" in sql:
+            return _Result(rows=[name for name in self.hnsw_indexes if name != params["keep"]])
+        return _Result()
+
+class _FakeEngine:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @contextmanager
+    def connect(self):
+        yield self.conn
+
+    begin = connect
+
+class TestLegacyTableMigration(unittest.TestCase):
+    """Verifies that migrating a legacy table leaves exactly one HNSW index behind."""
+
+    def test_unnamed_hnsw_indexes_are_dropped(self):
+        indexer = Indexer.__new__(Indexer)
+        indexer.store, indexer.shared_chunk_store = None, False
+        indexer.table_name = "codebase_collection_project_main"
+        indexer.vector_storage_type, indexer.vector_sql_type = "vector", "vector(8)"
+        keep = indexer._index_name("hnsw_idx")
+        conn = _FakeConnection(indexer.table_name, indexer.vector_sql_type, [
+            f"{indexer.table_name}_embedding_idx", f"{indexer.table_name}_embedding_idx1", keep,
+        ])
+        indexer.engine = _FakeEngine(conn)
+
+        indexer._setup_database_table()
+
+        drops = [sql for sql in conn.statements if sql.startswith("DROP INDEX")]
+        self.assertEqual(drops, [
+            f'DROP INDEX IF EXISTS "{indexer.table_name}_embedding_idx";',
+            f'DROP INDEX IF EXISTS "{indexer.table_name}_embedding_idx1";',
+        ])
+        hnsw_creates = [sql for sql in conn.statements if "USING hnsw" in sql and sql.startswith("CREATE INDEX")]
+        self.assertEqual(len(hnsw_creates), 1)
+        self.assertIn(keep, hnsw_creates[0])
+        # Stale graphs go before the named one is (re)created.
+        self.assertLess(conn.statements.index(drops[-1]), conn.statements.index(hnsw_creates[0]))
+
+class TestIndexNames(unittest.TestCase):
+    """Verifies that generated index names fit PostgreSQL's identifier limit and stay distinct."""
+
+    def test_long_table_names(self):
+        indexer = Indexer.__new__(Indexer)
+        indexer.table_name = "codebase_collection_" + "a_very_long_project_name" * 3 + "_main"
+        suffixes = ("pkey", "source_idx", "chunk_hash_idx", "language_idx", "hnsw_idx", "chunks_hnsw_idx", "build")
+        names = [indexer._index_name(suffix) for suffix in suffixes]
+
+        self.assertTrue(all(len(name.encode('utf-8')) <= 63 for name in names))
+        self.assertEqual(len(set(names)), len(names))
+        self.assertNotEqual(indexer._index_name("source_idx"), indexer._index_name("source_idx", indexer.table_name + "_x"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# tests/test_index_queue.py
+import unittest
+from contextlib import contextmanager
+
+from ai_assistant.index_queue import IndexWorkQueue
+
+class _Result:
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+
+class _LeaseEngine:
+    """Stands in for PostgreSQL on the guarded updates: a row matches only for the worker holding the claim."""
+
+    def __init__(self, owner: str):
+        self.owner, self.status = owner, "claimed"
+        self.statements = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        matched = params["worker_id"] == self.owner and self.status == "claimed"
+        if matched:
+            self.status = "done" if "'done'" in sql else "pending"
+        return _Result(int(matched))
+
+class TestIndexWorkQueuePartition(unittest.TestCase):
+    """Verifies how changed files are cut into worker jobs."""
+
+    def test_batches_cover_every_file_once(self):
+        items = [(f"src/pkg/module_{i}.py", {"hash": str(i)}) for i in range(10)]
+        batches = IndexWorkQueue.partition(items, 3)
+
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 3, 1])
+        self.assertCountEqual([item for batch in batches for item in batch], items)
+
+    def test_order_depends_on_path_hash_not_input_order(self):
+        items = [(f"docs/page_{i}.md", {"hash": str(i)}) for i in range(8)]
+        self.assertEqual(IndexWorkQueue.partition(items, 4), IndexWorkQueue.partition(list(reversed(items)), 4))
+        self.assertNotEqual([path for path, _ in IndexWorkQueue.partition(items, 8)[0]], sorted(path for path, _ in items))
+
+    def test_no_files_no_jobs(self):
+        self.assertEqual(IndexWorkQueue.partition([], 64), [])
+
+class TestIndexWorkQueueLeases(unittest.TestCase):
+    """Verifies that a worker whose lease was taken over cannot overwrite the new owner's job."""
+
+    def test_status_index_name_fits_postgres_limit(self):
+        long_name = "codebase_collection_" + "x" * 40 + "_queue"
+        names = {IndexWorkQueue(None, long_name + suffix).status_index_name for suffix in ("a", "b")}
+        self.assertEqual(len(names), 2)
+        self.assertTrue(all(len(name.encode('utf-8')) <= 63 for name in names))
+
+    def test_complete_only_by_current_owner(self):
+        engine = _LeaseEngine(owner="host-b:2")
+        queue = IndexWorkQueue(engine, "queue")
+
+        self.assertEqual(queue.complete(7, "host-a:1", {"files": 3}), 0)
+        self.assertEqual(engine.status, "claimed")
+        self.assertEqual(queue.complete(7, "host-b:2", {"files": 3}), 1)
+        self.assertIn("claimed_by = :worker_id AND status = 'claimed'", engine.statements[-1])
+
+    def test_fail_only_by_current_owner(self):
+        engine = _LeaseEngine(owner="host-b:2")
+        queue = IndexWorkQueue(engine, "queue")
+
+        self.assertEqual(queue.fail(7, "host-a:1", "boom", 3), 0)
+        self.assertEqual(engine.status, "claimed")
+        self.assertEqual(queue.fail(7, "host-b:2", "boom", 3), 1)
+        self.assertEqual(engine.status, "pending")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# tests/test_index_snapshot.py
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_assistant.index_snapshot import IndexSnapshot, SnapshotWriter, pack_snapshot, unpack_snapshot
+
+class TestIndexSnapshot(unittest.TestCase):
+    """Verifies that an exported snapshot survives packing and is searchable from its memory maps."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _export(self, storage_type: str = "vector") -> Path:
+        writer = SnapshotWriter(self.temp_dir / "export", dim=2, storage_type=storage_type)
+        writer.add([
+            {"id": "a.py:0", "content": "alpha", "metadata": {"source": "a.py"}, "embedding": [1.0, 0.0], "source": "a.py", "chunk_hash": "h0", "language": "python"},
+            {"id": "b.md:0", "content": "βeta ✓", "metadata": {"source": "b.md"}, "embedding": [0.0, 1.0], "source": "b.md", "chunk_hash": "h1", "language": None},
+        ])
+        writer.add([{"id": "c.py:0", "content": "", "metadata": {}, "embedding": [0.7, 0.7], "source": "c.py", "chunk_hash": "h2", "language": "python"}])
+        manifest = writer.close(branch="main")
+        self.assertEqual((manifest["rows"], manifest["branch"]), (3, "main"))
+        return pack_snapshot(self.temp_dir / "export", self.temp_dir / "snapshot.tar.gz")
+
+    def test_round_trip_through_archive(self):
+        snapshot = IndexSnapshot(unpack_snapshot(self._export(), self.temp_dir / "client"))
+        try:
+            self.assertEqual(snapshot.value("content", 1), "βeta ✓")
+            self.assertEqual(snapshot.value("language", 1), "")
+            self.assertEqual(snapshot.value("content", 2), "")
+            hits = snapshot.search([0.1, 1.0], k=2)
+            self.assertEqual([hit["id"] for hit in hits], ["b.md:0", "c.py:0"])
+            self.assertEqual(hits[0]["metadata"], {"source": "b.md"})
+        finally:
+            snapshot.close()
+
+    def test_halfvec_snapshot(self):
+        snapshot = IndexSnapshot(unpack_snapshot(self._export("halfvec"), self.temp_dir / "client"))
+        try:
+            self.assertEqual(snapshot.vectors.dtype.str, "<f2")
+            self.assertEqual(snapshot.search([1.0, 0.0], k=1)[0]["id"], "a.py:0")
+        finally:
+            snapshot.close()
+
+    def test_corrupted_file_is_rejected(self):
+        archive = self._export()
+        unpack_snapshot(archive, self.temp_dir / "client")
+        with open(self.temp_dir / "export" / "vectors.bin", "r+b") as f:
+            f.write(b"\xff")
+        pack_snapshot(self.temp_dir / "export", archive)
+        with self.assertRaises(ValueError):
+            unpack_snapshot(archive, self.temp_dir / "client")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+# tests/test_index_state.py
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_assistant.index_state import SQLiteStateStore
+
+class TestSQLiteStateStore(unittest.TestCase):
+    """Verifies incremental saves, the state.json export and importing a state.json written elsewhere."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.json_path = self.temp_dir / "state.json"
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _open(self) -> SQLiteStateStore:
+        return SQLiteStateStore(self.temp_dir / "state.sqlite", self.json_path)
+
+    def test_save_upserts_only_changes_and_exports_json(self):
+        store = self._open()
+        self.assertEqual(store.load(), {})
+        state = {
+            "a.py": {"hash": "h1", "size": 10, "mtime_ns": 1, "inode": 7, "chunks": 2, "commit": "abc"},
+            "b.md": {"hash": "h2", "size": 5, "mtime_ns": 2, "inode": 8, "chunks": 0},
+        }
+        self.assertEqual(store.save(state), 2)
+        self.assertEqual(store.save(state), 0)
+        del state["b.md"]
+        state["a.py"] = dict(state["a.py"], mtime_ns=3)
+        self.assertEqual(store.save(state), 2)
+        store.export_json()
+        self.assertEqual(json.loads(self.json_path.read_text()), state)
+        store.close()
+        reopened = self._open()
+        self.assertEqual(reopened.load(), state)
+        reopened.close()
+
+    def test_export_is_skipped_when_json_is_current(self):
+        store = self._open()
+        store.save({"a.py": {"hash": "h1"}})
+        store.export_json()
+        before = self.json_path.stat().st_mtime_ns
+        store.export_json()
+        self.assertEqual(self.json_path.stat().st_mtime_ns, before)
+        store.close()
+
+    def test_foreign_state_json_is_imported(self):
+        store = self._open()
+        store.save({"old.py": {"hash": "h0"}})
+        store.export_json()
+        store.close()
+        # A state.json downloaded by CI replaces whatever the local database held; legacy path -> hash entries are upgraded.
+        self.json_path.write_text(json.dumps({"a.py": "h1", "b.py": {"hash": "h2", "size": 3}}))
+        os.utime(self.json_path, ns=(1, 1))
+        store = self._open()
+        self.assertEqual(store.load(), {"a.py": {"hash": "h1"}, "b.py": {"hash": "h2", "size": 3}})
+        store.close()
+
+if __name__ == '__main__':
+    unittest.main()
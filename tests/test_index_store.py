@@ -0,0 +1,89 @@
+# tests/test_index_store.py
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_assistant import index_store
+from ai_assistant.index_store import LocalVectorStore
+
+def _rows(source: str, vectors):
+    return [
+        {
+            "id": f"{source}:{i}",
+            "content": f"{source} chunk {i}",
+            "metadata": {"source": source, "chunk_index": i},
+            "embedding": vector,
+            "source": source,
+            "chunk_hash": f"{source}#{i}",
+            "language": "python",
+        }
+        for i, vector in enumerate(vectors)
+    ]
+
+class TestLocalVectorStore(unittest.TestCase):
+    """Verifies incremental replace/delete, reopening and search of the embedded index store."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.path = self.temp_dir / "store"
+        self.store = LocalVectorStore(self.path, dim=3)
+        self.store.setup()
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_replace_delete_and_search(self):
+        self.store.replace_files([("a.py", _rows("a.py", [[1, 0, 0], [0, 1, 0]])), ("b.py", _rows("b.py", [[0, 0, 1]]))])
+        self.store.replace_files([("a.py", _rows("a.py", [[0.9, 0.1, 0]]))])
+        self.store.delete_sources(["b.py"])
+
+        hits = self.store.search([1, 0, 0], k=5)
+        self.assertEqual([hit["id"] for hit in hits], ["a.py:0"])
+        self.assertEqual(hits[0]["metadata"]["source"], "a.py")
+        self.assertEqual(self.store.fetch_embeddings(["a.py#0", "a.py#1", "b.py#0"]).keys(), {"a.py#0"})
+
+    def test_reader_sees_flushed_store(self):
+        self.store.replace_files([("a.py", _rows("a.py", [[1, 0, 0], [0, 1, 0]]))])
+        self.store.flush()
+
+        reader = LocalVectorStore.load(self.path)
+        try:
+            self.assertEqual(reader.search([0, 1, 0], k=1)[0]["id"], "a.py:1")
+        finally:
+            reader.close()
+
+    def test_uncommitted_vectors_are_truncated_on_open(self):
+        self.store.replace_files([("a.py", _rows("a.py", [[1, 0, 0]]))])
+        with open(self.store.vectors_path, 'ab') as f:
+            f.write(b"\0" * 12)
+        self.store.close()
+
+        self.store.setup()
+        self.assertEqual(self.store.vectors_path.stat().st_size, 12)
+
+    def test_incompatible_store_requires_reset(self):
+        self.store.close()
+        other = LocalVectorStore(self.path, dim=4)
+        with self.assertRaises(ValueError):
+            other.setup()
+        other.setup(reset=True)
+        other.close()
+
+    def test_compaction_keeps_live_rows(self):
+        original = index_store._COMPACT_MIN_ROWS
+        index_store._COMPACT_MIN_ROWS = 1
+        try:
+            self.store.replace_files([(f"{n}.py", _rows(f"{n}.py", [[n, 1, 0]])) for n in range(4)])
+            self.store.delete_sources(["0.py", "1.py", "2.py"])
+            self.store.flush()
+        finally:
+            index_store._COMPACT_MIN_ROWS = original
+
+        self.assertEqual(self.store.rows, 1)
+        self.assertEqual(self.store.fetch_embeddings(["3.py#0"]), {"3.py#0": [3.0, 1.0, 0.0]})
+        self.assertEqual(self.store.search([3, 1, 0], k=1)[0]["id"], "3.py:0")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+# tests/test_index_watcher.py
+import shutil
+import threading
+import time
+import unittest
+from unittest import mock
+
+from watchdog.events import DirMovedEvent, FileClosedNoWriteEvent, FileModifiedEvent
+
+from ai_assistant.index_watcher import IndexWatcher
+
+from .test_indexer_runs import _IndexerRunTestCase
+
+class _WatcherTestCase(_IndexerRunTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("pkg/a.py", 0)
+        self.write("pkg/old_dir/b.py", 1)
+        self.write("pkg/old_dir/c.py", 2)
+        (self.root / ".gitignore").write_text("*.tmp\n")
+        self.indexer = self.make_indexer()
+        self.indexer.run(upload_artifacts=False)
+        self.watcher = IndexWatcher(self.indexer, debounce_seconds=0.2, max_delay_seconds=1.0)
+        self.collector = self.watcher._collector
+
+    def event(self, event_class, *rel_paths):
+        self.collector.on_any_event(event_class(*(str(self.root.resolve() / p) for p in rel_paths)))
+
+class TestEventCollection(_WatcherTestCase):
+    """Verifies how raw filesystem events are coalesced and waited on."""
+
+    def test_events_are_coalesced_into_relative_paths(self):
+        self.event(FileModifiedEvent, "pkg/a.py")
+        self.event(FileModifiedEvent, "pkg/a.py")
+        self.event(DirMovedEvent, "pkg/old_dir", "pkg/new_dir")
+        self.event(FileClosedNoWriteEvent, "pkg/ignored_read.py")
+        self.collector.on_any_event(FileModifiedEvent("/somewhere/else.py"))
+
+        self.assertEqual(self.collector.drain(), {"pkg/a.py", "pkg/old_dir", "pkg/new_dir"})
+        self.assertEqual(self.collector.drain(), set())
+        self.assertFalse(self.collector.changed.is_set())
+
+    def emit_every(self, interval: float, duration: float):
+        def emit():
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                self.event(FileModifiedEvent, "pkg/a.py")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=emit, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        return thread
+
+    def test_debounce_waits_for_quiet(self):
+        self.emit_every(0.05, 0.4)
+        started = time.monotonic()
+
+        self.assertTrue(self.watcher._wait_for_quiet())
+
+        elapsed = time.monotonic() - started
+        self.assertGreaterEqual(elapsed, 0.4 + 0.2 - 0.05)
+        self.assertLess(elapsed, 1.0)
+        self.assertGreaterEqual(time.monotonic() - self.collector.last_event_at, 0.2)
+
+    def test_max_delay_bounds_a_continuous_burst(self):
+        self.emit_every(0.05, 2.0)
+        started = time.monotonic()
+
+        self.assertTrue(self.watcher._wait_for_quiet())
+
+        self.assertLess(time.monotonic() - started, 1.0 + 0.6)
+
+    def test_stop_ends_the_wait(self):
+        threading.Timer(0.1, self.watcher.stop).start()
+
+        self.assertFalse(self.watcher._wait_for_quiet())
+
+class TestIndexableChanges(_WatcherTestCase):
+    """Verifies which paths a batch of events turns into, and that re-indexing them keeps the index in step."""
+
+    def test_moved_directory_expands_to_old_and_new_files(self):
+        shutil.move(str(self.root / "pkg/old_dir"), str(self.root / "pkg/new_dir"))
+
+        changes = self.watcher._indexable_changes({"pkg/old_dir", "pkg/new_dir"})
+
+        # The vanished directory itself is passed on too; the run treats missing paths as removed.
+        self.assertEqual(changes, {"pkg/old_dir", "pkg/old_dir/b.py", "pkg/old_dir/c.py", "pkg/new_dir/b.py", "pkg/new_dir/c.py"})
+        self.watcher._reindex({"pkg/old_dir", "pkg/new_dir"})
+        self.assertEqual(self.indexed_sources(self.indexer), {"pkg/a.py", "pkg/new_dir/b.py", "pkg/new_dir/c.py"})
+
+    def test_deleted_file_and_directory(self):
+        (self.root / "pkg/a.py").unlink()
+        shutil.rmtree(self.root / "pkg/old_dir")
+
+        self.assertEqual(self.watcher._indexable_changes({"pkg/a.py", "pkg/old_dir"}),
+                         {"pkg/a.py", "pkg/old_dir", "pkg/old_dir/b.py", "pkg/old_dir/c.py"})
+        self.watcher._reindex({"pkg/a.py", "pkg/old_dir"})
+        self.assertEqual(set(self.indexer.state), {".gitignore"})
+        self.assertEqual(self.indexed_sources(self.indexer), set())
+
+    def test_ignored_paths_are_dropped(self):
+        (self.root / "scratch.tmp").write_text("notes")
+        (self.root / "node_modules/lib").mkdir(parents=True)
+        (self.root / "node_modules/lib/index.js").write_text("module.exports = {};")
+
+        changes = self.watcher._indexable_changes({"scratch.tmp", "node_modules", "node_modules/lib/index.js", "pkg/a.py"})
+
+        self.assertEqual(changes, {"pkg/a.py"})
+        with mock.patch.object(self.indexer, "run") as run:
+            self.watcher._reindex({"scratch.tmp"})
+        run.assert_not_called()
+
+    def test_ignore_file_change_reloads_rules_and_rescans(self):
+        (self.root / ".gitignore").write_text("*.tmp\nold_dir/\n")
+
+        self.assertIsNone(self.watcher._indexable_changes({".gitignore", "pkg/a.py"}))
+        self.watcher._reindex({".gitignore"})
+
+        self.assertEqual(set(self.indexer.state), {".gitignore", "pkg/a.py"})
+        self.assertEqual(self.indexed_sources(self.indexer), {"pkg/a.py"})
+
+if __name__ == '__main__':
+    unittest.main()
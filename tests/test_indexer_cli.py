@@ -0,0 +1,56 @@
+# tests/test_indexer_cli.py
+import importlib.util
+import unittest
+from unittest import mock
+
+from ai_assistant import indexer as indexer_module
+from ai_assistant.config import OracleCloudConfig, ai_settings
+
+_find_spec = importlib.util.find_spec
+
+class TestDependencyCheck(unittest.TestCase):
+    """Verifies that 'ai-index' only requires the libraries of the backends it is configured to use."""
+
+    def setUp(self):
+        for name in ("index_backend", "embedding_provider", "oracle_cloud"):
+            self.addCleanup(setattr, ai_settings.rag, name, getattr(ai_settings.rag, name))
+        ai_settings.rag.oracle_cloud = OracleCloudConfig()
+        self.uninstalled = {"sentence_transformers", "psycopg2", "oci", "openai"}
+        patcher = mock.patch.object(indexer_module.importlib.util, "find_spec",
+                                    side_effect=lambda name: None if name in self.uninstalled else _find_spec(name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_main(self, *argv):
+        with mock.patch("sys.argv", ["ai-index", *argv]), \
+             mock.patch.object(indexer_module, "Indexer") as indexer_class, \
+             mock.patch.object(indexer_module, "setup_logging"):
+            indexer_module.main()
+        return indexer_class
+
+    def test_remote_provider_with_local_backend_needs_no_model_driver_or_sdk(self):
+        ai_settings.rag.index_backend = "local"
+
+        self.assertEqual(indexer_module._missing_dependencies("openai"), [])
+        indexer_class = self.run_main("--embedding-provider", "openai")
+
+        indexer_class.assert_called_once()
+        self.assertEqual(indexer_class.call_args.kwargs["embedding_provider"], "openai")
+
+    def test_selected_backends_add_their_libraries(self):
+        ai_settings.rag.index_backend = "postgres"
+        ai_settings.rag.oracle_cloud = OracleCloudConfig(namespace="ns", bucket="artifacts")
+
+        self.assertEqual(indexer_module._missing_dependencies("local"), ["sentence-transformers", "psycopg2-binary", "oci"])
+        self.assertEqual(indexer_module._missing_dependencies("openai", check_parity=True), ["sentence-transformers", "psycopg2-binary", "oci"])
+
+    def test_missing_library_stops_before_indexing(self):
+        ai_settings.rag.index_backend = "local"
+        ai_settings.rag.embedding_provider = "local"
+
+        indexer_class = self.run_main()
+
+        indexer_class.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
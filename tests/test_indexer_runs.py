@@ -0,0 +1,321 @@
+# tests/test_indexer_runs.py
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import orjson
+
+from ai_assistant import indexer as indexer_module
+from ai_assistant.config import ai_settings
+from ai_assistant.indexer import Indexer
+from ai_assistant.object_store import LocalObjectStore
+
+class _StubProvider:
+    """A deterministic embedding provider that records every text it is asked to embed."""
+    provider_name = "stub"
+    model_name = "stub-embedding"
+    backend = None
+    cache_key = "stub-embedding-4"
+    embedding_dim = 4
+    dimensions = None
+
+    def __init__(self):
+        self.texts = []
+
+    def get_embeddings(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(text)), 1.0, 0.0, 0.5] for text in texts]
+
+class _IndexerRunTestCase(unittest.TestCase):
+    """Runs the real indexer on a temporary project, against the local backend."""
+    settings = {"index_backend": "local", "export_snapshot": False}
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        for name, value in self.settings.items():
+            self.addCleanup(setattr, ai_settings.rag, name, getattr(ai_settings.rag, name))
+            setattr(ai_settings.rag, name, value)
+        self.provider = _StubProvider()
+
+    def write(self, rel_path: str, index: int):
+        path = self.root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"def function_{index}():\n    return 'value {index} of {rel_path}'\n")
+
+    def make_indexer(self) -> Indexer:
+        return Indexer(self.root, branch_override="main", embedding_provider=self.provider)
+
+    @staticmethod
+    def indexed_sources(indexer: Indexer):
+        return {source for source, _, _ in indexer._iter_chunk_hashes()}
+
+class TestStatFastPath(_IndexerRunTestCase):
+    """Verifies that files whose stat tuple is unchanged are trusted without being read."""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(4):
+            self.write(f"pkg/module_{i}.py", i)
+        self.indexer = self.make_indexer()
+        self.indexer.run(upload_artifacts=False)
+        self.hashed = []
+        original = indexer_module._hash_file_task
+
+        def counting_hash(file_path):
+            self.hashed.append(file_path.relative_to(self.root).as_posix())
+            return original(file_path)
+
+        patcher = mock.patch.object(indexer_module, "_hash_file_task", counting_hash)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unchanged_files_are_not_hashed(self):
+        self.indexer.run(upload_artifacts=False)
+
+        self.assertEqual(self.hashed, [])
+        self.assertEqual(len(self.provider.texts), 4)
+
+    def test_touched_file_is_rehashed_but_not_reindexed(self):
+        path = self.root / "pkg/module_1.py"
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        self.indexer.run(upload_artifacts=False)
+
+        self.assertEqual(self.hashed, ["pkg/module_1.py"])
+        self.assertEqual(len(self.provider.texts), 4)
+        self.assertEqual(self.indexer.state["pkg/module_1.py"]["mtime_ns"], path.stat().st_mtime_ns)
+
+    def test_modified_file_is_reindexed(self):
+        self.write("pkg/module_2.py", 99)
+
+        self.indexer.run(upload_artifacts=False)
+
+        self.assertEqual(self.hashed, ["pkg/module_2.py"])
+        self.assertIn("value 99", self.provider.texts[-1])
+
+    def test_paranoid_rehashes_everything(self):
+        self.indexer.run(paranoid=True, upload_artifacts=False)
+
+        self.assertEqual(len(self.hashed), 4)
+
+class TestWorkerDeterminism(_IndexerRunTestCase):
+    """Verifies that chunking in a process pool yields the same chunks, in the same order, as a single process."""
+    # Each run must embed every chunk, so the order in which texts reach the provider can be compared.
+    settings = {**_IndexerRunTestCase.settings, "enable_embedding_cache": False, "chunk_max_tokens": 32}
+
+    def index_with(self, workers: int):
+        self.provider = _StubProvider()
+        indexer = Indexer(self.root, branch_override="main", embedding_provider=self.provider, workers=workers)
+        indexer.run(force_reindex=True, upload_artifacts=False)
+        return sorted(indexer._iter_chunk_hashes()), dict(indexer.state), self.provider.texts
+
+    def test_one_and_many_workers_agree(self):
+        for i in range(30):
+            self.write(f"pkg/sub_{i % 4}/module_{i}.py", i)
+            (self.root / f"docs/page_{i}.md").parent.mkdir(exist_ok=True)
+            (self.root / f"docs/page_{i}.md").write_text(f"# Page {i}\n\n" + "\n\n".join(f"## Part {j}\n\n" + f"Text {i}.{j} of the page. " * 12 for j in range(i % 5 + 1)))
+
+        chunks, state, texts = self.index_with(1)
+        self.assertEqual(self.index_with(4), (chunks, state, texts))
+        # Multi-chunk files, so chunk ids beyond ':0' are compared too.
+        self.assertGreater(len(chunks), 100)
+
+class TestSQLiteStateBackend(_IndexerRunTestCase):
+    """Verifies that runs persist only changed state rows and write state.json only when it is published."""
+    settings = {**_IndexerRunTestCase.settings, "state_backend": "sqlite"}
+
+    def setUp(self):
+        super().setUp()
+        for i in range(3):
+            self.write(f"pkg/module_{i}.py", i)
+        self.indexer = self.make_indexer()
+        self.addCleanup(self.indexer.state_store.close)
+
+    def test_runs_do_not_write_state_json(self):
+        self.indexer.run(upload_artifacts=False)
+        self.write("pkg/module_1.py", 11)
+        store, rows_written = self.indexer.state_store, []
+        original_save = store.save
+        with mock.patch.object(store, "save", side_effect=lambda state: rows_written.append(original_save(state))):
+            self.indexer.run(upload_artifacts=False)
+
+        self.assertFalse(self.indexer.state_path.exists())
+        self.assertEqual(rows_written, [1])
+        self.assertEqual(self.make_indexer().state, self.indexer.state)
+
+    def test_publishing_exports_current_state_json(self):
+        self.indexer.run(upload_artifacts=False)
+        self.write("pkg/module_2.py", 22)
+        self.indexer.run(upload_artifacts=False)
+
+        self.indexer._publish_artifacts(LocalObjectStore(self.root / "bucket"))
+
+        self.assertEqual(orjson.loads(self.indexer.state_path.read_bytes()), self.indexer.state)
+        self.assertTrue(any(p.name == "state.json" for p in (self.root / "bucket").rglob("*")))
+
+class TestPipelineErrors(_IndexerRunTestCase):
+    """Verifies that a failure in any pipeline thread reaches the caller instead of stalling the other stages."""
+    settings = {
+        **_IndexerRunTestCase.settings,
+        "indexer_queue_depth": 1,
+        "embedding_pipeline_batch_size": 1,
+        "bulk_sync_batch_rows": 1,
+    }
+
+    def run_in_thread(self, indexer: Indexer) -> list:
+        outcome = []
+
+        def target():
+            try:
+                indexer.run(upload_artifacts=False)
+            except BaseException as e:
+                outcome.append(e)
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+        self.assertFalse(thread.is_alive(), "the indexer pipeline deadlocked")
+        return outcome
+
+    def test_writer_exception_reaches_caller(self):
+        # Enough files that the chunker and embedder are blocked on full queues when the writer fails.
+        for i in range(40):
+            self.write(f"pkg/module_{i}.py", i)
+        indexer = self.make_indexer()
+
+        with mock.patch.object(indexer, "_sync_files_bulk", side_effect=RuntimeError("disk full")):
+            outcome = self.run_in_thread(indexer)
+
+        self.assertEqual([type(e) for e in outcome], [RuntimeError])
+        self.assertEqual(str(outcome[0]), "disk full")
+        self.assertFalse(indexer._run_completed)
+        self.assertLess(len(self.provider.texts), 40)
+
+    def test_embedding_exception_reaches_caller(self):
+        for i in range(40):
+            self.write(f"pkg/module_{i}.py", i)
+        indexer = self.make_indexer()
+
+        with mock.patch.object(self.provider, "get_embeddings", side_effect=ValueError("bad response")):
+            outcome = self.run_in_thread(indexer)
+
+        self.assertEqual([type(e) for e in outcome], [ValueError])
+        self.assertEqual(indexer.state, {})
+
+class TestResume(_IndexerRunTestCase):
+    """Verifies that --resume after a crash embeds only the files that were not committed."""
+    settings = {
+        **_IndexerRunTestCase.settings,
+        "embedding_pipeline_batch_size": 1,
+        "bulk_sync_batch_rows": 1,
+        "checkpoint_every_files": 1,
+        # Otherwise vectors embedded before the crash are served from the cache and never counted.
+        "enable_embedding_cache": False,
+    }
+
+    def crash_after_five_files(self, indexer: Indexer, **run_args) -> list:
+        original_sync = indexer._sync_files_bulk
+        synced = []
+
+        def crash_on_sixth_batch(items):
+            if len(synced) == 5:
+                raise KeyboardInterrupt
+            original_sync(items)
+            synced.extend(rel_path_str for rel_path_str, _, _ in items)
+
+        with mock.patch.object(indexer, "_sync_files_bulk", side_effect=crash_on_sixth_batch):
+            with self.assertRaises(KeyboardInterrupt):
+                indexer.run(upload_artifacts=False, **run_args)
+        self.assertTrue(indexer.checkpoint_path.exists())
+        return synced
+
+    def test_resume_skips_committed_files(self):
+        for i in range(10):
+            self.write(f"pkg/module_{i}.py", i)
+        synced = self.crash_after_five_files(self.make_indexer())
+
+        self.provider = _StubProvider()
+        resumed = self.make_indexer()
+        self.assertEqual(set(resumed.state), set(synced))
+        processed = []
+        original_process = resumed._process_files
+
+        def record_files(files):
+            processed.extend(str(file_path.relative_to(self.root)) for file_path, _ in files)
+            return original_process(files)
+
+        with mock.patch.object(resumed, "_process_files", side_effect=record_files):
+            resumed.run(resume=True, upload_artifacts=False)
+
+        self.assertEqual(sorted(processed), sorted({f"pkg/module_{i}.py" for i in range(10)} - set(synced)))
+        self.assertEqual(len(self.provider.texts), 10 - len(synced))
+        self.assertEqual([text for text in self.provider.texts if any(f"of {path}'" in text for path in synced)], [])
+        self.assertEqual(self.indexed_sources(resumed), {f"pkg/module_{i}.py" for i in range(10)})
+        self.assertFalse(resumed.checkpoint_path.exists())
+
+    def test_resumed_forced_run_keeps_written_files(self):
+        for i in range(10):
+            self.write(f"pkg/module_{i}.py", i)
+        self.make_indexer().run(upload_artifacts=False)
+        crashed = self.make_indexer()
+        synced = self.crash_after_five_files(crashed, force_reindex=True)
+        self.assertEqual(self.indexed_sources(crashed), set(synced))
+
+        resumed = self.make_indexer()
+        self.assertEqual(set(resumed.state), set(synced))
+        resumed.run(resume=True, upload_artifacts=False)
+
+        self.assertEqual(set(resumed.state), {f"pkg/module_{i}.py" for i in range(10)})
+        self.assertEqual(self.indexed_sources(resumed), set(resumed.state))
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class TestGitIncremental(_IndexerRunTestCase):
+    """Verifies that renames and deletions reported by git are removed from the index."""
+
+    def git(self, *args: str):
+        subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                       cwd=self.root, check=True, capture_output=True)
+
+    def setUp(self):
+        super().setUp()
+        for i, name in enumerate(("src/old_name.py", "src/removed.py", "src/kept.py")):
+            self.write(name, i)
+        self.git("init", "-q")
+        self.git("add", "src")
+        self.git("commit", "-q", "-m", "initial")
+        self.indexer = self.make_indexer()
+        self.indexer.run(upload_artifacts=False)
+
+    def test_rename_and_delete_are_removed(self):
+        self.git("mv", "src/old_name.py", "src/new_name.py")
+        self.git("rm", "-q", "src/removed.py")
+        self.git("commit", "-q", "-m", "rename and delete")
+
+        changed, deleted = self.indexer._git_changed_paths(self.indexer._load_previous_manifest())
+        self.assertEqual(deleted, {"src/old_name.py", "src/removed.py"})
+        # The untracked index directory is listed too; the ignore rules drop it later.
+        self.assertEqual({path for path in changed if path.startswith("src/")}, {"src/new_name.py"})
+
+        with mock.patch.object(self.indexer, "_walk_project", side_effect=AssertionError("walked the project")):
+            self.indexer.run(git_incremental=True, upload_artifacts=False)
+
+        self.assertEqual(set(self.indexer.state), {"src/new_name.py", "src/kept.py"})
+        self.assertEqual(self.indexed_sources(self.indexer), {"src/new_name.py", "src/kept.py"})
+
+    def test_uncommitted_delete_is_removed(self):
+        (self.root / "src/removed.py").unlink()
+
+        self.indexer.run(git_incremental=True, upload_artifacts=False)
+
+        self.assertNotIn("src/removed.py", self.indexer.state)
+        self.assertEqual(self.indexed_sources(self.indexer), {"src/old_name.py", "src/kept.py"})
+
+if __name__ == '__main__':
+    unittest.main()
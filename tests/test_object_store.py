@@ -0,0 +1,50 @@
+# tests/test_object_store.py
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_assistant.object_store import LocalObjectStore, upload_file
+
+class _FailingPartStore(LocalObjectStore):
+    def upload_part(self, name, upload_id, part_number, data):
+        if part_number == 3:
+            raise IOError("connection reset")
+        return super().upload_part(name, upload_id, part_number, data)
+
+class TestUploadFile(unittest.TestCase):
+    """Verifies single-shot and parallel multipart uploads against the filesystem stand-in."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.source = self.temp_dir / "artifact.bin"
+        self.source.write_bytes(os.urandom(10_000))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_small_file_single_put(self):
+        store = LocalObjectStore(self.temp_dir / "bucket")
+        upload_file(store, self.source, "indexes/p/main/latest/state.json", part_size=1 << 20)
+        self.assertEqual((self.temp_dir / "bucket/indexes/p/main/latest/state.json").read_bytes(), self.source.read_bytes())
+
+    def test_multipart_reassembles_in_order(self):
+        store = LocalObjectStore(self.temp_dir / "bucket")
+        upload_file(store, self.source, "snapshots/v1/snapshot.tar.gz", part_size=1024, parallelism=4)
+        self.assertEqual((self.temp_dir / "bucket/snapshots/v1/snapshot.tar.gz").read_bytes(), self.source.read_bytes())
+        self.assertEqual(list(store.uploads_dir.iterdir()), [])
+
+    def test_failed_part_aborts_upload(self):
+        store = _FailingPartStore(self.temp_dir / "bucket")
+        with self.assertRaises(IOError):
+            upload_file(store, self.source, "snapshots/v1/snapshot.tar.gz", part_size=1024, parallelism=2)
+        self.assertFalse((self.temp_dir / "bucket/snapshots/v1/snapshot.tar.gz").exists())
+        self.assertEqual(list(store.uploads_dir.iterdir()), [])
+
+    def test_object_names_cannot_escape_root(self):
+        with self.assertRaises(ValueError):
+            LocalObjectStore(self.temp_dir / "bucket").put_object("../outside", self.source)
+
+if __name__ == '__main__':
+    unittest.main()
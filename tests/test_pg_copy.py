@@ -0,0 +1,35 @@
+# tests/test_pg_copy.py
+import io
+import struct
+import unittest
+
+from ai_assistant.utils import pg_copy
+
+class TestPgCopyEncoding(unittest.TestCase):
+    """Checks the binary COPY stream against the layout PostgreSQL expects."""
+
+    def test_vector_encoding(self):
+        encoded = pg_copy.encode_vector([1.0, -2.5])
+        self.assertEqual(encoded, struct.pack(">HHff", 2, 0, 1.0, -2.5))
+
+    def test_halfvec_encoding(self):
+        encoded = pg_copy.encode_halfvec([1.0, -2.5])
+        self.assertEqual(encoded, struct.pack(">HHee", 2, 0, 1.0, -2.5))
+        self.assertEqual(len(encoded), 4 + 2 * 2)
+
+    def test_jsonb_has_version_prefix(self):
+        self.assertEqual(pg_copy.encode_jsonb({"source": "a.py"}), b'\x01{"source":"a.py"}')
+
+    def test_stream_layout(self):
+        out = io.BytesIO()
+        count = pg_copy.write_copy_binary([(b"id-1", None)], out)
+        data = out.getvalue()
+
+        self.assertEqual(count, 1)
+        self.assertTrue(data.startswith(pg_copy.PGCOPY_HEADER))
+        self.assertTrue(data.endswith(pg_copy.PGCOPY_TRAILER))
+        body = data[len(pg_copy.PGCOPY_HEADER):-len(pg_copy.PGCOPY_TRAILER)]
+        self.assertEqual(body, struct.pack(">hi", 2, 4) + b"id-1" + struct.pack(">i", -1))
+
+if __name__ == '__main__':
+    unittest.main()
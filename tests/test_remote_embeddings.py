@@ -0,0 +1,60 @@
+# tests/test_remote_embeddings.py
+import os
+import unittest
+from unittest import mock
+
+from ai_assistant.config import ai_settings
+from ai_assistant.indexer import EmbeddingProvider
+from ai_assistant.remote_embeddings import RemoteEmbeddingClient, RemoteEmbeddingError, TokenBucket, plan_requests
+from ai_assistant.utils.mock_embedding_server import MockEmbeddingServer, mock_embedding
+
+class TestRemoteEmbeddings(unittest.TestCase):
+    """Verifies request planning, concurrency, retries and rate limiting against the bundled mock server."""
+
+    def _client(self, server: MockEmbeddingServer, **kwargs) -> RemoteEmbeddingClient:
+        options = dict(request_tokens=100, request_inputs=4, concurrency=4, max_retries=3, backoff_base_seconds=0.001)
+        options.update(kwargs)
+        return RemoteEmbeddingClient(server.base_url, "test-key", "mock-model", **options)
+
+    def test_plan_requests_is_ordered_and_bounded(self):
+        self.assertEqual(plan_requests([40, 40, 40, 500, 10, 10, 10], token_budget=100, max_inputs=2), [[0, 1], [2], [3], [4, 5], [6]])
+
+    def test_embeddings_come_back_in_input_order_with_requests_in_flight(self):
+        texts = [f"text number {i} " * (i % 7 + 1) for i in range(40)]
+        with MockEmbeddingServer(dim=8, latency_ms=30) as server:
+            vectors = self._client(server).embed(texts)
+        self.assertEqual(vectors, [mock_embedding(t, 8) for t in texts])
+        self.assertGreater(server.requests, 1)
+        self.assertGreater(server.max_in_flight, 1)
+        self.assertLessEqual(server.max_in_flight, 4)
+
+    def test_rate_limited_and_failed_requests_are_retried(self):
+        texts = [f"chunk {i}" for i in range(30)]
+        with MockEmbeddingServer(dim=4, rate_limit_every=3, error_every=5) as server:
+            vectors = self._client(server).embed(texts)
+        self.assertEqual(vectors, [mock_embedding(t, 4) for t in texts])
+        self.assertGreater(server.injected_failures, 0)
+
+    def test_rejected_request_is_not_retried(self):
+        with MockEmbeddingServer(dim=4, max_inputs=2) as server:
+            with self.assertRaises(RemoteEmbeddingError):
+                self._client(server).embed([f"chunk {i}" for i in range(4)])
+        self.assertEqual(server.requests, 0)
+
+    def test_token_bucket_charges_debt_as_wait_time(self):
+        bucket = TokenBucket(per_minute=600)
+        self.assertEqual(bucket.reserve(600), 0.0)
+        self.assertAlmostEqual(bucket.reserve(60), 6.0, delta=0.1)
+
+    def test_openai_provider_uses_the_configured_endpoint(self):
+        rag = ai_settings.rag
+        with MockEmbeddingServer(dim=16) as server:
+            with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}), \
+                 mock.patch.multiple(rag, remote_embedding_base_url=server.base_url, remote_embedding_dim=16, embedding_dimensions=8):
+                provider = EmbeddingProvider("openai")
+                vectors = provider.get_embeddings(["alpha", "beta"])
+        self.assertEqual((provider.embedding_dim, provider.cache_key), (8, f"{rag.remote_embedding_model}@8"))
+        self.assertEqual(vectors, [mock_embedding("alpha", 8), mock_embedding("beta", 8)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+# tests/test_shared_chunk_store.py
+import unittest
+from contextlib import contextmanager
+
+from ai_assistant.indexer import Indexer
+
+class _FakeCursor:
+    def __init__(self, statements):
+        self.statements = statements
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql, params=None):
+        self.statements.append((" ".join(sql.split()), params))
+
+    def copy_expert(self, sql, buffer):
+        self.statements.append((" ".join(sql.split()), None))
+
+class _FakeRawConnection:
+    def __init__(self):
+        self.statements = []
+        self.committed = False
+
+    def cursor(self):
+        return _FakeCursor(self.statements)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        raise AssertionError("The bulk sync should not fail.")
+
+    def close(self):
+        pass
+
+class _Result:
+    rowcount = 0
+
+    def __init__(self, scalar=None, rows=()):
+        self._scalar, self._rows = scalar, list(rows)
+
+    def scalar(self):
+        return self._scalar
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+class _FakeEngine:
+    """Records statements; answers catalog lookups from `relations` (name -> relkind) and `indexes` (name -> table)."""
+
+    def __init__(self, relations=None, indexes=None):
+        self.raw = _FakeRawConnection()
+        self.statements = []
+        self.relations = dict(relations or {})
+        self.indexes = dict(indexes or {})
+
+    def raw_connection(self):
+        return self.raw
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    connect = begin
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append((sql, params))
+        if "FROM pg_class" in sql:
+            return _Result(scalar=self.relations.get(params["name"]))
+        if "FROM pg_indexes" in sql:
+            return _Result(rows=[name for name, table in self.indexes.items()
+                                 if table == params["table_name"] and name in params["names"]])
+        return _Result()
+
+def _make_indexer() -> Indexer:
+    indexer = Indexer.__new__(Indexer)
+    indexer.store, indexer.shared_chunk_store = None, True
+    indexer.vector_storage_type, indexer.vector_sql_type = "vector", "vector(2)"
+    indexer.branch, indexer.table_name = "main", "codebase_collection_project_main"
+    indexer.write_table_name = indexer.table_name
+    indexer.project_prefix = "codebase_collection_project"
+    indexer.chunks_table_name = "codebase_chunks_project"
+    indexer.branches_table_name = "codebase_branches_project"
+    indexer.members_table_name = indexer._index_name("members")
+    indexer.state = {}
+    indexer.engine = _FakeEngine()
+    return indexer
+
+class TestSharedChunkLocking(unittest.TestCase):
+    """Verifies that syncs and the prune agree on one advisory lock, so a prune cannot orphan a new member row."""
+
+    def test_bulk_sync_holds_shared_lock_before_inserting_chunks(self):
+        indexer = _make_indexer()
+        chunk = {
+            "id": "src/a.py:0", "document": "print(1)", "embedding": [0.5, 0.5],
+            "metadata": {"source": "src/a.py", "chunk_hash": "h0", "language": "python"},
+        }
+
+        indexer._sync_files_bulk([("src/a.py", {"hash": "x"}, [chunk])])
+
+        raw = indexer.engine.raw
+        self.assertTrue(raw.committed)
+        sqls = [sql for sql, _ in raw.statements]
+        lock = sqls.index("SELECT pg_advisory_xact_lock_shared(hashtext(%s))")
+        self.assertEqual(raw.statements[lock][1], (indexer.chunks_table_name,))
+        chunk_insert = next(i for i, sql in enumerate(sqls) if sql.startswith(f"INSERT INTO {indexer.chunks_table_name}"))
+        member_insert = next(i for i, sql in enumerate(sqls) if sql.startswith(f"INSERT INTO {indexer.write_table_name}"))
+        self.assertLess(lock, chunk_insert)
+        self.assertLess(chunk_insert, member_insert)
+
+    def test_prune_takes_the_same_lock_exclusively(self):
+        indexer = _make_indexer()
+
+        indexer.prune_shared_chunks()
+
+        sql, params = indexer.engine.statements[0]
+        self.assertEqual(sql, "SELECT pg_advisory_xact_lock(hashtext(:name))")
+        self.assertEqual(params, {"name": indexer.chunks_table_name})
+
+class TestSharedLayoutSwitch(unittest.TestCase):
+    """Verifies that the shared layout leaves no index names or tables behind that block per-branch tables."""
+
+    @staticmethod
+    def created_indexes(engine):
+        return [sql.split()[5] for sql, _ in engine.statements if sql.startswith("CREATE INDEX IF NOT EXISTS")]
+
+    def test_member_indexes_are_named_after_the_members_table(self):
+        indexer = _make_indexer()
+
+        indexer._setup_shared_chunk_store(force_reindex=False)
+
+        branch_names = {indexer._index_name(name + "_idx") for name in ("source", "chunk_hash", "language")}
+        member_names = {indexer._index_name(name + "_idx", indexer.members_table_name) for name in ("source", "chunk_hash", "language")}
+        self.assertTrue(member_names <= set(self.created_indexes(indexer.engine)))
+        self.assertFalse(branch_names & set(self.created_indexes(indexer.engine)))
+
+    def test_legacy_member_indexes_are_renamed(self):
+        indexer = _make_indexer()
+        legacy = indexer._index_name("source_idx")
+        indexer.engine = _FakeEngine(indexes={legacy: indexer.members_table_name})
+
+        indexer._setup_shared_chunk_store(force_reindex=False)
+
+        renamed = f'ALTER INDEX "{legacy}" RENAME TO "{indexer._index_name("source_idx", indexer.members_table_name)}";'
+        self.assertIn(renamed, [sql for sql, _ in indexer.engine.statements])
+
+    def test_switch_back_to_per_branch_tables(self):
+        indexer = _make_indexer()
+        indexer.shared_chunk_store = False
+        indexer.engine = _FakeEngine(relations={indexer.table_name: 'v', indexer.branches_table_name: 'r'})
+
+        with self.assertRaises(ValueError):
+            indexer._setup_database_table(force_reindex=False)
+        indexer._setup_database_table(force_reindex=True)
+
+        sql = [statement for statement, _ in indexer.engine.statements]
+        self.assertIn(f"DROP VIEW {indexer.table_name};", sql)
+        self.assertIn(f"DROP TABLE IF EXISTS {indexer.members_table_name};", sql)
+        self.assertIn(f"DELETE FROM {indexer.branches_table_name} WHERE branch = :branch", sql)
+        self.assertLess(sql.index(f"DROP TABLE IF EXISTS {indexer.members_table_name};"),
+                        sql.index(next(s for s in sql if s.startswith(f"CREATE TABLE IF NOT EXISTS {indexer.table_name}"))))
+        self.assertEqual(set(self.created_indexes(indexer.engine)),
+                         {indexer._index_name(name) for name in ("source_idx", "chunk_hash_idx", "language_idx", "hnsw_idx")})
+
+if __name__ == '__main__':
+    unittest.main()